@@ -1,9 +1,12 @@
 from django.contrib import admin
-from .models import Content, Vote, Comment, LivePerformance, ArtistUploadLimit
+from .models import Content, Vote, PendingVote, Comment, LivePerformance, ArtistUploadLimit
 from django.contrib import admin
 from .models import Content, Badge, ParticipationRequest
 from users.models import OTP
-from .models import Voucher
+from .models import LeaderboardSnapshot, LeaderboardSnapshotEntry, Voucher
+from .feed import bump_feed_version
+from .neighbors import schedule_neighbor_refresh
+from search.typeahead import refresh_content_entries
 
 class ContentAdmin(admin.ModelAdmin):
     list_display = (
@@ -16,7 +19,7 @@ class ContentAdmin(admin.ModelAdmin):
         'genre',
     )
     list_editable = ('is_approved', 'is_visible', 'is_approved_for_voting')
-    list_filter = ('is_approved', 'is_visible', 'is_approved_for_voting', 'upload_date', 'genre')
+    list_filter = ('is_approved', 'is_visible', 'is_approved_for_voting', 'upload_date', 'genre', 'media_kind')
     search_fields = ('title', 'artist__username')
     actions = [
         'approve_content',
@@ -27,28 +30,38 @@ class ContentAdmin(admin.ModelAdmin):
         'disapprove_voting',
     ]
 
+    def _bulk_update(self, queryset, **fields):
+        # queryset.update() skips post_save, so refresh the featured feed
+        # and the typeahead index here.
+        content_ids = list(queryset.values_list('id', flat=True))
+        queryset.update(**fields)
+        bump_feed_version()
+        refresh_content_entries(content_ids)
+
     def approve_content(self, request, queryset):
-        queryset.update(is_approved=True)
+        content_ids = list(queryset.values_list('id', flat=True))
+        self._bulk_update(queryset, is_approved=True)
+        schedule_neighbor_refresh(content_ids)
     approve_content.short_description = "Approve selected content"
 
     def disapprove_content(self, request, queryset):
-        queryset.update(is_approved=False)
+        self._bulk_update(queryset, is_approved=False)
     disapprove_content.short_description = "Disapprove selected content"
 
     def show_content(self, request, queryset):
-        queryset.update(is_visible=True)
+        self._bulk_update(queryset, is_visible=True)
     show_content.short_description = "Show selected content"
 
     def hide_content(self, request, queryset):
-        queryset.update(is_visible=False)
+        self._bulk_update(queryset, is_visible=False)
     hide_content.short_description = "Hide selected content"
 
     def approve_voting(self, request, queryset):
-        queryset.update(is_approved_for_voting=True)
+        self._bulk_update(queryset, is_approved_for_voting=True)
     approve_voting.short_description = "Approve selected content for voting"
 
     def disapprove_voting(self, request, queryset):
-        queryset.update(is_approved_for_voting=False)
+        self._bulk_update(queryset, is_approved_for_voting=False)
     disapprove_voting.short_description = "Disapprove selected content for voting"
 
 admin.site.register(Content, ContentAdmin)
@@ -105,6 +118,12 @@ class VoteAdmin(admin.ModelAdmin):
     list_display = ('content', 'fan', 'value', 'is_badge_vote', 'timestamp', 'otp_code', 'tag')
     list_filter = ('timestamp', 'is_badge_vote')
 
+@admin.register(PendingVote)
+class PendingVoteAdmin(admin.ModelAdmin):
+    list_display = ('content', 'fan', 'base_value', 'status', 'detail', 'accepted_at', 'processed_at')
+    list_filter = ('status', 'accepted_at')
+    readonly_fields = ('accepted_at', 'processed_at')
+
 @admin.register(OTP)
 class OTPAdmin(admin.ModelAdmin):
     list_display = ('user', 'otp_code', 'remaining_votes', 'created_at')
@@ -122,3 +141,25 @@ class VoucherAdmin(admin.ModelAdmin):
     list_display = ['code', 'performance', 'is_used', 'created_by', 'used_by']
     search_fields = ['code', 'performance__title']
     list_filter = ['is_used', 'created_at']
+
+
+class LeaderboardSnapshotEntryInline(admin.TabularInline):
+    model = LeaderboardSnapshotEntry
+    fields = ('rank', 'content_title', 'genre_name', 'genre_rank', 'total_points', 'total_votes', 'badge_votes')
+    readonly_fields = fields
+    extra = 0
+    can_delete = False
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(LeaderboardSnapshot)
+class LeaderboardSnapshotAdmin(admin.ModelAdmin):
+    list_display = ('name', 'created_at', 'created_by')
+    readonly_fields = ('name', 'created_at', 'created_by')
+    inlines = [LeaderboardSnapshotEntryInline]
+
+    def has_add_permission(self, request):
+        # Rounds are frozen with `manage.py freeze_leaderboard`.
+        return False
@@ -0,0 +1,229 @@
+"""
+Voting load test behind `manage.py benchmark_votes`.
+
+`seed` creates a throwaway contest under a unique name prefix: genres,
+approved content, fans with OTPs, and badges for some of them. `run`
+replays a vote workload against vote_content through the Django test
+client. Each fan votes in order on its own client, and up to `concurrency`
+fans run at once. `summarize` turns the per-request samples into the JSON
+report: throughput, latency percentiles, queries per request, time spent
+in row-lock queries, and error rates. `cleanup` removes the seeded rows.
+"""
+import json
+import platform
+import random
+import time
+import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import django
+import numpy as np
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connection, connections
+from django.test import Client, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from users.models import OTP, Role
+
+from .models import Badge, Content, Genre
+
+
+LOCK_ERROR_MARKERS = ("lock", "deadlock")
+
+
+class _QueryProbe:
+    """
+    connection.execute_wrapper that counts one request's queries, times the
+    SELECT ... FOR UPDATE ones and notices lock failures.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.lock_seconds = 0.0
+        self.lock_error = False
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        except Exception as exc:
+            if any(marker in str(exc).lower() for marker in LOCK_ERROR_MARKERS):
+                self.lock_error = True
+            raise
+        finally:
+            if "FOR UPDATE" in sql.upper():
+                self.lock_seconds += time.perf_counter() - started
+
+
+def seed(fans, contents, genres, votes_per_fan, badge_ratio=0.1, seed_value=0):
+    """
+    Create the contest and plan each fan's votes. Returns (prefix, plan)
+    where plan is [(fan, otp_code, [(content_id, rank), ...]), ...]; ranks
+    descend from 10 within each genre, so every planned vote is valid.
+    """
+    rng = random.Random(seed_value)
+    prefix = f"bench-{uuid.uuid4().hex[:8]}"
+    User = get_user_model()
+
+    genre_rows = [Genre.objects.create(name=f"{prefix}-genre-{index}") for index in range(max(1, genres))]
+    artist = User.objects.create_user(username=f"{prefix}-artist", password=None, role=Role.ARTIST)
+    content_rows = [
+        Content.objects.create(
+            title=f"{prefix} item {index}",
+            artist=artist,
+            genre=genre_rows[index % len(genre_rows)],
+            is_approved=True,
+            is_approved_for_voting=True,
+        )
+        for index in range(max(1, contents))
+    ]
+
+    new_fans = []
+    for index in range(fans):
+        fan = User(username=f"{prefix}-fan-{index}", role=Role.FAN)
+        fan.set_unusable_password()
+        new_fans.append(fan)
+    User.objects.bulk_create(new_fans)
+    fan_rows = list(User.objects.filter(username__startswith=f"{prefix}-fan-").order_by("pk"))
+
+    codes = {fan.pk: f"{rng.randint(100000, 999999)}" for fan in fan_rows}
+    OTP.objects.bulk_create(
+        [OTP(user=fan, otp_code=codes[fan.pk], remaining_votes=votes_per_fan, is_active=True) for fan in fan_rows]
+    )
+    Badge.objects.bulk_create(
+        [Badge(user=fan, level=rng.randint(1, 3)) for fan in fan_rows[: round(len(fan_rows) * badge_ratio)]]
+    )
+
+    plan = []
+    for fan in fan_rows:
+        next_rank = Counter()
+        votes = []
+        for content in rng.sample(content_rows, min(votes_per_fan, len(content_rows))):
+            rank = 10 - next_rank[content.genre_id]
+            if rank < 1:
+                continue
+            next_rank[content.genre_id] += 1
+            votes.append((content.pk, rank))
+        plan.append((fan, codes[fan.pk], votes))
+    return prefix, plan
+
+
+def cleanup(prefix):
+    # Fans and the artist take their content, votes, OTPs and badges along.
+    get_user_model().objects.filter(username__startswith=f"{prefix}-").delete()
+    Genre.objects.filter(name__startswith=f"{prefix}-").delete()
+
+
+def _replay(fan, otp_code, votes):
+    client = Client()
+    client.force_login(fan)
+    samples = []
+    for content_id, rank in votes:
+        probe = _QueryProbe()
+        body = {}
+        started = time.perf_counter()
+        with connection.execute_wrapper(probe):
+            try:
+                response = client.post(
+                    reverse("vote_content", args=[content_id]),
+                    data=json.dumps({"vote_value": rank, "otp_code": otp_code, "voter_tag": "benchmark"}),
+                    content_type="application/json",
+                )
+                status_code = response.status_code
+                body = response.json()
+            except Exception as exc:
+                status_code = 500
+                body = {"status": "error", "message": str(exc)}
+        latency = time.perf_counter() - started
+
+        message = str(body.get("message", ""))
+        if status_code >= 500:
+            outcome = "error"
+        elif body.get("status") == "success":
+            outcome = "accepted"
+        else:
+            outcome = "rejected"
+        samples.append(
+            {
+                "latency": latency,
+                "queries": probe.count,
+                "lock_wait": probe.lock_seconds,
+                "outcome": outcome,
+                "message": message if outcome != "accepted" else "",
+                "lock_error": probe.lock_error
+                or (outcome == "error" and any(marker in message.lower() for marker in LOCK_ERROR_MARKERS)),
+            }
+        )
+    return samples
+
+
+def _replay_in_thread(fan, otp_code, votes):
+    try:
+        return _replay(fan, otp_code, votes)
+    finally:
+        connections.close_all()
+
+
+def run(plan, concurrency=8):
+    """
+    Replay the plan. Returns (samples, wall_seconds). With concurrency 1
+    everything runs in the calling thread and on its connection.
+    """
+    samples = []
+    # The test client talks to the app as "testserver".
+    with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"]):
+        started = time.perf_counter()
+        if concurrency <= 1:
+            for fan, otp_code, votes in plan:
+                samples.extend(_replay(fan, otp_code, votes))
+        else:
+            with ThreadPoolExecutor(max_workers=concurrency) as pool:
+                for fan_samples in pool.map(lambda entry: _replay_in_thread(*entry), plan):
+                    samples.extend(fan_samples)
+        wall_seconds = time.perf_counter() - started
+    return samples, wall_seconds
+
+
+def _distribution(values, scale=1.0):
+    if not len(values):
+        return {"mean": None, "p50": None, "p95": None, "p99": None, "max": None}
+    values = np.asarray(values, dtype=float) * scale
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {
+        "mean": round(float(values.mean()), 3),
+        "p50": round(float(p50), 3),
+        "p95": round(float(p95), 3),
+        "p99": round(float(p99), 3),
+        "max": round(float(values.max()), 3),
+    }
+
+
+def summarize(samples, wall_seconds, config, label=""):
+    outcomes = Counter(sample["outcome"] for sample in samples)
+    requests = len(samples)
+    lock_errors = sum(1 for sample in samples if sample["lock_error"])
+    return {
+        "label": label,
+        "generated_at": timezone.now().isoformat(),
+        "environment": {
+            "django": django.get_version(),
+            "python": platform.python_version(),
+            "database": connection.vendor,
+            "vote_ingestion_mode": getattr(settings, "VOTE_INGESTION_MODE", "sync"),
+        },
+        "config": config,
+        "requests": requests,
+        "wall_seconds": round(wall_seconds, 3),
+        "throughput_rps": round(requests / wall_seconds, 2) if wall_seconds > 0 else None,
+        "latency_ms": _distribution([sample["latency"] for sample in samples], scale=1000),
+        "queries_per_request": _distribution([sample["queries"] for sample in samples]),
+        "lock_wait_ms": _distribution([sample["lock_wait"] for sample in samples], scale=1000),
+        "outcomes": {name: outcomes.get(name, 0) for name in ("accepted", "rejected", "error")},
+        "rejections": dict(Counter(sample["message"] for sample in samples if sample["outcome"] == "rejected")),
+        "error_rate": round(outcomes.get("error", 0) / requests, 4) if requests else 0,
+        "lock_error_rate": round(lock_errors / requests, 4) if requests else 0,
+    }
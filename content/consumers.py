@@ -0,0 +1,41 @@
+import json
+
+from channels.db import database_sync_to_async
+from channels.generic.websocket import AsyncWebsocketConsumer
+
+from . import live_updates
+from .models import Content
+from .views import can_view_content
+
+
+class ContentUpdatesConsumer(AsyncWebsocketConsumer):
+    """
+    Read-only stream of vote totals, view and watcher counts and new
+    comments for one content item, coalesced by content.live_updates.
+    """
+
+    async def connect(self):
+        self.user = self.scope["user"]
+        self.content_id = int(self.scope["url_route"]["kwargs"]["content_id"])
+
+        if not await self.can_subscribe():
+            await self.close(code=4403)
+            return
+
+        self.group_name = live_updates.group_name(self.content_id)
+        await self.channel_layer.group_add(self.group_name, self.channel_name)
+        await self.accept()
+        await database_sync_to_async(live_updates.watcher_joined)(self.content_id)
+
+    async def disconnect(self, close_code):
+        if hasattr(self, "group_name"):
+            await self.channel_layer.group_discard(self.group_name, self.channel_name)
+            await database_sync_to_async(live_updates.watcher_left)(self.content_id)
+
+    async def content_update(self, event):
+        await self.send(text_data=json.dumps(event["update"]))
+
+    @database_sync_to_async
+    def can_subscribe(self):
+        content = Content.objects.filter(pk=self.content_id).first()
+        return content is not None and can_view_content(self.user, content)
@@ -0,0 +1,177 @@
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce, Greatest
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import live_updates
+from .models import Comment, Content, Vote
+
+
+COUNTER_FIELDS = ("view_count", "vote_count", "vote_sum", "badge_vote_count", "comment_count")
+VOTE_COUNTER_FIELDS = ("vote_count", "vote_sum", "badge_vote_count")
+
+
+def increment_counters(content_id, **deltas):
+    """
+    Apply atomic F() increments to the denormalized engagement columns.
+    Zero deltas are skipped so callers can pass computed differences directly.
+    """
+    updates = {
+        field: F(field) + delta if delta > 0 or field == "vote_sum" else Greatest(F(field) + delta, 0)
+        for field, delta in deltas.items()
+        if field in COUNTER_FIELDS and delta
+    }
+    if not updates:
+        return 0
+    updated = Content.objects.filter(pk=content_id).update(**updates)
+    live_updates.content_changed(content_id)
+    return updated
+
+
+def reset_vote_counters(content_ids):
+    return Content.objects.filter(pk__in=list(content_ids)).update(
+        **{field: 0 for field in VOTE_COUNTER_FIELDS}
+    )
+
+
+@receiver(m2m_changed, sender=Content.viewers.through)
+def sync_view_count(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Keep view_count in step with the viewers M2M, whichever side it is edited from.
+    Django only passes newly added/removed ids in pk_set, so repeat views are free.
+    Reverse-side clears are left for `reconcile_content_counters` to repair.
+    """
+    if action == "post_clear" and not reverse:
+        Content.objects.filter(pk=instance.pk).update(view_count=0)
+        return
+    if action not in {"post_add", "post_remove"} or not pk_set:
+        return
+
+    step = 1 if action == "post_add" else -1
+    if reverse:
+        Content.objects.filter(pk__in=pk_set).update(view_count=F("view_count") + step)
+    else:
+        increment_counters(instance.pk, view_count=step * len(pk_set))
+
+
+@receiver(pre_save, sender=Vote)
+def remember_previous_vote(sender, instance, raw=False, **kwargs):
+    if raw or not instance.pk:
+        instance._counted_vote = None
+        return
+    instance._counted_vote = (
+        Vote.objects.filter(pk=instance.pk).values_list("content_id", "value", "is_badge_vote").first()
+    )
+
+
+@receiver(post_save, sender=Vote)
+def sync_vote_counters(sender, instance, created, raw=False, **kwargs):
+    """
+    Apply vote deltas in the same transaction as the Vote write, so the
+    leaderboard columns (see content.leaderboard) move with every vote.
+    """
+    if raw:
+        return
+    previous = getattr(instance, "_counted_vote", None)
+    if previous and previous[0] != instance.content_id:
+        _remove_vote(*previous)
+        previous = None
+    _, previous_value, previous_badge = previous or (None, 0, False)
+    increment_counters(
+        instance.content_id,
+        vote_count=0 if previous else 1,
+        vote_sum=instance.value - previous_value,
+        badge_vote_count=int(instance.is_badge_vote) - int(previous_badge),
+    )
+
+
+def _remove_vote(content_id, value, is_badge_vote):
+    increment_counters(content_id, vote_count=-1, vote_sum=-value, badge_vote_count=-int(is_badge_vote))
+
+
+@receiver(post_delete, sender=Vote)
+def release_vote_counters(sender, instance, **kwargs):
+    _remove_vote(instance.content_id, instance.value, instance.is_badge_vote)
+
+
+def _count_subquery(queryset, output_field=None):
+    return Coalesce(
+        Subquery(
+            queryset.values("content_id").annotate(total=Count("pk")).values("total")[:1],
+            output_field=output_field or IntegerField(),
+        ),
+        Value(0),
+    )
+
+
+def counter_expressions(fields=COUNTER_FIELDS):
+    """
+    Return the true counter values as correlated subqueries keyed on Content.pk.
+    """
+    viewers_through = Content.viewers.through
+    expressions = {
+        "actual_view_count": _count_subquery(
+            viewers_through.objects.filter(content_id=OuterRef("pk"))
+        ),
+        "actual_vote_count": _count_subquery(Vote.objects.filter(content_id=OuterRef("pk"))),
+        "actual_vote_sum": Coalesce(
+            Subquery(
+                Vote.objects.filter(content_id=OuterRef("pk"))
+                .values("content_id")
+                .annotate(total=Sum("value"))
+                .values("total")[:1],
+                output_field=IntegerField(),
+            ),
+            Value(0),
+        ),
+        "actual_badge_vote_count": _count_subquery(
+            Vote.objects.filter(content_id=OuterRef("pk"), is_badge_vote=True)
+        ),
+        "actual_comment_count": _count_subquery(Comment.objects.filter(content_id=OuterRef("pk"))),
+    }
+    return {f"actual_{field}": expressions[f"actual_{field}"] for field in fields}
+
+
+def reconcile_counters(content_ids=None, chunk_size=500, fields=COUNTER_FIELDS):
+    """
+    Recompute counters from the source tables and rewrite drifted rows.
+    Works through Content in primary-key chunks so memory stays bounded.
+    Returns (checked, repaired).
+    """
+    chunk_size = max(1, int(chunk_size))
+    fields = tuple(fields)
+    queryset = Content.objects.order_by("pk")
+    if content_ids is not None:
+        queryset = queryset.filter(pk__in=list(content_ids))
+
+    checked = 0
+    repaired = 0
+    last_pk = 0
+    while True:
+        rows = list(
+            queryset.filter(pk__gt=last_pk)
+            .annotate(**counter_expressions(fields))
+            .only("pk", *fields)[:chunk_size]
+        )
+        if not rows:
+            break
+
+        drifted = []
+        for row in rows:
+            changed = False
+            for field in fields:
+                actual = getattr(row, f"actual_{field}") or 0
+                if getattr(row, field) != actual:
+                    setattr(row, field, actual)
+                    changed = True
+            if changed:
+                drifted.append(row)
+
+        if drifted:
+            Content.objects.bulk_update(drifted, fields)
+
+        checked += len(rows)
+        repaired += len(drifted)
+        last_pk = rows[-1].pk
+
+    return checked, repaired
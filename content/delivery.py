@@ -0,0 +1,191 @@
+"""
+Gated delivery of uploaded media files.
+
+Views check access first and then call `serve_file`. It either hands the
+byte transfer to the front-end server or streams the file from Django
+with Range and conditional-request support. MEDIA_DELIVERY_BACKEND picks
+the path: "x-accel-redirect" for nginx (internal location at
+MEDIA_ACCEL_REDIRECT_PREFIX), "x-sendfile" for Apache/lighttpd, or
+"django".
+"""
+import mimetypes
+import posixpath
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import content_disposition_header, http_date, parse_http_date_safe
+
+
+BACKEND_DJANGO = "django"
+BACKEND_ACCEL_REDIRECT = "x-accel-redirect"
+BACKEND_SENDFILE = "x-sendfile"
+BACKENDS = (BACKEND_DJANGO, BACKEND_ACCEL_REDIRECT, BACKEND_SENDFILE)
+
+# Platform mimetypes tables disagree on these; players are strict about them.
+CONTENT_TYPES = {
+    ".m3u8": "application/vnd.apple.mpegurl",
+    ".ts": "video/mp2t",
+    ".vtt": "text/vtt",
+}
+_RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+class RangeFile:
+    """
+    Read-only view of `length` bytes starting at `start`. It keeps fileno()
+    so a WSGI server's file_wrapper can still sendfile() the slice, using
+    the Content-Length as the byte count.
+    """
+
+    def __init__(self, file, start, length):
+        file.seek(start)
+        self.file = file
+        self.remaining = length
+
+    def read(self, size=-1):
+        if self.remaining <= 0:
+            return b""
+        size = self.remaining if size is None or size < 0 else min(size, self.remaining)
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def close(self):
+        self.file.close()
+
+
+def _backend():
+    backend = getattr(settings, "MEDIA_DELIVERY_BACKEND", BACKEND_DJANGO)
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown MEDIA_DELIVERY_BACKEND {backend!r}; expected one of {BACKENDS}.")
+    return backend
+
+
+def parse_range(header, size):
+    """
+    Return (start, end) inclusive for a single `bytes=` range, or None when
+    the whole file should be sent (no header, multiple ranges, other units).
+    Raises RangeNotSatisfiable for ranges outside the file.
+    """
+    if not header:
+        return None
+    match = _RANGE_RE.match(header.strip())
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        suffix = int(last)
+        if suffix == 0 or size == 0:
+            raise RangeNotSatisfiable
+        return max(0, size - suffix), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or (last and int(last) < start):
+        raise RangeNotSatisfiable
+    return start, end
+
+
+def _range_still_valid(request, etag, last_modified):
+    # If-Range carries either the ETag or the Last-Modified date of the copy
+    # the client already has; a mismatch means "send the whole new file".
+    if_range = request.headers.get("If-Range")
+    if not if_range:
+        return True
+    if if_range.startswith('"') or if_range.startswith("W/"):
+        return if_range == etag
+    return last_modified is not None and parse_http_date_safe(if_range) == last_modified
+
+
+def _file_stats(storage, name):
+    try:
+        size = storage.size(name)
+    except (FileNotFoundError, OSError):
+        raise Http404("Media file not found.")
+    try:
+        last_modified = int(storage.get_modified_time(name).timestamp())
+    except (NotImplementedError, OSError):
+        last_modified = None
+    etag = f'"{size:x}-{last_modified or 0:x}"'
+    return size, last_modified, etag
+
+
+def serve_file(request, field_file, as_attachment=False, filename=None):
+    """
+    Response for a FieldFile the caller has already authorized.
+    """
+    if not field_file:
+        raise Http404("Media file not found.")
+    return serve_stored_file(
+        request, field_file.storage, field_file.name, as_attachment=as_attachment, filename=filename
+    )
+
+
+def serve_stored_file(request, storage, name, as_attachment=False, filename=None, accel_prefix=None):
+    """
+    Response for any authorized file in `storage` (e.g. HLS segments).
+    `accel_prefix` overrides MEDIA_ACCEL_REDIRECT_PREFIX for storages that
+    live outside MEDIA_ROOT.
+    """
+    size, last_modified, etag = _file_stats(storage, name)
+    filename = filename or posixpath.basename(name)
+    content_type = CONTENT_TYPES.get(posixpath.splitext(name)[1].lower()) or (
+        mimetypes.guess_type(name)[0] or "application/octet-stream"
+    )
+
+    def finish(response):
+        response["ETag"] = etag
+        if last_modified is not None:
+            response["Last-Modified"] = http_date(last_modified)
+        response["Accept-Ranges"] = "bytes"
+        # Gated files must never land in a shared cache.
+        response["Cache-Control"] = "private, max-age=0, must-revalidate"
+        response["Content-Disposition"] = content_disposition_header(as_attachment, filename)
+        return response
+
+    not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if not_modified is not None:
+        return finish(not_modified)
+
+    backend = _backend()
+    if backend == BACKEND_ACCEL_REDIRECT:
+        prefix = (accel_prefix or getattr(settings, "MEDIA_ACCEL_REDIRECT_PREFIX", "/protected-media/")).rstrip("/")
+        response = HttpResponse(content_type=content_type)
+        response["X-Accel-Redirect"] = quote(f"{prefix}/{name}")
+        return finish(response)
+    if backend == BACKEND_SENDFILE:
+        response = HttpResponse(content_type=content_type)
+        response["X-Sendfile"] = storage.path(name)
+        return finish(response)
+
+    byte_range = None
+    if request.method == "GET" and _range_still_valid(request, etag, last_modified):
+        try:
+            byte_range = parse_range(request.headers.get("Range"), size)
+        except RangeNotSatisfiable:
+            response = HttpResponse(status=416)
+            response["Content-Range"] = f"bytes */{size}"
+            return finish(response)
+
+    file = storage.open(name, "rb")
+    if byte_range is None:
+        response = FileResponse(file, content_type=content_type)
+        response["Content-Length"] = str(size)
+        return finish(response)
+
+    start, end = byte_range
+    response = FileResponse(RangeFile(file, start, end - start + 1), status=206, content_type=content_type)
+    response["Content-Length"] = str(end - start + 1)
+    response["Content-Range"] = f"bytes {start}-{end}/{size}"
+    return finish(response)
@@ -0,0 +1,138 @@
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Content
+
+
+FEED_VERSION_KEY = "content-feed:version"
+FEED_KEY = "content-feed:featured:v{version}:{limit}"
+FEED_STALE_KEY = "content-feed:featured:last:{limit}"
+FEED_LOCK_KEY = "content-feed:featured:lock:{limit}"
+
+
+def _feed_timeout():
+    return max(1, int(getattr(settings, "FEATURED_FEED_CACHE_SECONDS", 60)))
+
+
+def feed_version():
+    version = cache.get(FEED_VERSION_KEY)
+    if version is None:
+        cache.add(FEED_VERSION_KEY, 1, timeout=None)
+        version = cache.get(FEED_VERSION_KEY, 1)
+    return version
+
+
+def bump_feed_version():
+    """
+    Invalidate every cached featured feed. Old versions simply age out.
+    """
+    try:
+        return cache.incr(FEED_VERSION_KEY)
+    except ValueError:
+        cache.add(FEED_VERSION_KEY, 2, timeout=None)
+        return cache.get(FEED_VERSION_KEY, 2)
+
+
+# Only what the welcome cards render from the artist, so cached feeds
+# never carry password hashes, emails or permission data.
+CARD_ARTIST_FIELDS = ("id", "username", "first_name", "last_name", "profile_picture")
+CARD_GENRE_FIELDS = ("id", "name")
+
+
+def build_featured_feed(limit=50):
+    """
+    Return the ordered id list and card rows for the featured feed: the
+    content columns plus the artist and genre fields the templates render,
+    as plain values that are safe to cache.
+    """
+    content_fields = [field.attname for field in Content._meta.concrete_fields]
+    rows = (
+        Content.objects.filter(is_approved=True, is_visible=True)
+        .order_by("-upload_date")
+        .values(
+            *content_fields,
+            *[f"artist__{name}" for name in CARD_ARTIST_FIELDS],
+            *[f"genre__{name}" for name in CARD_GENRE_FIELDS],
+        )[:limit]
+    )
+    cards = [
+        {
+            "content": {name: row[name] for name in content_fields},
+            "artist": {name: row[f"artist__{name}"] for name in CARD_ARTIST_FIELDS},
+            "genre": {name: row[f"genre__{name}"] for name in CARD_GENRE_FIELDS},
+        }
+        for row in rows
+    ]
+    return {"ids": [card["content"]["id"] for card in cards], "cards": cards}
+
+
+def _instance(model, db, values):
+    # Model.from_db wants the values in concrete field order.
+    names = [field.attname for field in model._meta.concrete_fields if field.attname in values]
+    return model.from_db(db, names, [values[name] for name in names])
+
+
+def _card_instances(payload):
+    """
+    Rebuild Content instances, with their artist and genre attached, from
+    cached card rows. No queries are made.
+    """
+    db = Content.objects.db
+    artist_model = Content._meta.get_field("artist").related_model
+    genre_model = Content._meta.get_field("genre").related_model
+    cards = []
+    for card in payload["cards"]:
+        content = _instance(Content, db, card["content"])
+        content.artist = _instance(artist_model, db, card["artist"])
+        if card["genre"]["id"] is not None:
+            content.genre = _instance(genre_model, db, card["genre"])
+        cards.append(content)
+    return cards
+
+
+def get_featured_feed(limit=50):
+    """
+    Return featured cards from cache, rebuilding at most once per version.
+    Only plain card values are cached; instances are rebuilt per call.
+    Concurrent misses serve the last good feed (or briefly wait) while a
+    single request holding the rebuild lock repopulates the cache.
+    """
+    key = FEED_KEY.format(version=feed_version(), limit=limit)
+    payload = cache.get(key)
+    if payload is not None:
+        return _card_instances(payload)
+
+    lock_key = FEED_LOCK_KEY.format(limit=limit)
+    stale_key = FEED_STALE_KEY.format(limit=limit)
+    lock_timeout = max(1, int(getattr(settings, "FEATURED_FEED_LOCK_SECONDS", 10)))
+
+    if not cache.add(lock_key, 1, timeout=lock_timeout):
+        stale = cache.get(stale_key)
+        if stale is not None:
+            return _card_instances(stale)
+
+        deadline = time.monotonic() + min(lock_timeout, 2)
+        while time.monotonic() < deadline:
+            time.sleep(0.05)
+            payload = cache.get(key)
+            if payload is not None:
+                return _card_instances(payload)
+        return _card_instances(build_featured_feed(limit))
+
+    try:
+        payload = build_featured_feed(limit)
+        cache.set(key, payload, timeout=_feed_timeout())
+        cache.set(stale_key, payload, timeout=_feed_timeout() * 10)
+    finally:
+        cache.delete(lock_key)
+    return _card_instances(payload)
+
+
+@receiver(post_save, sender=Content)
+@receiver(post_delete, sender=Content)
+def refresh_feed_on_content_change(sender, **kwargs):
+    bump_feed_version()
@@ -1,5 +1,20 @@
 from django import forms
-from .models import Content, Comment
+from .models import Content, Comment, UploadSession
+from .youtube import extract_video_id
+
+MAX_UPLOAD_BYTES = 50 * 1024 * 1024  # 50 MB size limit
+ALLOWED_UPLOAD_TYPES = ['video/mp4', 'video/mpeg', 'audio/mpeg', 'audio/mp3', 'image/jpeg', 'image/png', 'image/gif']
+
+
+def validate_upload(size, content_type):
+    """
+    Size and type rules shared by direct and resumable uploads.
+    """
+    if size > MAX_UPLOAD_BYTES:
+        raise forms.ValidationError("File size must not exceed 50 MB.")
+    if content_type not in ALLOWED_UPLOAD_TYPES:
+        raise forms.ValidationError("Unsupported file type. Allowed types: MP4, MPEG, MP3, JPEG, PNG, GIF.")
+
 
 class ContentUploadForm(forms.ModelForm):
     """
@@ -20,11 +35,7 @@ class ContentUploadForm(forms.ModelForm):
     def clean_file(self):
         upload_file = self.cleaned_data.get('file')
         if upload_file:
-            if upload_file.size > 50 * 1024 * 1024:  # 50 MB size limit
-                raise forms.ValidationError("File size must not exceed 50 MB.")
-            allowed_file_types = ['video/mp4', 'video/mpeg', 'audio/mpeg', 'audio/mp3', 'image/jpeg', 'image/png', 'image/gif']
-            if upload_file.content_type not in allowed_file_types:
-                raise forms.ValidationError("Unsupported file type. Allowed types: MP4, MPEG, MP3, JPEG, PNG, GIF.")
+            validate_upload(upload_file.size, upload_file.content_type)
         return upload_file
 
     def clean_youtube_url(self):
@@ -32,8 +43,8 @@ class ContentUploadForm(forms.ModelForm):
         if not youtube_url:
             return youtube_url
 
-        temp_content = Content(youtube_url=youtube_url)
-        if not temp_content.youtube_video_id:
+        video_id = extract_video_id(youtube_url)
+        if not video_id:
             raise forms.ValidationError("Enter a valid YouTube URL (watch, share, embed, or shorts link).")
         return youtube_url
 
@@ -51,6 +62,38 @@ class ContentUploadForm(forms.ModelForm):
         return cleaned_data
     
 
+class ResumableUploadForm(forms.ModelForm):
+    """
+    Metadata for a resumable upload, validated before any bytes are sent.
+    The file itself is described by upload_filename/upload_filetype and the
+    Upload-Length header.
+    """
+    upload_filename = forms.CharField(max_length=255)
+    upload_filetype = forms.CharField(max_length=100)
+    upload_length = forms.IntegerField(min_value=1)
+
+    class Meta:
+        model = UploadSession
+        fields = ['title', 'description', 'tags', 'genre', 'thumbnail']
+
+    def clean(self):
+        cleaned_data = super().clean()
+        length = cleaned_data.get('upload_length')
+        content_type = cleaned_data.get('upload_filetype')
+        if length and content_type:
+            validate_upload(length, content_type)
+        return cleaned_data
+
+    def save(self, commit=True):
+        session = super().save(commit=False)
+        session.filename = self.cleaned_data['upload_filename']
+        session.content_type = self.cleaned_data['upload_filetype']
+        session.length = self.cleaned_data['upload_length']
+        if commit:
+            session.save()
+        return session
+
+
 class CommentForm(forms.ModelForm):
     class Meta:
         model = Comment
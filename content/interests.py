@@ -0,0 +1,255 @@
+"""
+Per-user interest profiles for personalized "Up next".
+
+Each profile keeps weighted genre and tag vectors built from the user's most
+recent interactions plus the set of followed artists. View, vote and follow
+events update the stored row in place; reads go through a small in-process
+cache with a TTL so content_detail never re-derives the profile per request.
+"""
+import threading
+import time
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from users.models import Follow
+
+from .models import Content, UserInterestProfile, Vote
+
+
+VIEW_WEIGHT = 1.0
+VOTE_WEIGHT = 2.0
+MAX_RECENT_ITEMS = 50
+MAX_PROFILE_TAGS = 20
+MAX_PROFILE_GENRES = 10
+
+_cache_lock = threading.Lock()
+_profile_cache = {}
+
+
+def _cache_seconds():
+    return max(0, int(getattr(settings, "INTEREST_PROFILE_CACHE_SECONDS", 300)))
+
+
+def _snapshot(profile):
+    return {
+        "followed_artist_ids": frozenset(profile.followed_artist_ids),
+        "genre_weights": {int(genre_id): weight for genre_id, weight in profile.genre_weights.items()},
+        "tag_weights": dict(profile.tag_weights),
+        "recent_items": [tuple(item[:2]) + (tuple(item[2]), item[3]) for item in profile.recent_items],
+    }
+
+
+def _forget(user_id):
+    def drop():
+        with _cache_lock:
+            _profile_cache.pop(user_id, None)
+
+    # Drop now for this request and again once the write is visible to others.
+    drop()
+    transaction.on_commit(drop)
+
+
+def forget_cached_profiles():
+    with _cache_lock:
+        _profile_cache.clear()
+
+
+def _add_weights(vector, keys, weight):
+    for key in keys:
+        key = str(key)
+        value = vector.get(key, 0.0) + weight
+        if value > 1e-9:
+            vector[key] = round(value, 6)
+        else:
+            vector.pop(key, None)
+
+
+def _apply_item(profile, content_id, genre_id, tag_names, weight):
+    """
+    Add one interaction to the profile, evicting the oldest item once the
+    recent log is full so the vectors always describe a bounded window.
+    """
+    recent = profile.recent_items
+    for index, item in enumerate(recent):
+        if item[0] == content_id:
+            item = recent.pop(index)
+            item[3] += weight
+            _add_weights(profile.genre_weights, [item[1]] if item[1] else [], weight)
+            _add_weights(profile.tag_weights, item[2], weight)
+            recent.append(item)
+            return
+
+    recent.append([content_id, genre_id, sorted(tag_names), weight])
+    _add_weights(profile.genre_weights, [genre_id] if genre_id else [], weight)
+    _add_weights(profile.tag_weights, tag_names, weight)
+
+    while len(recent) > MAX_RECENT_ITEMS:
+        _, old_genre_id, old_tags, old_weight = recent.pop(0)
+        _add_weights(profile.genre_weights, [old_genre_id] if old_genre_id else [], -old_weight)
+        _add_weights(profile.tag_weights, old_tags, -old_weight)
+
+
+def _build_profile(user_id):
+    """
+    Seed a profile from existing view/vote history (first touch only).
+    """
+    profile = UserInterestProfile(user_id=user_id)
+    profile.followed_artist_ids = list(
+        Follow.objects.filter(follower_id=user_id).values_list("following_id", flat=True)
+    )
+    history = list(
+        Content.objects.filter(is_approved=True, is_visible=True)
+        .filter(Q(viewers__id=user_id) | Q(votes__fan_id=user_id))
+        .prefetch_related("tags")
+        .distinct()
+        .order_by("-upload_date")[:MAX_RECENT_ITEMS]
+    )
+    history_ids = [item.id for item in history]
+    voted_ids = set(
+        Vote.objects.filter(fan_id=user_id, content_id__in=history_ids).values_list("content_id", flat=True)
+    )
+    viewed_ids = set(
+        Content.viewers.through.objects.filter(
+            customuser_id=user_id,
+            content_id__in=history_ids,
+        ).values_list("content_id", flat=True)
+    )
+    for item in reversed(history):
+        weight = VIEW_WEIGHT * (item.id in viewed_ids) + VOTE_WEIGHT * (item.id in voted_ids)
+        _apply_item(profile, item.id, item.genre_id, list(item.tags.names()), weight)
+    profile.save()
+    return profile
+
+
+def _locked_profile(user_id):
+    """
+    Return (profile, created) with the row locked for the current transaction.
+    Newly created profiles are seeded from history, which already includes the
+    event being processed.
+    """
+    profile = UserInterestProfile.objects.select_for_update().filter(user_id=user_id).first()
+    if profile is not None:
+        return profile, False
+    return _build_profile(user_id), True
+
+
+def get_interest_profile(user):
+    """
+    Return the cached interest snapshot for user, loading or seeding it on miss.
+    """
+    if not user or not user.is_authenticated:
+        return None
+
+    # date_joined guards against a recycled user id picking up a stale entry.
+    with _cache_lock:
+        cached = _profile_cache.get(user.id)
+    if cached and cached[0] > time.monotonic() and cached[1] == user.date_joined:
+        return cached[2]
+
+    profile = UserInterestProfile.objects.filter(user_id=user.id).first()
+    if profile is None:
+        with transaction.atomic():
+            profile, _ = _locked_profile(user.id)
+    snapshot = _snapshot(profile)
+    ttl = _cache_seconds()
+    if ttl:
+        with _cache_lock:
+            _profile_cache[user.id] = (time.monotonic() + ttl, user.date_joined, snapshot)
+    return snapshot
+
+
+def interest_vectors(snapshot, exclude_content_id=None):
+    """
+    Return (followed_artist_ids, genre_ids, tag_names) strongest first.
+    The current item's own contribution is left out so a page view does not
+    make the profile echo the content being watched.
+    """
+    if not snapshot:
+        return [], [], []
+
+    genre_weights = dict(snapshot["genre_weights"])
+    tag_weights = dict(snapshot["tag_weights"])
+    for content_id, genre_id, tag_names, weight in snapshot["recent_items"]:
+        if content_id != exclude_content_id:
+            continue
+        if genre_id:
+            genre_weights[genre_id] = genre_weights.get(genre_id, 0.0) - weight
+        for tag_name in tag_names:
+            tag_weights[tag_name] = tag_weights.get(tag_name, 0.0) - weight
+
+    def strongest(weights, size):
+        ranked = sorted(
+            ((key, weight) for key, weight in weights.items() if weight > 1e-9),
+            key=lambda pair: (-pair[1], str(pair[0])),
+        )
+        return [key for key, _ in ranked[:size]]
+
+    return (
+        sorted(snapshot["followed_artist_ids"]),
+        strongest(genre_weights, MAX_PROFILE_GENRES),
+        strongest(tag_weights, MAX_PROFILE_TAGS),
+    )
+
+
+def record_interaction(user_id, content, weight):
+    """
+    Fold one view or vote on public content into the user's profile.
+    """
+    if not content.is_approved or not content.is_visible:
+        return
+
+    tag_names = list(content.tags.names())
+    with transaction.atomic():
+        profile, created = _locked_profile(user_id)
+        if not created:
+            _apply_item(profile, content.id, content.genre_id, tag_names, weight)
+            profile.save(update_fields=["genre_weights", "tag_weights", "recent_items", "updated_at"])
+    _forget(user_id)
+
+
+def _update_follows(user_id, artist_id, following):
+    with transaction.atomic():
+        profile = UserInterestProfile.objects.select_for_update().filter(user_id=user_id).first()
+        if profile is None:
+            return
+        artist_ids = set(profile.followed_artist_ids)
+        if following:
+            artist_ids.add(artist_id)
+        else:
+            artist_ids.discard(artist_id)
+        profile.followed_artist_ids = sorted(artist_ids)
+        profile.save(update_fields=["followed_artist_ids", "updated_at"])
+    _forget(user_id)
+
+
+@receiver(m2m_changed, sender=Content.viewers.through)
+def record_views(sender, instance, action, reverse, pk_set, **kwargs):
+    if action != "post_add" or not pk_set:
+        return
+    if reverse:
+        for content in Content.objects.filter(pk__in=pk_set):
+            record_interaction(instance.pk, content, VIEW_WEIGHT)
+    else:
+        for user_id in pk_set:
+            record_interaction(user_id, instance, VIEW_WEIGHT)
+
+
+@receiver(post_save, sender=Vote)
+def record_vote(sender, instance, created, **kwargs):
+    if created:
+        record_interaction(instance.fan_id, instance.content, VOTE_WEIGHT)
+
+
+@receiver(post_save, sender=Follow)
+def record_follow(sender, instance, created, **kwargs):
+    if created:
+        _update_follows(instance.follower_id, instance.following_id, following=True)
+
+
+@receiver(post_delete, sender=Follow)
+def record_unfollow(sender, instance, **kwargs):
+    _update_follows(instance.follower_id, instance.following_id, following=False)
@@ -0,0 +1,78 @@
+"""
+Live vote leaderboard backed by the denormalized vote columns on Content.
+
+Vote save/delete receivers (content.counters) move vote_count / vote_sum /
+badge_vote_count in the same transaction as the Vote row, so rankings are
+read straight off the leaderboard indexes instead of aggregating the Vote
+table. `rebuild_leaderboard` reconciles the columns against Vote, and
+`freeze_leaderboard` copies the current standings into immutable
+LeaderboardSnapshot rows at the end of a round.
+"""
+from django.db import transaction
+from django.db.models import F
+
+from .counters import VOTE_COUNTER_FIELDS, reconcile_counters
+from .models import Content, LeaderboardSnapshot, LeaderboardSnapshotEntry
+
+
+LEADERBOARD_ORDER = ("-vote_sum", "-vote_count", "-upload_date")
+
+
+def leaderboard_queryset(genre_id=None):
+    """
+    Content ranked by maintained totals, exposing the historical annotation
+    names (total_points, total_votes, badge_votes) used by templates/exports.
+    """
+    queryset = Content.objects.all()
+    if genre_id:
+        queryset = queryset.filter(genre_id=genre_id)
+    return queryset.annotate(
+        total_points=F("vote_sum"),
+        total_votes=F("vote_count"),
+        badge_votes=F("badge_vote_count"),
+    ).order_by(*LEADERBOARD_ORDER)
+
+
+def top_content(limit=10, genre_id=None):
+    return list(leaderboard_queryset(genre_id).select_related("genre")[:limit])
+
+
+def rebuild_leaderboard(chunk_size=500):
+    """
+    Reconcile the leaderboard columns against the Vote table.
+    Returns (checked, repaired).
+    """
+    return reconcile_counters(chunk_size=chunk_size, fields=VOTE_COUNTER_FIELDS)
+
+
+def freeze_leaderboard(name, created_by=None, include_unvoted=False):
+    """
+    Copy the current standings into an immutable snapshot and return it.
+    Only content with votes is frozen unless include_unvoted is set.
+    """
+    queryset = leaderboard_queryset().select_related("genre")
+    if not include_unvoted:
+        queryset = queryset.filter(vote_count__gt=0)
+
+    with transaction.atomic():
+        snapshot = LeaderboardSnapshot.objects.create(name=name, created_by=created_by)
+        genre_positions = {}
+        entries = []
+        for rank, content in enumerate(queryset.iterator(chunk_size=1000), start=1):
+            genre_positions[content.genre_id] = genre_positions.get(content.genre_id, 0) + 1
+            entries.append(
+                LeaderboardSnapshotEntry(
+                    snapshot=snapshot,
+                    content=content,
+                    content_title=content.title,
+                    genre_id=content.genre_id,
+                    genre_name=content.genre.name if content.genre else "",
+                    rank=rank,
+                    genre_rank=genre_positions[content.genre_id],
+                    total_points=content.vote_sum,
+                    total_votes=content.vote_count,
+                    badge_votes=content.badge_vote_count,
+                )
+            )
+        LeaderboardSnapshotEntry.objects.bulk_create(entries, batch_size=1000)
+    return snapshot
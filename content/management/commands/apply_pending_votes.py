@@ -0,0 +1,42 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from content.vote_queue import apply_pending_votes, purge_processed_votes, queueing_enabled
+
+
+class Command(BaseCommand):
+    help = "Apply votes queued in the PendingVote outbox in batched transactions."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=None,
+            help="Votes applied per transaction (default: VOTE_QUEUE_BATCH_SIZE).",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=0,
+            help="Keep running and poll every N seconds instead of exiting after one pass.",
+        )
+
+    def handle(self, *args, **options):
+        if not queueing_enabled():
+            self.stdout.write(
+                self.style.WARNING("VOTE_INGESTION_MODE is not 'queued'; draining any leftovers.")
+            )
+
+        interval = options["interval"]
+        while True:
+            applied, rejected = apply_pending_votes(batch_size=options["batch_size"])
+            purged = purge_processed_votes()
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"Applied {applied} queued vote(s), rejected {rejected}, purged {purged} processed row(s)."
+                )
+            )
+            if interval <= 0:
+                break
+            time.sleep(interval)
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count
+
+from content.models import Content
+from content.youtube import backfill_video_ids
+
+
+class Command(BaseCommand):
+    help = "Store normalized YouTube video ids and report duplicate submissions."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Rows read and written per batch.",
+        )
+
+    def handle(self, *args, **options):
+        changed = backfill_video_ids(Content, batch_size=max(1, options["batch_size"]))
+        self.stdout.write(self.style.SUCCESS(f"Updated {changed} YouTube video id(s)."))
+
+        duplicates = (
+            Content.objects.exclude(youtube_video_id="")
+            .values("youtube_video_id")
+            .annotate(total=Count("id"))
+            .filter(total__gt=1)
+            .order_by("-total", "youtube_video_id")
+        )
+        for row in duplicates:
+            ids = Content.objects.filter(youtube_video_id=row["youtube_video_id"]).order_by("pk").values_list("pk", flat=True)
+            self.stdout.write(
+                f"Duplicate {row['youtube_video_id']}: content {', '.join(str(pk) for pk in ids)}"
+            )
@@ -0,0 +1,69 @@
+import json
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from content import benchmark
+
+
+class Command(BaseCommand):
+    help = "Seed a throwaway contest, replay a concurrent vote workload and report the results as JSON."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--fans", type=int, default=50, help="Fans to seed (default: 50).")
+        parser.add_argument("--contents", type=int, default=20, help="Content items to seed (default: 20).")
+        parser.add_argument("--genres", type=int, default=2, help="Genres to spread content over (default: 2).")
+        parser.add_argument("--votes-per-fan", type=int, default=5, help="Votes each fan casts (default: 5).")
+        parser.add_argument(
+            "--badge-ratio",
+            type=float,
+            default=0.1,
+            help="Share of fans given a badge (default: 0.1).",
+        )
+        parser.add_argument("--concurrency", type=int, default=8, help="Fans voting at once (default: 8).")
+        parser.add_argument("--seed", type=int, default=0, help="Random seed for the workload (default: 0).")
+        parser.add_argument("--label", default="", help="Free-form label stored in the report, e.g. a release tag.")
+        parser.add_argument("--output", help="Write the JSON report to this file instead of stdout.")
+        parser.add_argument("--keep", action="store_true", help="Keep the seeded rows after the run.")
+        parser.add_argument(
+            "--allow-production",
+            action="store_true",
+            help="Run even though IS_PRODUCTION is set (writes to the live database).",
+        )
+
+    def handle(self, *args, **options):
+        if getattr(settings, "IS_PRODUCTION", False) and not options["allow_production"]:
+            raise CommandError("Refusing to seed benchmark data in production without --allow-production.")
+
+        config = {
+            name: options[name]
+            for name in ("fans", "contents", "genres", "votes_per_fan", "badge_ratio", "concurrency", "seed")
+        }
+        prefix, plan = benchmark.seed(
+            fans=options["fans"],
+            contents=options["contents"],
+            genres=options["genres"],
+            votes_per_fan=options["votes_per_fan"],
+            badge_ratio=options["badge_ratio"],
+            seed_value=options["seed"],
+        )
+        try:
+            samples, wall_seconds = benchmark.run(plan, concurrency=options["concurrency"])
+        finally:
+            if not options["keep"]:
+                benchmark.cleanup(prefix)
+
+        report = benchmark.summarize(samples, wall_seconds, config, label=options["label"])
+        payload = json.dumps(report, indent=2, sort_keys=True)
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as handle:
+                handle.write(payload + "\n")
+            latency = report["latency_ms"]
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"{report['requests']} vote(s) at {report['throughput_rps']} req/s, "
+                    f"p95 {latency['p95']} ms; report written to {options['output']}."
+                )
+            )
+        else:
+            self.stdout.write(payload)
@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand
+
+from content.neighbors import rebuild_neighbors, refresh_neighbors_for
+
+
+class Command(BaseCommand):
+    help = "Precompute the \"Up next\" neighbor table for public content."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--top-k",
+            type=int,
+            default=None,
+            help="Neighbors kept per item and section (default: CONTENT_NEIGHBOR_TOP_K).",
+        )
+        parser.add_argument(
+            "--block-size",
+            default=256,
+            type=int,
+            help="Number of content rows scored per matrix block (default: 256).",
+        )
+        parser.add_argument(
+            "--content-id",
+            action="append",
+            type=int,
+            dest="content_ids",
+            help="Only refresh this content id incrementally (may be repeated).",
+        )
+
+    def handle(self, *args, **options):
+        if options["content_ids"]:
+            refreshed = refresh_neighbors_for(options["content_ids"], top_k=options["top_k"])
+            self.stdout.write(
+                self.style.SUCCESS(f"Refreshed neighbors for {refreshed} content item(s).")
+            )
+            return
+
+        written = rebuild_neighbors(block_size=options["block_size"], top_k=options["top_k"])
+        self.stdout.write(self.style.SUCCESS(f"Wrote {written} neighbor row(s)."))
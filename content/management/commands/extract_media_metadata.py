@@ -0,0 +1,51 @@
+from django.core.management.base import BaseCommand
+
+from content.metadata import PROBED_FIELDS, classify, read_metadata
+from content.models import Content
+
+
+class Command(BaseCommand):
+    help = "Backfill media kind, mime, duration, dimensions and bitrate for content files."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="Re-probe files that already have metadata.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=200,
+            help="Rows probed and written per batch.",
+        )
+
+    def handle(self, *args, **options):
+        queryset = Content.objects.exclude(file="").exclude(file__isnull=True)
+        if not options["all"]:
+            queryset = queryset.filter(media_probed_at__isnull=True)
+        queryset = queryset.only("id", "file", "media_kind", "media_mime", *PROBED_FIELDS).order_by("pk")
+        batch_size = max(1, options["batch_size"])
+
+        probed = skipped = 0
+        last_pk = 0
+        while True:
+            batch = list(queryset.filter(pk__gt=last_pk)[:batch_size])
+            if not batch:
+                break
+            last_pk = batch[-1].pk
+            for content in batch:
+                content.media_kind, content.media_mime = classify(content.file.name)
+                values = read_metadata(content)
+                if values is None:
+                    skipped += 1
+                    continue
+                for field, value in values.items():
+                    setattr(content, field, value)
+                probed += 1
+            Content.objects.bulk_update(batch, ["media_kind", "media_mime", *PROBED_FIELDS])
+
+        message = f"Probed {probed} file(s)."
+        if skipped:
+            message += f" Skipped {skipped} audio/video file(s): ffprobe is not on PATH."
+        self.stdout.write(self.style.SUCCESS(message))
@@ -0,0 +1,39 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from content.view_buffer import buffering_enabled, flush_buffered_views
+
+
+class Command(BaseCommand):
+    help = "Flush buffered content views from the shared cache into content_viewers."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=None,
+            help="Viewer rows inserted per transaction (default: CONTENT_VIEW_FLUSH_BATCH_SIZE).",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=0,
+            help="Keep running and flush every N seconds instead of exiting after one pass.",
+        )
+
+    def handle(self, *args, **options):
+        if not buffering_enabled():
+            self.stdout.write(
+                self.style.WARNING("CONTENT_VIEW_TRACKING_MODE is not 'buffered'; draining any leftovers.")
+            )
+
+        interval = options["interval"]
+        while True:
+            contents, views = flush_buffered_views(batch_size=options["batch_size"])
+            self.stdout.write(
+                self.style.SUCCESS(f"Flushed {views} buffered view(s) across {contents} content item(s).")
+            )
+            if interval <= 0:
+                break
+            time.sleep(interval)
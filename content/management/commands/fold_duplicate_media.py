@@ -0,0 +1,66 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from content.models import Content, MediaBlob
+from content.storage import file_digest, get_media_storage
+
+
+class Command(BaseCommand):
+    help = "Move content files saved before content-addressed storage into blobs, folding duplicates."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only report how many files would be folded and the space saved.",
+        )
+
+    def handle(self, *args, **options):
+        storage = get_media_storage()
+        dry_run = options["dry_run"]
+        seen = set()
+        moved = folded = reclaimed = 0
+
+        for field_name in ("file", "thumbnail"):
+            names = (
+                Content.objects.exclude(**{f"{field_name}__isnull": True})
+                .exclude(**{field_name: ""})
+                .values_list(field_name, flat=True)
+                .distinct()
+            )
+            tracked = set(MediaBlob.objects.filter(name__in=names).values_list("name", flat=True))
+            for name in sorted(set(names) - tracked):
+                if not storage.exists(name):
+                    self.stderr.write(f"Skipping {name}: file is missing.")
+                    continue
+                digest = file_digest(storage.path(name))
+                blob_name = storage.blob_name(name, digest)
+                if blob_name in seen or (blob_name != name and storage.exists(blob_name)):
+                    folded += 1
+                    reclaimed += storage.size(name)
+                else:
+                    moved += 1
+                seen.add(blob_name)
+                if dry_run:
+                    continue
+
+                rows = Content.objects.filter(**{field_name: name})
+                with transaction.atomic():
+                    blob_name = storage.adopt(name, references=rows.count(), digest=digest)
+                    if field_name == "thumbnail":
+                        # Renditions stay valid; only their recorded source moves.
+                        for content in rows.exclude(thumbnail_renditions={}).only("id", "thumbnail_renditions"):
+                            if content.thumbnail_renditions.get("source") == name:
+                                content.thumbnail_renditions["source"] = blob_name
+                                Content.objects.filter(pk=content.pk).update(
+                                    thumbnail_renditions=content.thumbnail_renditions
+                                )
+                    rows.update(**{field_name: blob_name})
+
+        verb = "Would fold" if dry_run else "Folded"
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{verb} {moved + folded} file(s) into {moved} blob(s); "
+                f"{folded} duplicate(s), {reclaimed} byte(s) reclaimed."
+            )
+        )
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from content.leaderboard import freeze_leaderboard
+
+
+class Command(BaseCommand):
+    help = "Freeze the current vote leaderboard into an immutable round snapshot."
+
+    def add_arguments(self, parser):
+        parser.add_argument("name", help="Name of the voting round, e.g. \"Season 2 Week 4\".")
+        parser.add_argument(
+            "--include-unvoted",
+            action="store_true",
+            help="Also record content that has not received any votes.",
+        )
+
+    def handle(self, *args, **options):
+        snapshot = freeze_leaderboard(
+            options["name"],
+            include_unvoted=options["include_unvoted"],
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Froze {snapshot.entries.count()} ranking(s) into snapshot #{snapshot.pk} ({snapshot.name})."
+            )
+        )
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+
+from content.models import Content
+from content.tasks import generate_thumbnail_renditions
+
+
+class Command(BaseCommand):
+    help = "Queue responsive thumbnail renditions for content that has a thumbnail."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="Regenerate renditions even for content that already has them.",
+        )
+        parser.add_argument(
+            "--content-id",
+            action="append",
+            type=int,
+            dest="content_ids",
+            help="Only process this content id (repeatable).",
+        )
+
+    def handle(self, *args, **options):
+        queryset = Content.objects.exclude(thumbnail="").exclude(thumbnail__isnull=True)
+        if options["content_ids"]:
+            queryset = queryset.filter(pk__in=options["content_ids"])
+        elif not options["all"]:
+            queryset = queryset.filter(thumbnail_renditions={})
+
+        queued = 0
+        for content_id in queryset.order_by("pk").values_list("pk", flat=True).iterator():
+            generate_thumbnail_renditions.delay(content_id)
+            queued += 1
+        self.stdout.write(self.style.SUCCESS(f"Queued thumbnail renditions for {queued} content item(s)."))
@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from content.models import Content
+from content.tasks import build_video_previews
+from content.transcoding import ffmpeg_available
+
+
+class Command(BaseCommand):
+    help = "Queue poster frame and scrub sprite generation for videos that have none."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="Also process videos that already have previews.",
+        )
+        parser.add_argument(
+            "--content-id",
+            action="append",
+            type=int,
+            dest="content_ids",
+            help="Only process this content id (repeatable).",
+        )
+
+    def handle(self, *args, **options):
+        if not ffmpeg_available():
+            raise CommandError("ffmpeg and ffprobe must be on PATH to extract video previews.")
+
+        queryset = Content.objects.filter(media_kind=Content.MEDIA_VIDEO)
+        if options["content_ids"]:
+            queryset = queryset.filter(pk__in=options["content_ids"])
+        elif not options["all"]:
+            queryset = queryset.filter(video_previews={})
+
+        queued = 0
+        for content_id in queryset.order_by("pk").values_list("pk", flat=True).iterator():
+            build_video_previews.delay(content_id)
+            queued += 1
+        self.stdout.write(self.style.SUCCESS(f"Queued preview generation for {queued} video(s)."))
@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from content.models import Content
+from content.tasks import build_content_waveform
+from content.transcoding import ffmpeg_available
+
+
+class Command(BaseCommand):
+    help = "Queue waveform peak generation for audio content that has none."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="Also process audio that already has waveform peaks.",
+        )
+        parser.add_argument(
+            "--content-id",
+            action="append",
+            type=int,
+            dest="content_ids",
+            help="Only process this content id (repeatable).",
+        )
+
+    def handle(self, *args, **options):
+        if not ffmpeg_available():
+            raise CommandError("ffmpeg must be on PATH to decode audio for waveforms.")
+
+        queryset = Content.objects.filter(media_kind=Content.MEDIA_AUDIO)
+        if options["content_ids"]:
+            queryset = queryset.filter(pk__in=options["content_ids"])
+        elif not options["all"]:
+            queryset = queryset.filter(waveform_peaks="")
+
+        queued = 0
+        for content_id in queryset.order_by("pk").values_list("pk", flat=True).iterator():
+            build_content_waveform.delay(content_id)
+            queued += 1
+        self.stdout.write(self.style.SUCCESS(f"Queued waveform generation for {queued} audio file(s)."))
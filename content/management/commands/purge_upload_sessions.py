@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from content.uploads import purge_stale_sessions
+
+
+class Command(BaseCommand):
+    help = "Delete unfinished resumable uploads that have been idle too long."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--hours",
+            type=int,
+            default=None,
+            help="Idle age in hours (defaults to UPLOAD_SESSION_TTL_HOURS).",
+        )
+
+    def handle(self, *args, **options):
+        removed = purge_stale_sessions(options["hours"])
+        self.stdout.write(self.style.SUCCESS(f"Removed {removed} stale upload session(s)."))
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from content.leaderboard import rebuild_leaderboard
+
+
+class Command(BaseCommand):
+    help = "Reconcile the live vote leaderboard columns against the Vote table."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--chunk-size",
+            default=500,
+            type=int,
+            help="Number of content rows checked per batch (default: 500).",
+        )
+
+    def handle(self, *args, **options):
+        checked, repaired = rebuild_leaderboard(chunk_size=options["chunk_size"])
+        self.stdout.write(
+            self.style.SUCCESS(f"Checked {checked} content item(s); repaired {repaired}.")
+        )
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from content.rank_ledger import rebuild_all
+
+
+class Command(BaseCommand):
+    help = "Rebuild the per-fan, per-genre rank ledger from the Vote table."
+
+    def handle(self, *args, **options):
+        rebuilt = rebuild_all()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {rebuilt} rank ledger row(s)."))
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from content.counters import reconcile_counters
+
+
+class Command(BaseCommand):
+    help = "Backfill and repair the denormalized view/vote/comment counters on Content."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--chunk-size",
+            default=500,
+            type=int,
+            help="Number of content rows checked per batch (default: 500).",
+        )
+        parser.add_argument(
+            "--content-id",
+            action="append",
+            type=int,
+            dest="content_ids",
+            help="Only reconcile this content id (may be repeated).",
+        )
+
+    def handle(self, *args, **options):
+        checked, repaired = reconcile_counters(
+            content_ids=options["content_ids"],
+            chunk_size=options["chunk_size"],
+        )
+        self.stdout.write(
+            self.style.SUCCESS(f"Checked {checked} content item(s); repaired {repaired}.")
+        )
@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from content.models import Content
+from content.tasks import transcode_content_hls
+from content.transcoding import ffmpeg_available
+
+
+class Command(BaseCommand):
+    help = "Queue HLS transcoding for uploaded videos that have no ready ladder."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="Re-transcode videos whose HLS ladder is already ready.",
+        )
+        parser.add_argument(
+            "--content-id",
+            action="append",
+            type=int,
+            dest="content_ids",
+            help="Only process this content id (repeatable).",
+        )
+
+    def handle(self, *args, **options):
+        if not ffmpeg_available():
+            raise CommandError("ffmpeg and ffprobe must be on PATH to transcode HLS.")
+
+        queryset = Content.objects.filter(media_kind=Content.MEDIA_VIDEO)
+        if options["content_ids"]:
+            queryset = queryset.filter(pk__in=options["content_ids"])
+        elif not options["all"]:
+            queryset = queryset.exclude(hls_status=Content.HLS_READY)
+
+        queued = 0
+        for content in queryset.only("id").order_by("pk").iterator():
+            # A ready ladder keeps serving until its replacement is published.
+            Content.objects.filter(pk=content.pk).exclude(hls_status=Content.HLS_READY).update(
+                hls_status=Content.HLS_PENDING
+            )
+            transcode_content_hls.delay(content.pk)
+            queued += 1
+        self.stdout.write(self.style.SUCCESS(f"Queued HLS transcoding for {queued} video(s)."))
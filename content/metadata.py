@@ -0,0 +1,138 @@
+"""
+Media metadata for uploaded files.
+
+Content.save() sets media_kind and media_mime from the file extension, so
+templates and querysets can filter on those columns right away. The rest
+is filled in the background by `extract_metadata`: ffprobe for audio/video
+(duration, bitrate, dimensions) and a header-only PIL read for images. It
+is written with a conditional update, like the other upload stages, and
+copied from another item when the same blob was already probed.
+`extract_media_metadata` backfills existing rows.
+"""
+import logging
+import posixpath
+import shutil
+
+import ffmpeg
+from django.db import transaction
+from django.utils import timezone
+from PIL import Image, UnidentifiedImageError
+
+from .models import Content
+
+
+logger = logging.getLogger(__name__)
+
+# Same extensions the upload form accepts.
+MEDIA_TYPES = {
+    ".mp4": (Content.MEDIA_VIDEO, "video/mp4"),
+    ".mpeg": (Content.MEDIA_VIDEO, "video/mpeg"),
+    ".mp3": (Content.MEDIA_AUDIO, "audio/mpeg"),
+    ".jpg": (Content.MEDIA_IMAGE, "image/jpeg"),
+    ".jpeg": (Content.MEDIA_IMAGE, "image/jpeg"),
+    ".png": (Content.MEDIA_IMAGE, "image/png"),
+    ".gif": (Content.MEDIA_IMAGE, "image/gif"),
+}
+PROBED_FIELDS = ("media_duration", "media_width", "media_height", "media_bitrate", "media_probed_at")
+
+
+def classify(name):
+    """
+    (media_kind, media_mime) for a storage name; ("", "") when unknown.
+    """
+    return MEDIA_TYPES.get(posixpath.splitext(name or "")[1].lower(), (Content.MEDIA_NONE, ""))
+
+
+def ffprobe_available():
+    return shutil.which("ffprobe") is not None
+
+
+def _number(value, cast):
+    try:
+        return cast(float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+def probe_av(path):
+    info = ffmpeg.probe(path)
+    container = info.get("format", {})
+    video = next((stream for stream in info.get("streams", []) if stream.get("codec_type") == "video"), {})
+    return {
+        "media_duration": _number(container.get("duration"), float),
+        "media_bitrate": _number(container.get("bit_rate"), int),
+        "media_width": _number(video.get("width"), int),
+        "media_height": _number(video.get("height"), int),
+    }
+
+
+def probe_image(file):
+    # Image.open only parses the header; pixel data is never decoded here.
+    width, height = Image.open(file).size
+    return {"media_duration": None, "media_bitrate": None, "media_width": width, "media_height": height}
+
+
+def read_metadata(content):
+    """
+    Probe `content.file`. Returns the PROBED_FIELDS values (numbers are
+    None when the file cannot be read), or None when audio/video needs
+    ffprobe and it is not installed.
+    """
+    if content.media_kind in (Content.MEDIA_VIDEO, Content.MEDIA_AUDIO) and not ffprobe_available():
+        return None
+    values = {"media_duration": None, "media_bitrate": None, "media_width": None, "media_height": None}
+    try:
+        if content.media_kind == Content.MEDIA_IMAGE:
+            with content.file.open("rb") as file:
+                values = probe_image(file)
+        elif content.media_kind in (Content.MEDIA_VIDEO, Content.MEDIA_AUDIO):
+            values = probe_av(content.file.path)
+    except (ffmpeg.Error, UnidentifiedImageError, OSError, ValueError) as exc:
+        stderr = getattr(exc, "stderr", b"") or b""
+        logger.warning(
+            "Could not read metadata for content %s: %s", content.pk, stderr.decode(errors="replace")[-2000:] or exc
+        )
+    values["media_probed_at"] = timezone.now()
+    return values
+
+
+def _probed_sibling(content):
+    return (
+        Content.objects.filter(file=content.file.name, media_probed_at__isnull=False)
+        .exclude(pk=content.pk)
+        .values(*PROBED_FIELDS)
+        .first()
+    )
+
+
+def extract_metadata(content_id):
+    """
+    Probe and store metadata for one content item. Returns the stored
+    values, or None when the item or its file is gone.
+    """
+    content = Content.objects.filter(pk=content_id).only("id", "file", "media_kind").first()
+    if content is None or not content.file:
+        return None
+
+    source_name = content.file.name
+    values = _probed_sibling(content) or read_metadata(content)
+    if values is None:
+        return None
+    # Only publish if the file was not replaced while we were probing.
+    updated = Content.objects.filter(pk=content.pk, file=source_name).update(**values)
+    return values if updated else None
+
+
+def schedule_extraction(content_id):
+    """
+    Queue metadata extraction once the surrounding transaction commits.
+    """
+    from .tasks import extract_content_metadata
+
+    def enqueue():
+        try:
+            extract_content_metadata.delay(content_id)
+        except Exception:
+            logger.exception("Could not queue metadata extraction for content %s.", content_id)
+
+    transaction.on_commit(enqueue)
@@ -0,0 +1,60 @@
+# Generated by Django 5.1.4 on 2026-10-18 11:46
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def _aggregate_subquery(queryset, aggregate):
+    return Coalesce(
+        Subquery(
+            queryset.values("content_id").annotate(total=aggregate).values("total")[:1],
+            output_field=IntegerField(),
+        ),
+        Value(0),
+    )
+
+
+def backfill_counters(apps, schema_editor):
+    Content = apps.get_model("content", "Content")
+    Vote = apps.get_model("content", "Vote")
+    Comment = apps.get_model("content", "Comment")
+    Viewer = Content.viewers.through
+
+    Content.objects.update(
+        view_count=_aggregate_subquery(Viewer.objects.filter(content_id=OuterRef("pk")), Count("pk")),
+        vote_count=_aggregate_subquery(Vote.objects.filter(content_id=OuterRef("pk")), Count("pk")),
+        vote_sum=_aggregate_subquery(Vote.objects.filter(content_id=OuterRef("pk")), Sum("value")),
+        comment_count=_aggregate_subquery(Comment.objects.filter(content_id=OuterRef("pk")), Count("pk")),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0032_content_category'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='content',
+            name='comment_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='content',
+            name='view_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='content',
+            name='vote_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='content',
+            name='vote_sum',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.1.4 on 2026-10-18 12:03
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0033_content_engagement_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContentNeighbor',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField()),
+                ('same_artist', models.BooleanField(default=False)),
+                ('computed_at', models.DateTimeField(auto_now=True)),
+                ('content', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='neighbors', to='content.content')),
+                ('neighbor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='content.content')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['content', '-score'], name='content_neighbor_rank_idx')],
+                'unique_together': {('content', 'neighbor')},
+            },
+        ),
+    ]
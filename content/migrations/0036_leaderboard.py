@@ -0,0 +1,106 @@
+# Generated by Django 5.1.4 on 2026-10-18 12:14
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_badge_vote_count(apps, schema_editor):
+    Content = apps.get_model("content", "Content")
+    Vote = apps.get_model("content", "Vote")
+
+    Content.objects.update(
+        badge_vote_count=Coalesce(
+            Subquery(
+                Vote.objects.filter(content_id=OuterRef("pk"), is_badge_vote=True)
+                .values("content_id")
+                .annotate(total=Count("pk"))
+                .values("total")[:1],
+                output_field=IntegerField(),
+            ),
+            Value(0),
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0035_userinterestprofile'),
+        ('taggit', '0006_rename_taggeditem_content_type_object_id_taggit_tagg_content_8fc721_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeaderboardSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='LeaderboardSnapshotEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('content_title', models.CharField(max_length=255)),
+                ('genre_name', models.CharField(blank=True, max_length=255)),
+                ('rank', models.PositiveIntegerField()),
+                ('genre_rank', models.PositiveIntegerField()),
+                ('total_points', models.IntegerField()),
+                ('total_votes', models.PositiveIntegerField()),
+                ('badge_votes', models.PositiveIntegerField()),
+            ],
+            options={
+                'ordering': ['rank'],
+            },
+        ),
+        migrations.AddField(
+            model_name='content',
+            name='badge_vote_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_badge_vote_count, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='content',
+            index=models.Index(fields=['-vote_sum', '-vote_count', '-upload_date'], name='content_leaderboard_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='content',
+            index=models.Index(fields=['genre', '-vote_sum', '-vote_count', '-upload_date'], name='content_genre_leaderboard_idx'),
+        ),
+        migrations.AddField(
+            model_name='leaderboardsnapshot',
+            name='created_by',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='leaderboardsnapshotentry',
+            name='content',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='content.content'),
+        ),
+        migrations.AddField(
+            model_name='leaderboardsnapshotentry',
+            name='genre',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='content.genre'),
+        ),
+        migrations.AddField(
+            model_name='leaderboardsnapshotentry',
+            name='snapshot',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='entries', to='content.leaderboardsnapshot'),
+        ),
+        migrations.AddIndex(
+            model_name='leaderboardsnapshotentry',
+            index=models.Index(fields=['snapshot', 'genre', 'genre_rank'], name='snapshot_genre_rank_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='leaderboardsnapshotentry',
+            unique_together={('snapshot', 'rank')},
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.1.4 on 2026-10-18 12:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0037_thumbnail_renditions'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='content',
+            name='hls_playlist',
+            field=models.CharField(blank=True, default='', max_length=255),
+        ),
+        migrations.AddField(
+            model_name='content',
+            name='hls_renditions',
+            field=models.JSONField(blank=True, default=list, editable=False),
+        ),
+        migrations.AddField(
+            model_name='content',
+            name='hls_status',
+            field=models.CharField(choices=[('none', 'Not applicable'), ('pending', 'Pending'), ('processing', 'Processing'), ('ready', 'Ready'), ('failed', 'Failed')], default='none', max_length=12),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.1.4 on 2026-10-18 13:12
+
+import content.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0039_upload_session'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MediaBlob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True)),
+                ('sha256', models.CharField(db_index=True, max_length=64)),
+                ('size', models.PositiveBigIntegerField(default=0)),
+                ('ref_count', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='content',
+            name='file',
+            field=models.FileField(blank=True, null=True, storage=content.storage.get_media_storage, upload_to='content/'),
+        ),
+        migrations.AlterField(
+            model_name='content',
+            name='thumbnail',
+            field=models.ImageField(blank=True, null=True, storage=content.storage.get_media_storage, upload_to='thumbnails/'),
+        ),
+    ]
@@ -0,0 +1,68 @@
+# Generated by Django 5.1.4 on 2026-10-18 13:19
+
+from django.db import migrations, models
+
+
+# Extension -> (media_kind, media_mime), as in content.metadata.MEDIA_TYPES.
+MEDIA_TYPES = {
+    ".mp4": ("video", "video/mp4"),
+    ".mpeg": ("video", "video/mpeg"),
+    ".mp3": ("audio", "audio/mpeg"),
+    ".jpg": ("image", "image/jpeg"),
+    ".jpeg": ("image", "image/jpeg"),
+    ".png": ("image", "image/png"),
+    ".gif": ("image", "image/gif"),
+}
+
+
+def classify_existing_files(apps, schema_editor):
+    # Kind and mime only; `extract_media_metadata` probes the rest.
+    Content = apps.get_model("content", "Content")
+    for extension, (kind, mime) in MEDIA_TYPES.items():
+        Content.objects.filter(file__iendswith=extension).update(media_kind=kind, media_mime=mime)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0040_media_blobs'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='content',
+            name='media_bitrate',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='content',
+            name='media_duration',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='content',
+            name='media_height',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='content',
+            name='media_kind',
+            field=models.CharField(blank=True, choices=[('', 'None'), ('video', 'Video'), ('audio', 'Audio'), ('image', 'Image')], db_index=True, default='', max_length=8),
+        ),
+        migrations.AddField(
+            model_name='content',
+            name='media_mime',
+            field=models.CharField(blank=True, default='', max_length=100),
+        ),
+        migrations.AddField(
+            model_name='content',
+            name='media_probed_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='content',
+            name='media_width',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.RunPython(classify_existing_files, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,66 @@
+# Generated by Django 5.1.4 on 2026-10-18 13:25
+
+import re
+from urllib.parse import parse_qs, urlparse
+
+from django.db import migrations, models
+
+
+# A frozen copy of content.youtube.extract_video_id, so later changes to the
+# app module cannot alter what this migration stores.
+VIDEO_ID_RE = re.compile(r"[A-Za-z0-9_-]{11}")
+
+
+def extract_video_id(url):
+    parsed = urlparse(url.strip())
+    host = parsed.netloc.lower()
+    video_id = None
+
+    if host in {"youtu.be", "www.youtu.be"}:
+        video_id = parsed.path.strip("/").split("/")[0]
+    elif "youtube.com" in host or "youtube-nocookie.com" in host:
+        if parsed.path == "/watch":
+            video_id = parse_qs(parsed.query).get("v", [None])[0]
+        elif parsed.path.startswith("/embed/"):
+            video_id = parsed.path.split("/embed/", 1)[1].split("/")[0]
+        elif parsed.path.startswith("/shorts/"):
+            video_id = parsed.path.split("/shorts/", 1)[1].split("/")[0]
+
+    if video_id and VIDEO_ID_RE.fullmatch(video_id):
+        return video_id
+    return ""
+
+
+def store_video_ids(apps, schema_editor):
+    Content = apps.get_model("content", "Content")
+    rows = (
+        Content.objects.exclude(youtube_url__isnull=True)
+        .exclude(youtube_url="")
+        .only("id", "youtube_url")
+        .order_by("pk")
+    )
+    last_pk = 0
+    while True:
+        batch = list(rows.filter(pk__gt=last_pk)[:500])
+        if not batch:
+            return
+        last_pk = batch[-1].pk
+        for row in batch:
+            row.youtube_video_id = extract_video_id(row.youtube_url)
+        Content.objects.bulk_update(batch, ["youtube_video_id"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0041_media_metadata'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='content',
+            name='youtube_video_id',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=11),
+        ),
+        migrations.RunPython(store_video_ids, migrations.RunPython.noop),
+    ]
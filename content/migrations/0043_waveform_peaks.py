@@ -0,0 +1,18 @@
+# Generated by Django 5.1.4 on 2026-10-18 13:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0042_youtube_video_id'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='content',
+            name='waveform_peaks',
+            field=models.CharField(blank=True, default='', editable=False, max_length=255),
+        ),
+    ]
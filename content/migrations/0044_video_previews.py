@@ -0,0 +1,18 @@
+# Generated by Django 5.1.4 on 2026-10-18 13:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0043_waveform_peaks'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='content',
+            name='video_previews',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
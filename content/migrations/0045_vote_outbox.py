@@ -0,0 +1,37 @@
+# Generated by Django 5.1.4 on 2026-10-18 13:56
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0044_video_previews'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PendingVote',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('genre_id', models.IntegerField(blank=True, null=True)),
+                ('base_value', models.IntegerField()),
+                ('otp_code', models.CharField(blank=True, default='', max_length=6)),
+                ('tokens_paused', models.BooleanField(default=False)),
+                ('tag', models.CharField(max_length=255)),
+                ('accepted_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('applied', 'Applied'), ('rejected', 'Rejected')], default='pending', max_length=10)),
+                ('detail', models.CharField(blank=True, default='', max_length=255)),
+                ('processed_at', models.DateTimeField(blank=True, null=True)),
+                ('content', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='pending_votes', to='content.content')),
+                ('fan', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='pending_votes', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status', 'id'], name='pending_vote_queue_idx'), models.Index(fields=['fan', 'status'], name='pending_vote_fan_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.1.4 on 2026-10-18 14:04
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0045_vote_outbox'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RankLedger',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('genre_key', models.PositiveIntegerField(default=0)),
+                ('used_mask', models.PositiveSmallIntegerField(default=0)),
+                ('ceiling', models.PositiveSmallIntegerField(default=10)),
+                ('expires_at', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('fan', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rank_ledgers', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'unique_together': {('fan', 'genre_key')},
+            },
+        ),
+    ]
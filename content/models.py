@@ -1,16 +1,18 @@
-from django.db import models
+from django.db import models, transaction
 from django.conf import settings
+import posixpath
 import uuid
 from django.utils.timezone import now
-from django.db.models import Avg, Sum
+from django.db.models import Avg
 from taggit.managers import TaggableManager  # For tagging support
 from PIL import Image
 from datetime import timedelta
-from io import BytesIO
-from django.core.files.base import ContentFile
-from urllib.parse import parse_qs, urlparse
+from django.core.files.storage import default_storage
 from django.templatetags.static import static
-import re
+from django.urls import reverse
+
+from .storage import get_media_storage
+from .youtube import extract_video_id
 
 
 def _get_resample_filter():
@@ -21,44 +23,6 @@ def _get_resample_filter():
         return Image.LANCZOS
 
 
-def resize_and_crop_thumbnail(image, target_size=(1280, 720)):
-    """
-    Resize and crop an image to a standard aspect ratio (e.g., 16:9).
-    """
-    img = Image.open(image)
-    width, height = img.size
-
-    # Calculate the target aspect ratio
-    target_width, target_height = target_size
-    target_ratio = target_width / target_height
-
-    # Crop the image to match the target aspect ratio
-    if width / height > target_ratio:
-        # Image is wider than the target aspect ratio
-        new_width = int(height * target_ratio)
-        left = (width - new_width) / 2
-        right = left + new_width
-        img = img.crop((left, 0, right, height))
-    else:
-        # Image is taller than the target aspect ratio
-        new_height = int(width / target_ratio)
-        top = (height - new_height) / 2
-        bottom = top + new_height
-        img = img.crop((0, top, width, bottom))
-
-    # Resize the image to the target size
-    img = img.resize(target_size, _get_resample_filter())
-
-    if img.mode in ("RGBA", "P"):
-        img = img.convert("RGB")
-
-    # Save the image to a BytesIO object
-    output = BytesIO()
-    img.save(output, format='JPEG', quality=90)
-    output.seek(0)
-
-    return ContentFile(output.read(), image.name)
-
 class Genre(models.Model):
     name = models.CharField(max_length=255, unique=True)
 
@@ -74,14 +38,61 @@ class Content(models.Model):
         ('fashion', 'Fashion'),
         ('other', 'Other'),
     ]
+    MEDIA_NONE = ''
+    MEDIA_VIDEO = 'video'
+    MEDIA_AUDIO = 'audio'
+    MEDIA_IMAGE = 'image'
+    MEDIA_KIND_CHOICES = [
+        (MEDIA_NONE, 'None'),
+        (MEDIA_VIDEO, 'Video'),
+        (MEDIA_AUDIO, 'Audio'),
+        (MEDIA_IMAGE, 'Image'),
+    ]
+    HLS_NONE = 'none'
+    HLS_PENDING = 'pending'
+    HLS_PROCESSING = 'processing'
+    HLS_READY = 'ready'
+    HLS_FAILED = 'failed'
+    HLS_STATUS_CHOICES = [
+        (HLS_NONE, 'Not applicable'),
+        (HLS_PENDING, 'Pending'),
+        (HLS_PROCESSING, 'Processing'),
+        (HLS_READY, 'Ready'),
+        (HLS_FAILED, 'Failed'),
+    ]
 
     title = models.CharField(max_length=255)
     category = models.CharField(max_length=20, choices=CATEGORY_CHOICES, default='other')
     genre = models.ForeignKey(Genre, on_delete=models.CASCADE, related_name="contents", null=True, blank=True)
     description = models.TextField(blank=True, null=True)
-    file = models.FileField(upload_to='content/', blank=True, null=True)
+    # Both media fields store blobs by hash (see content.storage).
+    file = models.FileField(upload_to='content/', storage=get_media_storage, blank=True, null=True)
     youtube_url = models.URLField(blank=True, null=True)
-    thumbnail = models.ImageField(upload_to='thumbnails/', blank=True, null=True)  # New field
+    # Normalized from youtube_url at save (content.youtube); indexed so
+    # backfill_youtube_ids can list duplicate submissions with a lookup.
+    youtube_video_id = models.CharField(max_length=11, blank=True, default='', db_index=True, editable=False)
+    thumbnail = models.ImageField(upload_to='thumbnails/', storage=get_media_storage, blank=True, null=True)  # New field
+    # Storage names of the 16:9 JPEG/WebP copies built by content.thumbnails,
+    # e.g. {"source": ..., "jpeg": {"320": ...}, "webp": {...}}.
+    thumbnail_renditions = models.JSONField(default=dict, blank=True, editable=False)
+    # Filled by content.metadata: kind/mime at save, the rest by a probe.
+    media_kind = models.CharField(max_length=8, choices=MEDIA_KIND_CHOICES, default=MEDIA_NONE, blank=True, db_index=True)
+    media_mime = models.CharField(max_length=100, blank=True, default='')
+    media_duration = models.FloatField(null=True, blank=True)  # seconds
+    media_width = models.PositiveIntegerField(null=True, blank=True)
+    media_height = models.PositiveIntegerField(null=True, blank=True)
+    media_bitrate = models.PositiveIntegerField(null=True, blank=True)  # bits per second
+    media_probed_at = models.DateTimeField(null=True, blank=True, editable=False)
+    # HLS ladder built by content.transcoding; hls_playlist is the storage
+    # name of the master playlist, hls_renditions one entry per variant.
+    hls_status = models.CharField(max_length=12, choices=HLS_STATUS_CHOICES, default=HLS_NONE)
+    hls_playlist = models.CharField(max_length=255, blank=True, default='')
+    hls_renditions = models.JSONField(default=list, blank=True, editable=False)
+    # Storage name of the peaks sidecar built by content.waveforms (audio only).
+    waveform_peaks = models.CharField(max_length=255, blank=True, default='', editable=False)
+    # Poster, sprite sheet and WebVTT index built by content.previews (video
+    # only), e.g. {"source": ..., "poster": ..., "sprite": ..., "vtt": ...}.
+    video_previews = models.JSONField(default=dict, blank=True, editable=False)
     upload_date = models.DateTimeField(auto_now_add=True)
     artist = models.ForeignKey(
         settings.AUTH_USER_MODEL, 
@@ -98,12 +109,32 @@ class Content(models.Model):
     )
     tags = TaggableManager()  # Tags for content (e.g., music, dance, drama)
 
+    # Denormalized engagement counters, kept in sync with F() increments
+    # (see content.counters) and repaired by `reconcile_content_counters`.
+    view_count = models.PositiveIntegerField(default=0)
+    vote_count = models.PositiveIntegerField(default=0)
+    vote_sum = models.IntegerField(default=0)
+    badge_vote_count = models.PositiveIntegerField(default=0)
+    comment_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            # Leaderboard reads walk these instead of aggregating the Vote table.
+            models.Index(
+                fields=['-vote_sum', '-vote_count', '-upload_date'],
+                name='content_leaderboard_idx',
+            ),
+            models.Index(
+                fields=['genre', '-vote_sum', '-vote_count', '-upload_date'],
+                name='content_genre_leaderboard_idx',
+            ),
+        ]
+
     def __str__(self):
         return self.title
 
     def calculate_popularity(self):
-        total_votes = self.votes.aggregate(total=Sum('value'))['total'] or 0
-        return self.viewers.count() + total_votes  # Use count of viewers instead of views
+        return self.view_count + self.vote_sum
 
     def get_average_vote(self):
         """
@@ -111,32 +142,6 @@ class Content(models.Model):
         """
         return self.votes.aggregate(average=Avg('value'))['average'] or 0
 
-    @property
-    def youtube_video_id(self):
-        if not self.youtube_url:
-            return None
-
-        parsed = urlparse(self.youtube_url.strip())
-        host = parsed.netloc.lower()
-        video_id = None
-
-        if host in {"youtu.be", "www.youtu.be"}:
-            video_id = parsed.path.strip("/").split("/")[0]
-        elif "youtube.com" in host or "youtube-nocookie.com" in host:
-            if parsed.path == "/watch":
-                video_id = parse_qs(parsed.query).get("v", [None])[0]
-            elif parsed.path.startswith("/embed/"):
-                video_id = parsed.path.split("/embed/", 1)[1].split("/")[0]
-            elif parsed.path.startswith("/shorts/"):
-                video_id = parsed.path.split("/shorts/", 1)[1].split("/")[0]
-
-        if not video_id:
-            return None
-
-        if re.fullmatch(r"[A-Za-z0-9_-]{11}", video_id):
-            return video_id
-        return None
-
     @property
     def youtube_embed_url(self):
         video_id = self.youtube_video_id
@@ -144,23 +149,25 @@ class Content(models.Model):
             return None
         return f"https://www.youtube.com/embed/{video_id}"
 
-    @property
-    def file_name_lower(self):
-        if not self.file or not self.file.name:
-            return ""
-        return self.file.name.lower()
-
     @property
     def is_video_file(self):
-        return self.file_name_lower.endswith(".mp4") or self.file_name_lower.endswith(".mpeg")
+        return self.media_kind == self.MEDIA_VIDEO
 
     @property
     def is_audio_file(self):
-        return self.file_name_lower.endswith(".mp3")
+        return self.media_kind == self.MEDIA_AUDIO
 
     @property
     def is_image_file(self):
-        return self.file_name_lower.endswith((".jpg", ".jpeg", ".png", ".gif"))
+        return self.media_kind == self.MEDIA_IMAGE
+
+    @property
+    def duration_label(self):
+        if not self.media_duration:
+            return ""
+        minutes, seconds = divmod(int(round(self.media_duration)), 60)
+        hours, minutes = divmod(minutes, 60)
+        return f"{hours}:{minutes:02d}:{seconds:02d}" if hours else f"{minutes}:{seconds:02d}"
 
     @property
     def safe_file_url(self):
@@ -171,8 +178,51 @@ class Content(models.Model):
             return None
         return None
 
+    @property
+    def stream_url(self):
+        """
+        Gated, Range-capable URL for players (see content.delivery).
+        """
+        if not (self.pk and self.file and self.file.name):
+            return None
+        return reverse("content_media", args=[self.pk])
+
+    @property
+    def hls_url(self):
+        if self.hls_status != self.HLS_READY or not self.hls_playlist:
+            return None
+        return reverse("content_hls", args=[self.pk, posixpath.basename(self.hls_playlist)])
+
+    @property
+    def waveform_url(self):
+        if not self.waveform_peaks:
+            return None
+        return reverse("content_waveform", args=[self.pk])
+
+    def _preview_url(self, key):
+        name = (self.video_previews or {}).get(key)
+        if not name:
+            return None
+        return reverse("content_preview", args=[self.pk, posixpath.basename(name)])
+
+    @property
+    def video_poster_url(self):
+        return self._preview_url("poster")
+
+    @property
+    def preview_vtt_url(self):
+        return self._preview_url("vtt")
+
+    def _rendition_urls(self, fmt):
+        names = (self.thumbnail_renditions or {}).get(fmt) or {}
+        return [(int(width), default_storage.url(name)) for width, name in sorted(names.items(), key=lambda item: int(item[0]))]
+
     @property
     def safe_thumbnail_url(self):
+        # Prefer the largest processed rendition over the raw upload.
+        renditions = self._rendition_urls("jpeg")
+        if renditions:
+            return renditions[-1][1]
         try:
             if self.thumbnail and self.thumbnail.name:
                 return self.thumbnail.url
@@ -180,6 +230,25 @@ class Content(models.Model):
             return None
         return None
 
+    @property
+    def card_thumbnail_url(self):
+        """
+        A rendition sized for cards (~640px), for clients that ignore srcset.
+        """
+        renditions = self._rendition_urls("jpeg")
+        for width, url in renditions:
+            if width >= 640:
+                return url
+        return renditions[-1][1] if renditions else self.safe_thumbnail_url
+
+    @property
+    def thumbnail_srcset(self):
+        return ", ".join(f"{url} {width}w" for width, url in self._rendition_urls("jpeg"))
+
+    @property
+    def thumbnail_webp_srcset(self):
+        return ", ".join(f"{url} {width}w" for width, url in self._rendition_urls("webp"))
+
     @property
     def default_audio_thumbnail_url(self):
         return static("img/audio-default-thumbnail.svg")
@@ -187,17 +256,198 @@ class Content(models.Model):
     @property
     def audio_thumbnail_url(self):
         return self.safe_thumbnail_url or self.default_audio_thumbnail_url
-    
-    @property
-    def view_count(self):
-        """Property to maintain compatibility with templates expecting .views"""
-        return self.viewers.count()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Blob names as loaded, so save() can release the ones it replaces.
+        instance._stored_media = {
+            name: value for name, value in zip(field_names, values) if name in ('file', 'thumbnail')
+        }
+        # Genre as loaded, so content.rank_ledger can tell when it changes.
+        instance._stored_genre_id = dict(zip(field_names, values)).get('genre_id')
+        return instance
+
+    def _release_replaced_media(self):
+        stored = getattr(self, '_stored_media', {})
+        current = {}
+        deferred = self.get_deferred_fields()
+        for name in ('file', 'thumbnail'):
+            if name in deferred:
+                continue
+            current[name] = getattr(self, name).name or ''
+            previous = stored.get(name)
+            if previous and previous != current[name]:
+                storage = self._meta.get_field(name).storage
+                transaction.on_commit(lambda storage=storage, previous=previous: storage.release(previous))
+        self._stored_media = {**stored, **current}
+
+    def save(self, *args, **kwargs):
+        # Renditions, HLS, waveforms, video previews and metadata probes run in the
+        # background so uploads never wait on PIL or ffmpeg. Files already processed for another item
+        # (same blob) reuse that work instead.
+        thumbnail_changed = bool(self.thumbnail) and not self.thumbnail._committed
+        stale_renditions = None
+        if (thumbnail_changed or not self.thumbnail) and self.thumbnail_renditions:
+            stale_renditions, self.thumbnail_renditions = self.thumbnail_renditions, {}
+
+        self.youtube_video_id = extract_video_id(self.youtube_url)
+
+        file_changed = bool(self.file) and not self.file._committed
+        stale_hls = stale_waveform = stale_previews = None
+        transcode = False
+        if file_changed or not self.file:
+            from . import metadata, transcoding  # import this module
+
+            self.media_kind, self.media_mime = metadata.classify(self.file.name if self.file else '')
+            self.media_duration = self.media_width = self.media_height = self.media_bitrate = None
+            self.media_probed_at = None
+
+            stale_hls = posixpath.dirname(self.hls_playlist) if self.hls_playlist else None
+            transcode = file_changed and self.is_video_file and transcoding.ffmpeg_available()
+            self.hls_playlist, self.hls_renditions = '', []
+            self.hls_status = self.HLS_PENDING if transcode else self.HLS_NONE
+            stale_waveform, self.waveform_peaks = self.waveform_peaks, ''
+            stale_previews, self.video_previews = self.video_previews, {}
+        elif 'file' not in self.get_deferred_fields():
+            # A committed file assigned by name (admin, scripts, blob moves)
+            # skips the upload path above but still decides the media kind.
+            stored_name = getattr(self, '_stored_media', {}).get('file') or ''
+            if self.file.name != stored_name:
+                from . import metadata  # imports this module
+
+                self.media_kind, self.media_mime = metadata.classify(self.file.name)
+        super().save(*args, **kwargs)
+        self._release_replaced_media()
+
+        if stale_renditions or thumbnail_changed:
+            from . import thumbnails  # imports this module
+
+            if stale_renditions:
+                transaction.on_commit(lambda: thumbnails.delete_renditions(stale_renditions))
+            if thumbnail_changed and not thumbnails.reuse_renditions(self):
+                thumbnails.schedule_renditions(self.pk)
+
+        if stale_hls:
+            transaction.on_commit(lambda: transcoding.release_hls_tree(stale_hls))
+        if file_changed:
+            metadata.schedule_extraction(self.pk)
+        if file_changed and self.is_video_file and transcoding.reuse_ladder(self):
+            transcode = False
+        if transcode:
+            transcoding.schedule_transcode(self.pk)
+
+        if stale_waveform or (file_changed and self.is_audio_file):
+            from . import waveforms  # imports this module
+
+            if stale_waveform:
+                transaction.on_commit(lambda: waveforms.release_sidecar(stale_waveform))
+            if file_changed and self.is_audio_file and transcoding.ffmpeg_available():
+                waveforms.schedule_waveform(self.pk)
+
+        if stale_previews or (file_changed and self.is_video_file):
+            from . import previews  # imports this module
+
+            if stale_previews:
+                transaction.on_commit(lambda: previews.release_previews(stale_previews))
+            reused = file_changed and self.is_video_file and previews.reuse_previews(self)
+            if file_changed and self.is_video_file and not reused and transcoding.ffmpeg_available():
+                previews.schedule_previews(self.pk)
+
+
+class ContentNeighbor(models.Model):
+    """
+    Precomputed "Up next" candidates for a content item.
+    Rows are written by content.neighbors (see `compute_content_neighbors`).
+    """
+    content = models.ForeignKey(Content, on_delete=models.CASCADE, related_name='neighbors')
+    neighbor = models.ForeignKey(Content, on_delete=models.CASCADE, related_name='+')
+    score = models.FloatField()
+    same_artist = models.BooleanField(default=False)
+    computed_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('content', 'neighbor')
+        indexes = [
+            models.Index(fields=['content', '-score'], name='content_neighbor_rank_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.content_id} -> {self.neighbor_id} ({self.score:.3f})"
+
+
+class UserInterestProfile(models.Model):
+    """
+    Compact, incrementally maintained interest vectors for a user.
+    Maintained by content.interests from view, vote and follow events.
+    """
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='interest_profile',
+    )
+    followed_artist_ids = models.JSONField(default=list, blank=True)
+    genre_weights = models.JSONField(default=dict, blank=True)
+    tag_weights = models.JSONField(default=dict, blank=True)
+    # Bounded log of [content_id, genre_id, tag_names, weight], oldest first.
+    recent_items = models.JSONField(default=list, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Interest profile for {self.user_id}"
+
+
+class LeaderboardSnapshot(models.Model):
+    """
+    A voting round frozen at a point in time (see content.leaderboard).
+    """
+    name = models.CharField(max_length=255)
+    created_at = models.DateTimeField(auto_now_add=True)
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+',
+    )
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.name} ({self.created_at:%Y-%m-%d %H:%M})"
+
+
+class LeaderboardSnapshotEntry(models.Model):
+    """
+    Immutable ranking row copied out of the live leaderboard.
+    Title and genre are copied so the round survives later edits or deletes.
+    """
+    snapshot = models.ForeignKey(LeaderboardSnapshot, on_delete=models.CASCADE, related_name='entries')
+    content = models.ForeignKey(Content, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    content_title = models.CharField(max_length=255)
+    genre = models.ForeignKey(Genre, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    genre_name = models.CharField(max_length=255, blank=True)
+    rank = models.PositiveIntegerField()
+    genre_rank = models.PositiveIntegerField()
+    total_points = models.IntegerField()
+    total_votes = models.PositiveIntegerField()
+    badge_votes = models.PositiveIntegerField()
+
+    class Meta:
+        ordering = ['rank']
+        unique_together = ('snapshot', 'rank')
+        indexes = [
+            models.Index(fields=['snapshot', 'genre', 'genre_rank'], name='snapshot_genre_rank_idx'),
+        ]
 
     def save(self, *args, **kwargs):
-        if self.thumbnail and hasattr(self.thumbnail, "file"):
-            self.thumbnail = resize_and_crop_thumbnail(self.thumbnail)
+        if self.pk:
+            raise ValueError("Leaderboard snapshot entries are immutable.")
         super().save(*args, **kwargs)
 
+    def __str__(self):
+        return f"#{self.rank} {self.content_title}"
 
 
 class ParticipationRequest(models.Model):
@@ -229,6 +479,64 @@ class Vote(models.Model):
         return f"{self.fan.username} - {self.base_value} for {self.content.title}"
 
 
+class RankLedger(models.Model):
+    """
+    The ranks a fan has used in one genre within the 24h vote window, as a
+    bitmask (bit n-1 = rank n) plus the current ceiling. Maintained inside
+    the vote transaction by content.rank_ledger and rebuildable from Vote.
+    """
+    fan = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='rank_ledgers')
+    genre_key = models.PositiveIntegerField(default=0)  # genre id; 0 for content without a genre
+    used_mask = models.PositiveSmallIntegerField(default=0)
+    ceiling = models.PositiveSmallIntegerField(default=10)
+    # When the oldest counted vote leaves the window; the row is rebuilt then.
+    expires_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('fan', 'genre_key')
+
+    def __str__(self):
+        return f"{self.fan_id} in genre {self.genre_key}: mask {self.used_mask:010b}, ceiling {self.ceiling}"
+
+
+class PendingVote(models.Model):
+    """
+    Outbox row for a vote accepted in queued ingestion mode (see
+    content.vote_queue). The worker applies pending rows in batches with
+    the same rules as the synchronous path and records the outcome.
+    """
+    STATUS_PENDING = 'pending'
+    STATUS_APPLIED = 'applied'
+    STATUS_REJECTED = 'rejected'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_APPLIED, 'Applied'),
+        (STATUS_REJECTED, 'Rejected'),
+    ]
+
+    content = models.ForeignKey(Content, on_delete=models.CASCADE, related_name='pending_votes')
+    fan = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='pending_votes')
+    genre_id = models.IntegerField(null=True, blank=True)  # content genre when accepted
+    base_value = models.IntegerField()
+    otp_code = models.CharField(max_length=6, blank=True, default='')
+    tokens_paused = models.BooleanField(default=False)  # free vote: no OTP is charged
+    tag = models.CharField(max_length=255)
+    accepted_at = models.DateTimeField(default=now)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    detail = models.CharField(max_length=255, blank=True, default='')
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'id'], name='pending_vote_queue_idx'),
+            models.Index(fields=['fan', 'status'], name='pending_vote_fan_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.fan_id} - {self.base_value} for content {self.content_id} ({self.status})"
+
+
 
 
 
@@ -355,3 +663,57 @@ class Voucher(models.Model):
 
     def __str__(self):
         return f"Voucher {self.code} for {self.performance.title}"
+
+
+class UploadSession(models.Model):
+    """
+    A resumable (tus-style) upload in progress. Chunks are appended to a temp
+    file (see content.uploads) until offset reaches length, then the file is
+    moved into storage and attached to a new Content row.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    artist = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='upload_sessions'
+    )
+    filename = models.CharField(max_length=255)
+    content_type = models.CharField(max_length=100)
+    length = models.PositiveBigIntegerField()
+    offset = models.PositiveBigIntegerField(default=0)
+    sha256 = models.CharField(max_length=64, blank=True)
+
+    # Content metadata collected up front, applied when the upload completes.
+    title = models.CharField(max_length=255)
+    description = models.TextField(blank=True, null=True)
+    tags = models.CharField(max_length=255, blank=True)
+    genre = models.ForeignKey(Genre, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    thumbnail = models.ImageField(upload_to='upload_sessions/', blank=True, null=True)
+
+    content = models.ForeignKey(Content, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    @property
+    def is_complete(self):
+        return self.completed_at is not None
+
+    def __str__(self):
+        return f"{self.filename} ({self.offset}/{self.length})"
+
+
+class MediaBlob(models.Model):
+    """
+    One file in content-addressed storage (see content.storage). ref_count
+    is the number of model fields pointing at `name`; the file is deleted
+    when it drops to zero.
+    """
+    name = models.CharField(max_length=255, unique=True)
+    sha256 = models.CharField(max_length=64, db_index=True)
+    size = models.PositiveBigIntegerField(default=0)
+    ref_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.name} (x{self.ref_count})"
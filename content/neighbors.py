@@ -0,0 +1,333 @@
+import logging
+
+import numpy as np
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from taggit.models import TaggedItem
+
+from .models import Content, ContentNeighbor, Vote
+
+
+logger = logging.getLogger(__name__)
+
+
+NEIGHBOR_WEIGHTS = {
+    "tags": 0.4,
+    "genre": 0.25,
+    "coview": 0.2,
+    "covote": 0.15,
+}
+# Newer uploads win ties without outweighing any real similarity signal.
+RECENCY_WEIGHT = 1e-3
+
+
+def _top_k():
+    return max(1, int(getattr(settings, "CONTENT_NEIGHBOR_TOP_K", 12)))
+
+
+class _PublicCatalog:
+    """
+    Column-aligned arrays describing every public content item.
+    Position i in each array refers to ids[i].
+    """
+
+    def __init__(self):
+        rows = list(
+            Content.objects.filter(is_approved=True, is_visible=True)
+            .order_by("upload_date", "id")
+            .values_list("id", "artist_id", "genre_id", "view_count", "vote_count")
+        )
+        self.size = len(rows)
+        self.ids = np.array([row[0] for row in rows], dtype=np.int64)
+        self.artist_ids = np.array([row[1] for row in rows], dtype=np.int64)
+        self.genre_ids = np.array([row[2] or -1 for row in rows], dtype=np.int64)
+        self.view_counts = np.array([row[3] for row in rows], dtype=np.float32)
+        self.vote_counts = np.array([row[4] for row in rows], dtype=np.float32)
+        self.recency = (
+            np.arange(self.size, dtype=np.float32) / max(self.size, 1)
+        ) * RECENCY_WEIGHT
+        self._order = np.argsort(self.ids)
+
+        tag_pairs = TaggedItem.objects.filter(
+            content_type=ContentType.objects.get_for_model(Content),
+            object_id__in=self.ids.tolist(),
+        ).values_list("object_id", "tag_id")
+        self.tag_pairs = self._pairs(tag_pairs)
+        self.tag_counts = np.bincount(self.tag_pairs[0], minlength=self.size).astype(np.float32)
+
+    def positions(self, content_ids):
+        """
+        Map content ids to catalog positions. Returns (positions, valid_mask).
+        """
+        content_ids = np.asarray(content_ids, dtype=np.int64)
+        if self.size == 0:
+            return np.zeros(len(content_ids), dtype=np.int64), np.zeros(len(content_ids), dtype=bool)
+        found = np.searchsorted(self.ids, content_ids, sorter=self._order)
+        positions = self._order[np.clip(found, 0, self.size - 1)]
+        return positions, self.ids[positions] == content_ids
+
+    def _pairs(self, pairs):
+        pairs = np.array(list(pairs), dtype=np.int64).reshape(-1, 2)
+        positions, valid = self.positions(pairs[:, 0])
+        return positions[valid], pairs[valid, 1]
+
+    def interaction_pairs(self, source_ids=None):
+        """
+        Load (position, user_id) pairs for views and votes. When source_ids is
+        given only users who interacted with those items are loaded.
+        """
+        viewers = Content.viewers.through.objects.filter(content_id__in=self.ids.tolist())
+        votes = Vote.objects.filter(content_id__in=self.ids.tolist())
+        if source_ids is not None:
+            viewers = viewers.filter(
+                customuser_id__in=Content.viewers.through.objects.filter(
+                    content_id__in=source_ids
+                ).values("customuser_id")
+            )
+            votes = votes.filter(
+                fan_id__in=Vote.objects.filter(content_id__in=source_ids).values("fan_id")
+            )
+        return (
+            self._pairs(viewers.values_list("content_id", "customuser_id")),
+            self._pairs(votes.values_list("content_id", "fan_id")),
+        )
+
+
+def _shared_counts(pairs, block, size):
+    """
+    Count shared features between each block row and every catalog item.
+    Pairs are grouped by feature, each (block row, feature) pair is expanded
+    to the items carrying that feature, and np.bincount sums the resulting
+    (row, item) hits. Work and memory follow the number of co-occurrences
+    rather than (size x features-of-block).
+    """
+    shared = np.zeros((len(block), size), dtype=np.float32)
+    positions, features = pairs
+    if positions.size == 0 or len(block) == 0:
+        return shared
+    rows_block, inverse = np.unique(block, return_inverse=True)
+
+    # De-duplicated pairs, sorted by feature and then position.
+    keys = np.unique(features * size + positions)
+    features, positions = np.divmod(keys, size)
+    row_of = np.full(size, -1, dtype=np.int64)
+    row_of[rows_block] = np.arange(rows_block.size)
+    block_rows = row_of[positions]
+    in_block = block_rows >= 0
+    if not in_block.any():
+        return shared
+
+    group_features, group_starts, group_sizes = np.unique(features, return_index=True, return_counts=True)
+    groups = np.searchsorted(group_features, features[in_block])
+    sizes = group_sizes[groups]
+    offsets = np.arange(sizes.sum()) - np.repeat(np.cumsum(sizes) - sizes, sizes)
+    rows = np.repeat(block_rows[in_block], sizes)
+    columns = positions[np.repeat(group_starts[groups], sizes) + offsets]
+    counts = np.bincount(rows * size + columns, minlength=rows_block.size * size)
+    return counts.reshape(rows_block.size, size).astype(np.float32)[inverse]
+
+
+def _cosine(shared, block_counts, counts):
+    denominator = np.sqrt(np.outer(block_counts, counts))
+    return np.divide(shared, denominator, out=np.zeros_like(shared), where=denominator > 0)
+
+
+def score_block(catalog, block, view_pairs, vote_pairs):
+    """
+    Return the (len(block) x catalog.size) similarity matrix for block rows.
+    """
+    shared_tags = _shared_counts(catalog.tag_pairs, block, catalog.size)
+    tag_union = catalog.tag_counts[block][:, None] + catalog.tag_counts[None, :] - shared_tags
+    tag_score = np.divide(shared_tags, tag_union, out=np.zeros_like(shared_tags), where=tag_union > 0)
+
+    block_genres = catalog.genre_ids[block][:, None]
+    genre_score = ((block_genres == catalog.genre_ids[None, :]) & (block_genres >= 0)).astype(np.float32)
+
+    coview_score = _cosine(
+        _shared_counts(view_pairs, block, catalog.size),
+        catalog.view_counts[block],
+        catalog.view_counts,
+    )
+    covote_score = _cosine(
+        _shared_counts(vote_pairs, block, catalog.size),
+        catalog.vote_counts[block],
+        catalog.vote_counts,
+    )
+
+    return (
+        NEIGHBOR_WEIGHTS["tags"] * tag_score
+        + NEIGHBOR_WEIGHTS["genre"] * genre_score
+        + NEIGHBOR_WEIGHTS["coview"] * np.minimum(coview_score, 1.0)
+        + NEIGHBOR_WEIGHTS["covote"] * np.minimum(covote_score, 1.0)
+    )
+
+
+def _top_indexes(row_scores, k):
+    candidates = np.flatnonzero(np.isfinite(row_scores))
+    if candidates.size > k:
+        candidates = candidates[np.argpartition(-row_scores[candidates], k - 1)[:k]]
+    return candidates[np.argsort(-row_scores[candidates], kind="stable")]
+
+
+def _neighbor_rows(catalog, block, scores, k):
+    """
+    Pick the top-k same-artist and top-k related-artist neighbors per row.
+    Same-artist items are always eligible; other artists need a real signal.
+    """
+    rows = []
+    for offset, position in enumerate(block):
+        similarity = scores[offset]
+        ranked = similarity + catalog.recency
+        same_artist = catalog.artist_ids == catalog.artist_ids[position]
+        ranked[position] = -np.inf
+
+        for is_same, eligible in ((True, same_artist), (False, ~same_artist & (similarity > 0))):
+            group_scores = np.where(eligible, ranked, -np.inf)
+            group_scores[position] = -np.inf
+            for neighbor in _top_indexes(group_scores, k):
+                rows.append(
+                    ContentNeighbor(
+                        content_id=int(catalog.ids[position]),
+                        neighbor_id=int(catalog.ids[neighbor]),
+                        score=float(ranked[neighbor]),
+                        same_artist=is_same,
+                    )
+                )
+    return rows
+
+
+def rebuild_neighbors(block_size=256, top_k=None):
+    """
+    Recompute the whole neighbor table in row blocks. Returns rows written.
+    """
+    k = top_k or _top_k()
+    catalog = _PublicCatalog()
+    view_pairs, vote_pairs = catalog.interaction_pairs()
+    written = 0
+
+    with transaction.atomic():
+        ContentNeighbor.objects.exclude(content_id__in=catalog.ids.tolist()).delete()
+        for start in range(0, catalog.size, max(1, block_size)):
+            block = np.arange(start, min(start + block_size, catalog.size))
+            rows = _neighbor_rows(catalog, block, score_block(catalog, block, view_pairs, vote_pairs), k)
+            ContentNeighbor.objects.filter(content_id__in=catalog.ids[block].tolist()).delete()
+            ContentNeighbor.objects.bulk_create(rows, batch_size=1000)
+            written += len(rows)
+    return written
+
+
+def refresh_neighbors_for(content_ids, top_k=None):
+    """
+    Incrementally place newly approved content in the neighbor table: rebuild
+    its own rows, then offer it to every item whose lists it now qualifies for.
+    Returns the number of content items whose neighbor list changed.
+    """
+    k = top_k or _top_k()
+    catalog = _PublicCatalog()
+    positions, valid = catalog.positions(list(content_ids))
+    block = positions[valid]
+    if block.size == 0:
+        return 0
+
+    source_ids = catalog.ids[block].tolist()
+    view_pairs, vote_pairs = catalog.interaction_pairs(source_ids=source_ids)
+    scores = score_block(catalog, block, view_pairs, vote_pairs)
+    source_rows = _neighbor_rows(catalog, block, scores, k)
+
+    # Scores are symmetric, so column j of the block scores is how much each
+    # source item is worth to item j.
+    candidates = {}
+    for offset, position in enumerate(block):
+        same_artist = catalog.artist_ids == catalog.artist_ids[position]
+        eligible = same_artist | (scores[offset] > 0)
+        eligible[block] = False
+        for target in np.flatnonzero(eligible):
+            candidates.setdefault(int(catalog.ids[target]), []).append(
+                ContentNeighbor(
+                    content_id=int(catalog.ids[target]),
+                    neighbor_id=int(catalog.ids[position]),
+                    score=float(scores[offset][target] + catalog.recency[position]),
+                    same_artist=bool(same_artist[target]),
+                )
+            )
+
+    existing = {}
+    for row in ContentNeighbor.objects.filter(content_id__in=list(candidates)).exclude(
+        neighbor_id__in=source_ids
+    ):
+        existing.setdefault(row.content_id, []).append(row)
+
+    changed_targets = []
+    target_rows = []
+    for target_id, offered in candidates.items():
+        current = existing.get(target_id, [])
+        merged = []
+        for is_same in (True, False):
+            group = [row for row in current + offered if row.same_artist == is_same]
+            merged.extend(sorted(group, key=lambda row: -row.score)[:k])
+        if any(row.pk is None for row in merged):
+            changed_targets.append(target_id)
+            target_rows.extend(
+                ContentNeighbor(
+                    content_id=row.content_id,
+                    neighbor_id=row.neighbor_id,
+                    score=row.score,
+                    same_artist=row.same_artist,
+                )
+                for row in merged
+            )
+
+    with transaction.atomic():
+        ContentNeighbor.objects.filter(content_id__in=source_ids).delete()
+        ContentNeighbor.objects.filter(neighbor_id__in=source_ids).delete()
+        ContentNeighbor.objects.filter(content_id__in=changed_targets).delete()
+        ContentNeighbor.objects.bulk_create(source_rows + target_rows, batch_size=1000)
+
+    return len(source_ids) + len(changed_targets)
+
+
+def neighbor_ids(content, exclude_ids=()):
+    """
+    Return ([same_artist_ids], [related_artist_ids]) from the precomputed table
+    in rank order, or None when the item has not been scored yet.
+    """
+    rows = list(
+        ContentNeighbor.objects.filter(
+            content=content,
+            neighbor__is_approved=True,
+            neighbor__is_visible=True,
+        )
+        .order_by("-score")
+        .values_list("neighbor_id", "same_artist")
+    )
+    if not rows:
+        return None
+
+    excluded = set(exclude_ids)
+    same_artist = [neighbor_id for neighbor_id, same in rows if same and neighbor_id not in excluded]
+    related = [neighbor_id for neighbor_id, same in rows if not same and neighbor_id not in excluded]
+    return same_artist, related
+
+
+def schedule_neighbor_refresh(content_ids):
+    """
+    Queue a neighbor refresh for newly approved content once the approval
+    commits; scoring loads the whole public catalog, so it never runs in the
+    approving request. Queueing failures are logged rather than raised so
+    approval itself never breaks; the nightly `compute_content_neighbors`
+    run repairs anything missed.
+    """
+    from .tasks import refresh_content_neighbors
+
+    content_ids = [int(content_id) for content_id in content_ids]
+    if not content_ids:
+        return
+
+    def enqueue():
+        try:
+            refresh_content_neighbors.delay(content_ids)
+        except Exception:
+            logger.exception("Could not queue a neighbor refresh for content ids %s.", content_ids)
+
+    transaction.on_commit(enqueue)
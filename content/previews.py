@@ -0,0 +1,205 @@
+"""
+Poster frames and scrub-preview sprites for video content.
+
+After a video upload, `build_previews` (content.tasks) grabs one poster
+frame and a low-res sprite sheet of frames every few seconds with ffmpeg,
+plus a WebVTT index mapping each time range to its tile
+(`sprite.jpg#xywh=x,y,w,h`). The files are stored under previews/, keyed by
+the media blob so identical uploads share them, and recorded on
+Content.video_previews. Cards use the poster and the player loads the
+sprite, so neither has to touch the original mp4.
+"""
+import logging
+import math
+import os
+import posixpath
+import tempfile
+
+import ffmpeg
+from django.core.files import File
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+
+from .models import Content
+
+
+logger = logging.getLogger(__name__)
+
+POSTER_WIDTH = 640
+POSTER_OFFSET = 3.0  # seconds in; the very first frame is often black
+TILE_WIDTH, TILE_HEIGHT = 160, 90
+SPRITE_COLUMNS = 10
+MAX_SPRITE_FRAMES = 100
+MIN_SPRITE_INTERVAL = 2  # seconds between sprite frames
+PREVIEW_FILES = ("poster", "sprite", "vtt")
+
+
+def preview_dir(source_name):
+    return f"previews/{posixpath.splitext(source_name)[0]}"
+
+
+def probe_duration(path):
+    return float(ffmpeg.probe(path)["format"]["duration"])
+
+
+def plan_sprite(duration):
+    """
+    (interval seconds, frame count) covering `duration` in at most
+    MAX_SPRITE_FRAMES tiles.
+    """
+    interval = max(MIN_SPRITE_INTERVAL, math.ceil(duration / MAX_SPRITE_FRAMES))
+    return interval, max(1, min(MAX_SPRITE_FRAMES, math.ceil(duration / interval)))
+
+
+def render_poster(source_path, offset, output_path):
+    (
+        ffmpeg.input(source_path, ss=offset)
+        .filter("scale", POSTER_WIDTH, -2)
+        .output(output_path, vframes=1, **{"q:v": 3})
+        .global_args("-nostdin")
+        .overwrite_output()
+        .run(capture_stdout=True, capture_stderr=True)
+    )
+
+
+def render_sprite(source_path, interval, frames, output_path):
+    rows = math.ceil(frames / SPRITE_COLUMNS)
+    (
+        ffmpeg.input(source_path)
+        .filter("fps", fps=f"1/{interval}")
+        .filter("scale", TILE_WIDTH, TILE_HEIGHT, force_original_aspect_ratio="decrease")
+        .filter("pad", TILE_WIDTH, TILE_HEIGHT, "(ow-iw)/2", "(oh-ih)/2")
+        .filter("tile", f"{SPRITE_COLUMNS}x{rows}")
+        .output(output_path, vframes=1, **{"q:v": 5})
+        .global_args("-nostdin")
+        .overwrite_output()
+        .run(capture_stdout=True, capture_stderr=True)
+    )
+
+
+def _timestamp(seconds):
+    milliseconds = int(round(seconds * 1000))
+    hours, milliseconds = divmod(milliseconds, 3_600_000)
+    minutes, milliseconds = divmod(milliseconds, 60_000)
+    seconds, milliseconds = divmod(milliseconds, 1000)
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d}.{milliseconds:03d}"
+
+
+def build_vtt(sprite_url, duration, interval, frames):
+    """
+    WebVTT cues pointing each `interval` of the video at its sprite tile.
+    `sprite_url` is relative to the VTT file.
+    """
+    lines = ["WEBVTT", ""]
+    for index in range(frames):
+        start = index * interval
+        end = duration if index == frames - 1 else min(duration, start + interval)
+        row, column = divmod(index, SPRITE_COLUMNS)
+        lines.append(f"{_timestamp(start)} --> {_timestamp(max(end, start))}")
+        lines.append(f"{sprite_url}#xywh={column * TILE_WIDTH},{row * TILE_HEIGHT},{TILE_WIDTH},{TILE_HEIGHT}")
+        lines.append("")
+    return "\n".join(lines)
+
+
+def _shared(previews):
+    source_name = (previews or {}).get("source")
+    if not source_name:
+        return False
+    held = Content.objects.filter(file=source_name).values_list("video_previews", flat=True)
+    return any(other == previews for other in held)
+
+
+def release_previews(previews):
+    """
+    Delete preview files unless another item still uses them.
+    """
+    if not previews or _shared(previews):
+        return
+    for key in PREVIEW_FILES:
+        name = previews.get(key)
+        if name:
+            try:
+                default_storage.delete(name)
+            except OSError:
+                logger.warning("Could not delete video preview %s.", name, exc_info=True)
+
+
+def reuse_previews(content):
+    """
+    Give `content` the previews already built for the same file blob by
+    another item. Returns False when there are none yet.
+    """
+    source_name = content.file.name
+    candidates = (
+        Content.objects.filter(file=source_name)
+        .exclude(pk=content.pk)
+        .values_list("video_previews", flat=True)
+    )
+    previews = next((other for other in candidates if (other or {}).get("source") == source_name), None)
+    if previews is None:
+        return False
+    content.video_previews = previews
+    Content.objects.filter(pk=content.pk, file=source_name).update(video_previews=previews)
+    return True
+
+
+def build_previews(content_id):
+    """
+    Build (or reuse) and publish the poster, sprite and VTT for one video.
+    Returns the previews mapping, or None when the item is gone, is not a
+    video, or ffmpeg fails.
+    """
+    content = Content.objects.filter(pk=content_id).only("id", "file", "media_kind", "media_duration").first()
+    if content is None or not content.file or not content.is_video_file:
+        return None
+    if reuse_previews(content):
+        return content.video_previews
+
+    source_name = content.file.name
+    directory = preview_dir(source_name)
+    try:
+        duration = content.media_duration or probe_duration(content.file.path)
+        interval, frames = plan_sprite(duration)
+        with tempfile.TemporaryDirectory(prefix="previews-") as work_dir:
+            poster_path = os.path.join(work_dir, "poster.jpg")
+            sprite_path = os.path.join(work_dir, "sprite.jpg")
+            render_poster(content.file.path, min(POSTER_OFFSET, duration / 2), poster_path)
+            render_sprite(content.file.path, interval, frames, sprite_path)
+            previews = {"source": source_name, "interval": interval}
+            for key, path in (("poster", poster_path), ("sprite", sprite_path)):
+                with open(path, "rb") as handle:
+                    previews[key] = default_storage.save(f"{directory}/{key}.jpg", File(handle))
+    except (ffmpeg.Error, OSError, KeyError, ValueError) as exc:
+        stderr = getattr(exc, "stderr", b"") or b""
+        logger.warning(
+            "Preview generation failed for content %s: %s", content_id, stderr.decode(errors="replace")[-2000:] or exc
+        )
+        return None
+
+    # Storage may have suffixed the sprite name, so the VTT is written last.
+    vtt = build_vtt(posixpath.basename(previews["sprite"]), duration, interval, frames)
+    previews["vtt"] = default_storage.save(f"{directory}/sprite.vtt", ContentFile(vtt.encode()))
+
+    # Publish only if the file was not replaced while ffmpeg was running.
+    with transaction.atomic():
+        updated = Content.objects.filter(pk=content.pk, file=source_name).update(video_previews=previews)
+    if not updated:
+        release_previews(previews)
+        return None
+    return previews
+
+
+def schedule_previews(content_id):
+    """
+    Queue preview generation once the surrounding transaction commits.
+    """
+    from .tasks import build_video_previews
+
+    def enqueue():
+        try:
+            build_video_previews.delay(content_id)
+        except Exception:
+            logger.exception("Could not queue preview generation for content %s.", content_id)
+
+    transaction.on_commit(enqueue)
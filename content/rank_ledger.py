@@ -0,0 +1,166 @@
+"""
+Rank ledger for the 24h per-genre vote rule.
+
+A fan may use each rank 1-10 once per genre within VOTE_WINDOW and may not
+rank above the highest rank still in the window. Instead of querying Vote
+twice per vote, cast_vote locks the fan's RankLedger row for the genre,
+checks the bitmask and ceiling, and updates the row in the same
+transaction as the Vote write. A row is rebuilt from Vote, under its own
+lock, when it is missing or when its oldest vote has left the window; Vote edits made
+elsewhere (admin, deletes) and genre moves drop the affected rows.
+`rebuild_rank_ledger` rebuilds everything.
+"""
+import contextlib
+import contextvars
+from datetime import timedelta
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils.timezone import now
+
+from .models import Content, RankLedger, Vote
+
+
+VOTE_WINDOW = timedelta(days=1)
+MAX_RANK = 10
+
+_recording = contextvars.ContextVar("rank_ledger_recording", default=False)
+
+
+def _bit(rank):
+    return 1 << (rank - 1)
+
+
+def _ceiling(mask):
+    # Highest rank still in the window; 10 when the fan has none.
+    return mask.bit_length() or MAX_RANK
+
+
+def genre_key(genre_id):
+    return genre_id or 0
+
+
+def rebuild(fan_id, genre_id, at=None):
+    """
+    Recompute the fan's ledger row for one genre from Vote.
+    """
+    at = at or now()
+    active = Vote.objects.filter(
+        fan_id=fan_id, content__genre_id=genre_id, timestamp__gte=at - VOTE_WINDOW
+    ).values_list("base_value", "timestamp")
+    mask = 0
+    oldest = None
+    for rank, stamp in active:
+        if 1 <= rank <= MAX_RANK:
+            mask |= _bit(rank)
+        oldest = stamp if oldest is None else min(oldest, stamp)
+    ledger, _ = RankLedger.objects.update_or_create(
+        fan_id=fan_id,
+        genre_key=genre_key(genre_id),
+        defaults={
+            "used_mask": mask,
+            "ceiling": _ceiling(mask),
+            "expires_at": oldest + VOTE_WINDOW if oldest else None,
+        },
+    )
+    return ledger
+
+
+def rebuild_all(at=None):
+    """
+    Drop every ledger row and rebuild the ones for fans with votes still in
+    the window; the rest are rebuilt on their next vote. Returns the count.
+    """
+    at = at or now()
+    RankLedger.objects.all().delete()
+    pairs = (
+        Vote.objects.filter(timestamp__gte=at - VOTE_WINDOW)
+        .values_list("fan_id", "content__genre_id")
+        .distinct()
+    )
+    rebuilt = 0
+    for fan_id, genre_id in pairs:
+        rebuild(fan_id, genre_id, at)
+        rebuilt += 1
+    return rebuilt
+
+
+def locked_ledger(fan_id, genre_id, at):
+    """
+    The fan's ledger row for the genre, locked until the surrounding
+    transaction ends. One keyed lookup unless it has to be rebuilt.
+
+    A missing row leaves nothing to lock, so an empty one is created first
+    and locked; concurrent first votes then queue on that row, and it is
+    rebuilt from Vote under the lock.
+    """
+    key = genre_key(genre_id)
+    ledger = RankLedger.objects.select_for_update().filter(fan_id=fan_id, genre_key=key).first()
+    if ledger is None:
+        RankLedger.objects.get_or_create(fan_id=fan_id, genre_key=key)
+        RankLedger.objects.select_for_update().get(fan_id=fan_id, genre_key=key)
+        return rebuild(fan_id, genre_id, at)
+    if ledger.expires_at is not None and ledger.expires_at <= at:
+        ledger = rebuild(fan_id, genre_id, at)
+    return ledger
+
+
+def rank_error(ledger, vote_value):
+    """
+    The message to reject `vote_value` with, or None when it is allowed.
+    """
+    if ledger.used_mask & _bit(vote_value):
+        return f"Rank {vote_value} already used in this genre"
+    if vote_value > ledger.ceiling:
+        return f"You must rank lower than or equal to {ledger.ceiling}"
+    return None
+
+
+def record(ledger, fan_id, genre_id, vote_value, stamp, replaced):
+    """
+    Add a vote written at `stamp`. A re-vote replaces the fan's earlier
+    rank on that content, so the row is rebuilt instead.
+    """
+    if replaced:
+        return rebuild(fan_id, genre_id, stamp)
+    ledger.used_mask |= _bit(vote_value)
+    ledger.ceiling = _ceiling(ledger.used_mask)
+    expires_at = stamp + VOTE_WINDOW
+    if ledger.expires_at is None or expires_at < ledger.expires_at:
+        ledger.expires_at = expires_at
+    ledger.save(update_fields=["used_mask", "ceiling", "expires_at", "updated_at"])
+    return ledger
+
+
+@contextlib.contextmanager
+def recording():
+    """
+    Vote writes made inside this block maintain the ledger themselves, so
+    the invalidation receivers leave it alone.
+    """
+    token = _recording.set(True)
+    try:
+        yield
+    finally:
+        _recording.reset(token)
+
+
+def forget_fan(fan_id):
+    RankLedger.objects.filter(fan_id=fan_id).delete()
+
+
+@receiver(post_save, sender=Vote)
+@receiver(post_delete, sender=Vote)
+def forget_on_vote_change(sender, instance, raw=False, **kwargs):
+    if raw or _recording.get():
+        return
+    forget_fan(instance.fan_id)
+
+
+@receiver(post_save, sender=Content)
+def forget_on_genre_change(sender, instance, raw=False, **kwargs):
+    stored = getattr(instance, "_stored_genre_id", instance.genre_id)
+    instance._stored_genre_id = instance.genre_id
+    if raw or stored == instance.genre_id:
+        return
+    RankLedger.objects.filter(fan__in=Vote.objects.filter(content=instance).values("fan_id")).delete()
@@ -1,6 +1,7 @@
-# Keep this list in place so ASGI startup does not fail when websocket
-# routes are not yet implemented.
+from django.urls import re_path
+
+from .consumers import ContentUpdatesConsumer
+
 websocket_urlpatterns = [
-    # Example:
-    # re_path(r"ws/example/$", ExampleConsumer.as_asgi()),
+    re_path(r"ws/content/(?P<content_id>\d+)/$", ContentUpdatesConsumer.as_asgi()),
 ]
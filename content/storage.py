@@ -0,0 +1,163 @@
+"""
+Content-addressed storage for uploaded media.
+
+Content.file and Content.thumbnail save through `ContentAddressedStorage`.
+Each upload is hashed while it is written and stored once under
+<upload_to>/<aa>/<sha256><ext>. Identical uploads get the same storage name,
+so they share one file on disk, and work keyed by that name (thumbnail
+renditions, HLS ladders) can be reused instead of being redone. A MediaBlob
+row counts the model fields that point at each blob, and the file is removed
+when the last reference is released. `fold_duplicate_media` moves files
+saved before this backend into it.
+"""
+import hashlib
+import os
+import posixpath
+import uuid
+
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+from django.utils.deconstruct import deconstructible
+
+
+STAGING_DIR = ".staging"
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def file_digest(path):
+    hasher = hashlib.sha256()
+    with open(path, "rb") as handle:
+        for block in iter(lambda: handle.read(HASH_CHUNK_SIZE), b""):
+            hasher.update(block)
+    return hasher.hexdigest()
+
+
+class _HashingFile(File):
+    """
+    Pass-through for FileSystemStorage._save that hashes chunks as they are
+    written, so the upload is only read once.
+    """
+
+    def __init__(self, source):
+        super().__init__(source, name=source.name)
+        self.hasher = hashlib.sha256()
+
+    def chunks(self, chunk_size=None):
+        for chunk in self.file.chunks(chunk_size):
+            self.hasher.update(chunk.encode() if isinstance(chunk, str) else chunk)
+            yield chunk
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    def blob_name(self, name, digest):
+        directory = posixpath.dirname(name)
+        extension = posixpath.splitext(name)[1].lower()
+        return posixpath.join(directory, digest[:2], f"{digest}{extension}")
+
+    def get_available_name(self, name, max_length=None):
+        # The final name comes from the file's hash in _save(); identical
+        # files are meant to collide.
+        return name
+
+    def _save(self, name, content):
+        staging_name = posixpath.join(STAGING_DIR, f"{uuid.uuid4().hex}{posixpath.splitext(name)[1].lower()}")
+        # Callers that already hashed the bytes (resumable uploads) pass the
+        # digest along; temp files on disk are hashed and then moved.
+        digest = getattr(content, "sha256", "")
+        if not digest and hasattr(content, "temporary_file_path"):
+            digest = file_digest(content.temporary_file_path())
+        if digest:
+            super()._save(staging_name, content)
+        else:
+            hashing = _HashingFile(content)
+            super()._save(staging_name, hashing)
+            digest = hashing.hasher.hexdigest()
+        return self._publish(self.path(staging_name), self.blob_name(name, digest), digest)
+
+    def _publish(self, staged_path, blob_name, digest, references=1):
+        # Take the reference before touching the target, then always move the
+        # staged copy into place: the bytes are identical, so a concurrent
+        # release() either sees the row and keeps the file or has its delete
+        # overwritten here.
+        target = self.path(blob_name)
+        size = os.path.getsize(staged_path)
+        self.retain(blob_name, digest, size, references)
+        try:
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            os.replace(staged_path, target)
+        except OSError:
+            for _ in range(references):
+                self.release(blob_name)
+            raise
+        return blob_name
+
+    def retain(self, name, digest, size, references=1):
+        from .models import MediaBlob
+
+        with transaction.atomic():
+            MediaBlob.objects.get_or_create(name=name, defaults={"sha256": digest, "size": size})
+            blob = MediaBlob.objects.select_for_update().get(name=name)
+            MediaBlob.objects.filter(pk=blob.pk).update(ref_count=F("ref_count") + references)
+
+    def adopt(self, name, references=1, digest=None):
+        """
+        Move a file saved before this backend into its blob and take
+        `references` to it. Returns the blob name; if the blob already
+        exists the old file is removed.
+        """
+        digest = digest or file_digest(self.path(name))
+        blob_name = self.blob_name(name, digest)
+        if blob_name == name:
+            self.retain(name, digest, self.size(name), references)
+            return name
+        return self._publish(self.path(name), blob_name, digest, references)
+
+    def release(self, name):
+        """
+        Drop one reference to `name`; the file goes once nothing points at
+        it. Returns False when `name` is not a tracked blob.
+        """
+        from .models import MediaBlob
+
+        with transaction.atomic():
+            blob = MediaBlob.objects.select_for_update().filter(name=name).first()
+            if blob is None:
+                return False
+            if blob.ref_count > 1:
+                MediaBlob.objects.filter(pk=blob.pk).update(ref_count=F("ref_count") - 1)
+                return True
+            blob.delete()
+
+        def remove():
+            # Someone may have uploaded the same bytes in the meantime.
+            if not MediaBlob.objects.filter(name=name).exists():
+                super(ContentAddressedStorage, self).delete(name)
+
+        transaction.on_commit(remove)
+        return True
+
+    def delete(self, name):
+        if not self.release(name):
+            super().delete(name)
+
+
+media_storage = ContentAddressedStorage()
+
+
+def get_media_storage():
+    return media_storage
+
+
+@receiver(post_delete, sender="content.Content")
+def release_content_media(sender, instance, **kwargs):
+    for name in ("file", "thumbnail"):
+        field_file = getattr(instance, name)
+        if field_file and hasattr(field_file.storage, "release"):
+            transaction.on_commit(
+                lambda storage=field_file.storage, blob=field_file.name: storage.release(blob)
+            )
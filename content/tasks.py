@@ -0,0 +1,42 @@
+from celery import shared_task
+
+from . import live_updates, metadata, neighbors, previews, thumbnails, transcoding, waveforms
+
+
+@shared_task(autoretry_for=(OSError,), retry_backoff=True, max_retries=3)
+def generate_thumbnail_renditions(content_id):
+    renditions = thumbnails.generate_renditions(content_id)
+    return sorted(renditions["jpeg"]) if renditions else []
+
+
+@shared_task(acks_late=True)
+def transcode_content_hls(content_id):
+    renditions = transcoding.transcode_to_hls(content_id)
+    return [rendition["name"] for rendition in renditions] if renditions else []
+
+
+@shared_task(autoretry_for=(OSError,), retry_backoff=True, max_retries=3)
+def extract_content_metadata(content_id):
+    values = metadata.extract_metadata(content_id)
+    return bool(values)
+
+
+@shared_task(acks_late=True)
+def refresh_content_neighbors(content_ids):
+    return neighbors.refresh_neighbors_for(content_ids)
+
+
+@shared_task(acks_late=True)
+def build_content_waveform(content_id):
+    return waveforms.build_waveform(content_id) or ""
+
+
+@shared_task(acks_late=True)
+def build_video_previews(content_id):
+    result = previews.build_previews(content_id)
+    return sorted(result) if result else []
+
+
+@shared_task
+def broadcast_content_update(content_id):
+    live_updates.broadcast(content_id)
@@ -1,16 +1,45 @@
 from datetime import timedelta
-
+from io import BytesIO, StringIO
+from unittest import mock
+import hashlib
+import json
+import os
+import posixpath
+import shutil
+import tempfile
+import threading
+import time
+
+from channels.db import database_sync_to_async
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.db import transaction
+from django.core.files.base import ContentFile
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.template.loader import render_to_string
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from django.urls import reverse
 from django.utils import timezone
+import numpy as np
+from PIL import Image
 
 from chatapp.models import MatchRating, PeerChatThread
 from users.models import Follow, OTP, Role, CustomUser, VotingTokenPolicy
 
+from .routing import websocket_urlpatterns
+
+from . import (
+    live_updates, metadata, previews, rank_ledger, tasks, thumbnails, transcoding, uploads, vote_queue, voting, watermarks, waveforms,
+)
+from .counters import increment_counters
 from .forms import ContentUploadForm
-from .models import ArtistUploadLimit, Badge, Comment, Content, Genre, LivePerformance, Vote, Voucher
+from .models import (
+    ArtistUploadLimit, Badge, Comment, Content, Genre, LivePerformance, MediaBlob, PendingVote, RankLedger, UploadSession,
+    Vote, Voucher,
+)
 
 
 def sample_upload_file(filename="test.mp4", content_type="video/mp4"):
@@ -29,7 +58,20 @@ def sample_image_file(filename="poster.gif", content_type="image/gif"):
     )
 
 
-class ContentModelTest(TestCase):
+class TemporaryMediaRootMixin:
+    # Uploads, renditions, HLS segments, waveforms and previews go to a
+    # throwaway MEDIA_ROOT that is removed with the class.
+    @classmethod
+    def setUpClass(cls):
+        cls.media_root = tempfile.mkdtemp(prefix="media-")
+        cls.addClassCleanup(shutil.rmtree, cls.media_root, ignore_errors=True)
+        media_override = override_settings(MEDIA_ROOT=cls.media_root)
+        media_override.enable()
+        cls.addClassCleanup(media_override.disable)
+        super().setUpClass()
+
+
+class ContentModelTest(TemporaryMediaRootMixin, TestCase):
     def setUp(self):
         self.user = CustomUser.objects.create_user(
             username="artist1",
@@ -59,7 +101,7 @@ class ContentModelTest(TestCase):
         self.assertTrue(upload_limit.has_upload_quota())
 
 
-class ContentViewTest(TestCase):
+class ContentViewTest(TemporaryMediaRootMixin, TestCase):
     def setUp(self):
         self.user = CustomUser.objects.create_user(
             username="artist1",
@@ -307,7 +349,7 @@ class ContentViewTest(TestCase):
         self.assertNotIn(hidden_content, featured_contents)
 
 
-class ContentFormTest(TestCase):
+class ContentFormTest(TemporaryMediaRootMixin, TestCase):
     def test_valid_form(self):
         form = ContentUploadForm(
             data={
@@ -342,6 +384,25 @@ class ContentFormTest(TestCase):
         )
         self.assertTrue(form.is_valid(), form.errors.as_json())
 
+    def test_same_youtube_video_can_be_submitted_again(self):
+        artist = CustomUser.objects.create_user(
+            username="artist_dupe",
+            password="password",
+            role=Role.ARTIST,
+        )
+        Content.objects.create(title="First", artist=artist, youtube_url="https://youtu.be/dQw4w9WgXcQ")
+        form = ContentUploadForm(
+            data={
+                "title": "Same video",
+                "description": "Share link of the same video",
+                "youtube_url": "https://www.youtube.com/watch?v=dQw4w9WgXcQ&t=42",
+                "tags": "music",
+            }
+        )
+        # Reposts and covers of one video are legitimate; backfill_youtube_ids
+        # reports them for review instead.
+        self.assertTrue(form.is_valid(), form.errors.as_json())
+
     def test_invalid_form_with_file_and_youtube_link(self):
         form = ContentUploadForm(
             data={
@@ -373,6 +434,34 @@ class YouTubeEmbedModelTest(TestCase):
             "https://www.youtube.com/embed/dQw4w9WgXcQ",
         )
 
+    def test_video_id_is_stored_at_save_and_backfilled(self):
+        user = CustomUser.objects.create_user(
+            username="artist_shorts",
+            password="password",
+            role=Role.ARTIST,
+        )
+        content = Content.objects.create(
+            title="Short",
+            artist=user,
+            youtube_url="https://youtube.com/shorts/aqz-KE-bpKQ?feature=share",
+        )
+        self.assertEqual(Content.objects.get(youtube_video_id="aqz-KE-bpKQ"), content)
+
+        content.youtube_url = "https://example.com/not-youtube"
+        content.save()
+        self.assertEqual(content.youtube_video_id, "")
+        self.assertIsNone(content.youtube_embed_url)
+
+        Content.objects.filter(pk=content.pk).update(youtube_url="https://youtu.be/dQw4w9WgXcQ")
+        Content.objects.create(title="Again", artist=user, youtube_url="https://www.youtube.com/watch?v=dQw4w9WgXcQ")
+        output = StringIO()
+        call_command("backfill_youtube_ids", stdout=output)
+
+        content.refresh_from_db()
+        self.assertEqual(content.youtube_video_id, "dQw4w9WgXcQ")
+        self.assertIn("Updated 1 YouTube video id(s).", output.getvalue())
+        self.assertIn("Duplicate dQw4w9WgXcQ", output.getvalue())
+
 
 class AuthenticationTest(TestCase):
     def setUp(self):
@@ -416,7 +505,7 @@ class AuthenticationTest(TestCase):
         self.assertEqual(upload_limit.uploads_used, 2)
 
 
-class AudioThumbnailFallbackTest(TestCase):
+class AudioThumbnailFallbackTest(TemporaryMediaRootMixin, TestCase):
     def setUp(self):
         self.artist = CustomUser.objects.create_user(
             username="audio_artist",
@@ -449,7 +538,7 @@ class AudioThumbnailFallbackTest(TestCase):
         self.assertContains(response, "img/audio-default-thumbnail.svg")
 
 
-class MediaDisplayTemplateTest(TestCase):
+class MediaDisplayTemplateTest(TemporaryMediaRootMixin, TestCase):
     def setUp(self):
         self.artist = CustomUser.objects.create_user(
             username="media_artist",
@@ -493,7 +582,7 @@ class MediaDisplayTemplateTest(TestCase):
         self.assertIn("<source", html)
 
 
-class ContentUploadFlowTest(TestCase):
+class ContentUploadFlowTest(TemporaryMediaRootMixin, TestCase):
     def setUp(self):
         self.artist = CustomUser.objects.create_user(
             username="upload_artist",
@@ -526,7 +615,7 @@ class ContentUploadFlowTest(TestCase):
         self.assertEqual(self.limit.uploads_used, 1)
 
 
-class VotingFlowTest(TestCase):
+class VotingFlowTest(TemporaryMediaRootMixin, TestCase):
     def setUp(self):
         self.artist = CustomUser.objects.create_user(
             username="vote_artist",
@@ -910,6 +999,1661 @@ class VotingFlowTest(TestCase):
         self.assertFalse(Vote.objects.filter(content=self.content, fan=self.fan).exists())
 
 
+class EngagementCounterTest(TemporaryMediaRootMixin, TestCase):
+    def setUp(self):
+        self.artist = CustomUser.objects.create_user(
+            username="counter_artist",
+            password="password",
+            role=Role.ARTIST,
+        )
+        self.fan = CustomUser.objects.create_user(
+            username="counter_fan",
+            password="password",
+            role=Role.FAN,
+            has_free_pass=True,
+        )
+        self.content = Content.objects.create(
+            title="Counter Target",
+            artist=self.artist,
+            genre=Genre.objects.create(name="Counter Genre"),
+            file=sample_upload_file(filename="counter.mp4"),
+            is_approved=True,
+            is_approved_for_voting=True,
+        )
+        self.client.login(username="counter_fan", password="password")
+
+    def test_views_comments_and_votes_update_persisted_counters(self):
+        increment_url = reverse("increment_views", args=[self.content.id])
+        self.client.post(increment_url)
+        self.client.post(increment_url)
+        self.client.post(
+            reverse("add_comment", args=[self.content.id]),
+            data={"text": "Counted comment."},
+        )
+        self.client.post(
+            reverse("vote_content", args=[self.content.id]),
+            data='{"vote_value": 7, "voter_tag": "count"}',
+            content_type="application/json",
+        )
+
+        self.content.refresh_from_db()
+        self.assertEqual(self.content.view_count, 1)
+        self.assertEqual(self.content.comment_count, 1)
+        self.assertEqual(self.content.vote_count, 1)
+        self.assertEqual(self.content.vote_sum, 7)
+
+        Vote.objects.filter(content=self.content).update(
+            timestamp=timezone.now() - timedelta(days=2)
+        )
+        self.client.post(
+            reverse("vote_content", args=[self.content.id]),
+            data='{"vote_value": 3, "voter_tag": "recast"}',
+            content_type="application/json",
+        )
+
+        self.content.refresh_from_db()
+        self.assertEqual(self.content.vote_count, 1)
+        self.assertEqual(self.content.vote_sum, 3)
+
+    def test_admin_vote_reset_zeroes_vote_counters(self):
+        self.client.post(
+            reverse("vote_content", args=[self.content.id]),
+            data='{"vote_value": 5, "voter_tag": "reset"}',
+            content_type="application/json",
+        )
+        admin = CustomUser.objects.create_user(
+            username="counter_admin",
+            password="password",
+            role=Role.ADMIN,
+        )
+        self.client.force_login(admin)
+        self.client.post(reverse("toggle_content_voting", args=[self.content.id, "reset"]))
+
+        self.content.refresh_from_db()
+        self.assertEqual(self.content.vote_count, 0)
+        self.assertEqual(self.content.vote_sum, 0)
+
+    def test_reconcile_command_repairs_drifted_counters(self):
+
+        self.content.viewers.add(self.fan)
+        Vote.objects.create(
+            content=self.content,
+            fan=self.fan,
+            base_value=6,
+            value=60,
+            otp_code="FREE",
+        )
+        Comment.objects.create(content=self.content, user=self.fan, text="Drift")
+        Content.objects.filter(pk=self.content.pk).update(view_count=9, vote_count=0, vote_sum=0)
+
+        call_command("reconcile_content_counters", "--chunk-size", "1", stdout=StringIO())
+
+        self.content.refresh_from_db()
+        self.assertEqual(self.content.view_count, 1)
+        self.assertEqual(self.content.vote_count, 1)
+        self.assertEqual(self.content.vote_sum, 60)
+        self.assertEqual(self.content.comment_count, 1)
+
+
+class BufferedViewTrackingTest(TemporaryMediaRootMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+        self.artist = CustomUser.objects.create_user(
+            username="buffer_artist",
+            password="password",
+            role=Role.ARTIST,
+        )
+        self.viewers = [
+            CustomUser.objects.create_user(
+                username=f"buffer_fan_{index}",
+                password="password",
+                role=Role.FAN,
+            )
+            for index in range(3)
+        ]
+        self.sync_content = Content.objects.create(
+            title="Sync Views",
+            artist=self.artist,
+            file=sample_upload_file(filename="sync_views.mp4"),
+            is_approved=True,
+        )
+        self.buffered_content = Content.objects.create(
+            title="Buffered Views",
+            artist=self.artist,
+            file=sample_upload_file(filename="buffered_views.mp4"),
+            is_approved=True,
+        )
+        self.sync_content.viewers.add(self.viewers[0])
+        self.buffered_content.viewers.add(self.viewers[0])
+
+    def tearDown(self):
+        cache.clear()
+
+    def _replay_views(self, content):
+        responses = []
+        for viewer in self.viewers + self.viewers[1:]:
+            self.client.force_login(viewer)
+            responses.append(self.client.post(reverse("increment_views", args=[content.id])))
+        return responses
+
+    def test_flush_produces_same_unique_viewers_as_sync_path(self):
+        from content.view_buffer import flush_buffered_views
+
+        self._replay_views(self.sync_content)
+        with self.settings(CONTENT_VIEW_TRACKING_MODE="buffered"):
+            responses = self._replay_views(self.buffered_content)
+
+            self.assertEqual(self.buffered_content.viewers.count(), 1)
+            self.assertEqual(responses[-1].json()["new_viewers"], 4)
+
+            self.assertEqual(flush_buffered_views(batch_size=1), (1, 3))
+            self.assertEqual(flush_buffered_views(), (0, 0))
+
+        self.sync_content.refresh_from_db()
+        self.buffered_content.refresh_from_db()
+        self.assertEqual(
+            set(self.buffered_content.viewers.values_list("id", flat=True)),
+            set(self.sync_content.viewers.values_list("id", flat=True)),
+        )
+        self.assertEqual(self.buffered_content.view_count, self.sync_content.view_count)
+        self.assertEqual(self.buffered_content.view_count, 3)
+
+    def test_flush_command_drains_buffer(self):
+
+        with self.settings(CONTENT_VIEW_TRACKING_MODE="buffered"):
+            self._replay_views(self.buffered_content)
+            output = StringIO()
+            call_command("flush_content_views", stdout=output)
+
+        self.assertIn("Flushed 3 buffered view(s) across 1 content item(s).", output.getvalue())
+        self.assertEqual(self.buffered_content.viewers.count(), 3)
+
+
+class FeaturedFeedCacheTest(TemporaryMediaRootMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+        self.artist = CustomUser.objects.create_user(
+            username="feed_artist",
+            password="password",
+            role=Role.ARTIST,
+        )
+        self.published = Content.objects.create(
+            title="Published Feed Item",
+            artist=self.artist,
+            file=sample_upload_file(filename="feed_published.mp4"),
+            is_approved=True,
+        )
+        self.pending = Content.objects.create(
+            title="Pending Feed Item",
+            artist=self.artist,
+            file=sample_upload_file(filename="feed_pending.mp4"),
+            is_approved=False,
+        )
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_warm_feed_is_served_without_queries(self):
+        from content.feed import get_featured_feed
+
+        first = get_featured_feed()
+        with self.assertNumQueries(0):
+            cached = get_featured_feed()
+
+        self.assertEqual([item.id for item in cached], [item.id for item in first])
+        self.assertEqual(cached[0].artist.username, "feed_artist")
+        self.assertEqual(cached[0].title, "Published Feed Item")
+
+        # Only card values are cached, never the artist's credentials.
+        from content.feed import FEED_KEY, feed_version
+        payload = cache.get(FEED_KEY.format(version=feed_version(), limit=50))
+        self.assertNotIn("password", payload["cards"][0]["artist"])
+        self.assertNotIn(self.artist.password, repr(payload))
+        with self.assertNumQueries(0):
+            html = render_to_string("content/welcome.html", {"featured_contents": get_featured_feed()})
+        self.assertIn("Published Feed Item", html)
+
+    def test_approval_toggle_and_admin_actions_bump_feed_version(self):
+        from content.admin import ContentAdmin
+        from content.feed import get_featured_feed
+        from django.contrib.admin.sites import AdminSite
+
+        self.assertNotIn(self.pending.id, [item.id for item in get_featured_feed()])
+
+        admin = CustomUser.objects.create_user(
+            username="feed_admin",
+            password="password",
+            role=Role.ADMIN,
+        )
+        self.client.force_login(admin)
+        self.client.post(reverse("toggle_content_approval", args=[self.pending.id, "approve"]))
+        self.assertIn(self.pending.id, [item.id for item in get_featured_feed()])
+
+        ContentAdmin(Content, AdminSite()).hide_content(None, Content.objects.filter(pk=self.published.pk))
+        self.assertNotIn(self.published.id, [item.id for item in get_featured_feed()])
+
+        self.client.post(
+            reverse("admin_dashboard"),
+            {"action": "disapprove", "content_ids": [self.pending.id]},
+        )
+        self.assertEqual(get_featured_feed(), [])
+
+    def test_concurrent_miss_serves_last_feed_while_rebuild_lock_is_held(self):
+        from content.feed import FEED_LOCK_KEY, bump_feed_version, get_featured_feed
+
+        warm = get_featured_feed()
+        bump_feed_version()
+        cache.add(FEED_LOCK_KEY.format(limit=50), 1, timeout=30)
+
+        with self.assertNumQueries(0):
+            served = get_featured_feed()
+
+        self.assertEqual([item.id for item in served], [item.id for item in warm])
+
+
+class ContentNeighborTest(TemporaryMediaRootMixin, TestCase):
+    def setUp(self):
+        self.genre = Genre.objects.create(name="Neighbor Genre")
+        self.artist = CustomUser.objects.create_user(
+            username="neighbor_artist",
+            password="password",
+            role=Role.ARTIST,
+        )
+        self.other_artist = CustomUser.objects.create_user(
+            username="neighbor_other",
+            password="password",
+            role=Role.ARTIST,
+        )
+        self.fan = CustomUser.objects.create_user(
+            username="neighbor_fan",
+            password="password",
+            role=Role.FAN,
+        )
+        self.content = Content.objects.create(
+            title="Neighbor Source",
+            artist=self.artist,
+            genre=self.genre,
+            file=sample_upload_file(filename="neighbor_source.mp4"),
+            is_approved=True,
+        )
+        self.content.tags.add("afro", "live")
+        self.sibling = Content.objects.create(
+            title="Neighbor Sibling",
+            artist=self.artist,
+            file=sample_upload_file(filename="neighbor_sibling.mp4"),
+            is_approved=True,
+        )
+        self.close_match = Content.objects.create(
+            title="Neighbor Close Match",
+            artist=self.other_artist,
+            genre=self.genre,
+            file=sample_upload_file(filename="neighbor_close.mp4"),
+            is_approved=True,
+        )
+        self.close_match.tags.add("afro", "live")
+        self.weak_match = Content.objects.create(
+            title="Neighbor Weak Match",
+            artist=self.other_artist,
+            file=sample_upload_file(filename="neighbor_weak.mp4"),
+            is_approved=True,
+        )
+        self.weak_match.tags.add("live")
+        self.unrelated = Content.objects.create(
+            title="Neighbor Unrelated",
+            artist=self.other_artist,
+            file=sample_upload_file(filename="neighbor_unrelated.mp4"),
+            is_approved=True,
+        )
+
+    def test_command_ranks_neighbors_by_tag_genre_and_coview_similarity(self):
+        from content.models import ContentNeighbor
+
+        self.content.viewers.add(self.fan)
+        self.weak_match.viewers.add(self.fan)
+        out = StringIO()
+
+        call_command("compute_content_neighbors", stdout=out)
+
+        self.assertIn("neighbor row(s)", out.getvalue())
+        rows = list(
+            ContentNeighbor.objects.filter(content=self.content)
+            .order_by("-score")
+            .values_list("neighbor_id", "same_artist")
+        )
+        self.assertEqual(
+            rows,
+            [
+                (self.close_match.id, False),
+                (self.weak_match.id, False),
+                (self.sibling.id, True),
+            ],
+        )
+
+    def test_detail_page_reads_up_next_from_neighbor_table(self):
+        call_command("compute_content_neighbors", stdout=StringIO())
+        self.client.force_login(self.fan)
+
+        response = self.client.get(reverse("content_detail", args=[self.content.id]))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [item.id for item in response.context["up_next_same_creator"]],
+            [self.sibling.id],
+        )
+        self.assertEqual(
+            [item.id for item in response.context["up_next_related_creators"]],
+            [self.close_match.id, self.weak_match.id],
+        )
+
+    def test_approval_folds_new_content_into_existing_neighbor_lists(self):
+        from content.models import ContentNeighbor
+
+        call_command("compute_content_neighbors", stdout=StringIO())
+        pending = Content.objects.create(
+            title="Neighbor Pending",
+            artist=self.other_artist,
+            genre=self.genre,
+            file=sample_upload_file(filename="neighbor_pending.mp4"),
+            is_approved=False,
+        )
+        pending.tags.add("afro")
+        admin = CustomUser.objects.create_user(
+            username="neighbor_admin",
+            password="password",
+            role=Role.ADMIN,
+        )
+        self.client.force_login(admin)
+
+        # The approving request only queues the refresh.
+        with mock.patch.object(tasks.refresh_content_neighbors, "delay") as delay, \
+                self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse("toggle_content_approval", args=[pending.id, "approve"]))
+        delay.assert_called_once_with([pending.id])
+        self.assertFalse(ContentNeighbor.objects.filter(neighbor=pending).exists())
+
+        Content.objects.filter(pk=pending.pk).update(is_approved=False)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse("toggle_content_approval", args=[pending.id, "approve"]))
+
+        self.assertTrue(
+            ContentNeighbor.objects.filter(content=self.content, neighbor=pending).exists()
+        )
+        self.assertTrue(
+            ContentNeighbor.objects.filter(content=pending, neighbor=self.close_match).exists()
+        )
+
+
+class UserInterestProfileTest(TemporaryMediaRootMixin, TestCase):
+    def setUp(self):
+        from content.interests import forget_cached_profiles
+
+        forget_cached_profiles()
+        self.genre = Genre.objects.create(name="Profile Genre")
+        self.artist = CustomUser.objects.create_user(
+            username="profile_artist",
+            password="password",
+            role=Role.ARTIST,
+        )
+        self.fan = CustomUser.objects.create_user(
+            username="profile_fan",
+            password="password",
+            role=Role.FAN,
+        )
+        self.content = Content.objects.create(
+            title="Profile Source",
+            artist=self.artist,
+            genre=self.genre,
+            file=sample_upload_file(filename="profile_source.mp4"),
+            is_approved=True,
+        )
+        self.content.tags.add("highlife")
+
+    def tearDown(self):
+        from content.interests import forget_cached_profiles
+
+        forget_cached_profiles()
+
+    def test_view_vote_and_follow_events_update_profile_incrementally(self):
+        from content.interests import VIEW_WEIGHT, VOTE_WEIGHT, get_interest_profile, interest_vectors
+
+        self.content.viewers.add(self.fan)
+        Vote.objects.create(fan=self.fan, content=self.content, base_value=5, value=5)
+        Follow.objects.create(follower=self.fan, following=self.artist)
+
+        snapshot = get_interest_profile(self.fan)
+        self.assertEqual(snapshot["genre_weights"], {self.genre.id: VIEW_WEIGHT + VOTE_WEIGHT})
+        self.assertEqual(snapshot["tag_weights"], {"highlife": VIEW_WEIGHT + VOTE_WEIGHT})
+        self.assertEqual(snapshot["followed_artist_ids"], {self.artist.id})
+        self.assertEqual(
+            interest_vectors(snapshot, exclude_content_id=self.content.id),
+            ([self.artist.id], [], []),
+        )
+
+        Follow.objects.filter(follower=self.fan, following=self.artist).delete()
+        self.assertEqual(get_interest_profile(self.fan)["followed_artist_ids"], frozenset())
+
+    def test_warm_profile_is_served_without_queries(self):
+        from content.interests import get_interest_profile
+
+        self.content.viewers.add(self.fan)
+        get_interest_profile(self.fan)
+
+        with self.assertNumQueries(0):
+            snapshot = get_interest_profile(self.fan)
+
+        self.assertEqual(snapshot["tag_weights"], {"highlife": 1.0})
+
+    def test_detail_page_personalizes_from_profile_of_other_content(self):
+        other_artist = CustomUser.objects.create_user(
+            username="profile_other",
+            password="password",
+            role=Role.ARTIST,
+        )
+        watched = Content.objects.create(
+            title="Previously Watched",
+            artist=other_artist,
+            file=sample_upload_file(filename="profile_watched.mp4"),
+            is_approved=True,
+        )
+        watched.tags.add("palmwine")
+        suggestion = Content.objects.create(
+            title="Palmwine Suggestion",
+            artist=other_artist,
+            file=sample_upload_file(filename="profile_suggestion.mp4"),
+            is_approved=True,
+        )
+        suggestion.tags.add("palmwine")
+        watched.viewers.add(self.fan)
+        self.client.force_login(self.fan)
+
+        response = self.client.get(reverse("content_detail", args=[self.content.id]))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertCountEqual(
+            [item.id for item in response.context["up_next_personalized"]],
+            [suggestion.id, watched.id],
+        )
+
+
+class LeaderboardTest(TemporaryMediaRootMixin, TestCase):
+    def setUp(self):
+        self.artist = CustomUser.objects.create_user(
+            username="board_artist",
+            password="password",
+            role=Role.ARTIST,
+        )
+        self.fan = CustomUser.objects.create_user(
+            username="board_fan",
+            password="password",
+            role=Role.FAN,
+            has_free_pass=True,
+        )
+        self.afro = Genre.objects.create(name="Board Afro")
+        self.jazz = Genre.objects.create(name="Board Jazz")
+        self.afro_lead = Content.objects.create(
+            title="Afro Lead",
+            artist=self.artist,
+            genre=self.afro,
+            file=sample_upload_file(filename="board_afro_lead.mp4"),
+            is_approved=True,
+            is_approved_for_voting=True,
+        )
+        self.afro_runner_up = Content.objects.create(
+            title="Afro Runner Up",
+            artist=self.artist,
+            genre=self.afro,
+            file=sample_upload_file(filename="board_afro_runner.mp4"),
+            is_approved=True,
+            is_approved_for_voting=True,
+        )
+        self.jazz_entry = Content.objects.create(
+            title="Jazz Entry",
+            artist=self.artist,
+            genre=self.jazz,
+            file=sample_upload_file(filename="board_jazz.mp4"),
+            is_approved=True,
+            is_approved_for_voting=True,
+        )
+
+    def _vote(self, content, value):
+        return self.client.post(
+            reverse("vote_content", args=[content.id]),
+            data=f'{{"vote_value": {value}, "voter_tag": "board"}}',
+            content_type="application/json",
+        )
+
+    def test_vote_content_updates_leaderboard_totals_transactionally(self):
+        from content.leaderboard import leaderboard_queryset, top_content
+
+        Badge.objects.create(user=self.fan, level=1)
+        self.client.force_login(self.fan)
+        self.assertEqual(self._vote(self.afro_lead, 3).json()["status"], "success")
+        self.assertEqual(self._vote(self.jazz_entry, 5).json()["status"], "success")
+
+        leader = leaderboard_queryset().first()
+        self.assertEqual(leader.pk, self.jazz_entry.pk)
+        self.assertEqual((leader.total_points, leader.total_votes, leader.badge_votes), (50, 1, 1))
+        self.assertEqual(
+            [item.pk for item in top_content(limit=2, genre_id=self.afro.id)],
+            [self.afro_lead.pk, self.afro_runner_up.pk],
+        )
+
+    def test_rebuild_command_reconciles_against_vote_table(self):
+        Vote.objects.create(
+            content=self.afro_runner_up,
+            fan=self.fan,
+            base_value=4,
+            value=40,
+            is_badge_vote=True,
+        )
+        Content.objects.filter(pk=self.afro_runner_up.pk).update(vote_sum=0, vote_count=0, badge_vote_count=0)
+        out = StringIO()
+
+        call_command("rebuild_leaderboard", stdout=out)
+
+        self.afro_runner_up.refresh_from_db()
+        self.assertEqual(
+            (self.afro_runner_up.vote_sum, self.afro_runner_up.vote_count, self.afro_runner_up.badge_vote_count),
+            (40, 1, 1),
+        )
+        self.assertIn("repaired 1", out.getvalue())
+
+    def test_frozen_round_is_immutable_and_survives_new_votes(self):
+        from content.leaderboard import freeze_leaderboard
+        from content.models import LeaderboardSnapshotEntry
+
+        self.client.force_login(self.fan)
+        self._vote(self.afro_runner_up, 6)
+        self._vote(self.jazz_entry, 4)
+
+        snapshot = freeze_leaderboard("Round 1")
+        self._vote(self.afro_lead, 2)
+
+        entries = list(snapshot.entries.values_list("content_title", "rank", "genre_rank", "total_points"))
+        self.assertEqual(entries, [("Afro Runner Up", 1, 1, 6), ("Jazz Entry", 2, 1, 4)])
+        with self.assertRaises(ValueError):
+            LeaderboardSnapshotEntry.objects.get(snapshot=snapshot, rank=1).save()
+
+    def test_admin_dashboard_pages_through_genre_ranking(self):
+        admin = CustomUser.objects.create_user(
+            username="board_admin",
+            password="password",
+            role=Role.ADMIN,
+        )
+        self.client.force_login(admin)
+
+        response = self.client.get(reverse("admin_dashboard"), {"ranking_genre": self.jazz.id})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([item.pk for item in response.context["content_ranking"]], [self.jazz_entry.pk])
+
+
+class ThumbnailRenditionTest(TemporaryMediaRootMixin, TestCase):
+    def setUp(self):
+        self.artist = CustomUser.objects.create_user(
+            username="thumb_artist",
+            password="password",
+            role=Role.ARTIST,
+        )
+
+    def jpeg_upload(self, size, filename="cover.jpg"):
+        output = BytesIO()
+        Image.new("RGB", size, (200, 40, 90)).save(output, format="JPEG")
+        return SimpleUploadedFile(filename, output.getvalue(), content_type="image/jpeg")
+
+    def create_content(self, thumbnail):
+        with self.captureOnCommitCallbacks(execute=True):
+            content = Content.objects.create(
+                title="Cover Art",
+                artist=self.artist,
+                thumbnail=thumbnail,
+                is_approved=True,
+            )
+        content.refresh_from_db()
+        return content
+
+    def test_upload_keeps_original_and_builds_renditions_after_commit(self):
+        upload = self.jpeg_upload((2000, 1000))
+        original = upload.read()
+        upload.seek(0)
+
+        content = self.create_content(upload)
+
+        with content.thumbnail.open("rb") as file:
+            self.assertEqual(file.read(), original)
+        for fmt in ("jpeg", "webp"):
+            self.assertEqual(sorted(content.thumbnail_renditions[fmt], key=int), ["320", "640", "1280"])
+            for width, name in content.thumbnail_renditions[fmt].items():
+                with default_storage.open(name) as file:
+                    self.assertEqual(Image.open(file).size, (int(width), round(int(width) * 9 / 16)))
+        self.assertIn(" 1280w", content.thumbnail_srcset)
+        self.assertIn("-640.webp 640w", content.thumbnail_webp_srcset)
+        self.assertTrue(content.card_thumbnail_url.endswith(".jpg"))
+        self.assertIn("-640", content.card_thumbnail_url)
+
+    def test_jpeg_sources_are_draft_decoded_near_the_largest_rendition(self):
+        with self.jpeg_upload((4000, 3000)) as upload:
+            source = thumbnails._load_source(upload, 1280)
+
+        self.assertLess(source.width, 4000)
+        self.assertGreaterEqual(source.width, 1280)
+        self.assertAlmostEqual(source.width / source.height, 16 / 9, places=2)
+
+    def test_replacing_thumbnail_drops_stale_renditions_and_skips_upscaling(self):
+        content = self.create_content(self.jpeg_upload((1600, 900)))
+        stale = list(content.thumbnail_renditions["jpeg"].values())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            content.thumbnail = self.jpeg_upload((400, 300), filename="small.jpg")
+            content.save()
+        content.refresh_from_db()
+
+        self.assertFalse(any(default_storage.exists(name) for name in stale))
+        self.assertEqual(list(content.thumbnail_renditions["jpeg"]), ["320"])
+
+    def test_media_display_renders_srcset_and_command_queues_missing_items(self):
+        content = self.create_content(self.jpeg_upload((1280, 720)))
+        html = render_to_string("partials/media_display.html", {"content": content})
+
+        self.assertIn('type="image/webp"', html)
+        self.assertIn("srcset=", html)
+        self.assertIn(" 640w", html)
+
+        Content.objects.filter(pk=content.pk).update(thumbnail_renditions={})
+        out = StringIO()
+        call_command("generate_thumbnail_renditions", stdout=out)
+
+        self.assertIn("Queued thumbnail renditions for 1 content item(s).", out.getvalue())
+        content.refresh_from_db()
+        self.assertIn("1280", content.thumbnail_renditions["jpeg"])
+
+
+class MediaDeliveryTest(TemporaryMediaRootMixin, TestCase):
+    def setUp(self):
+        self.artist = CustomUser.objects.create_user(
+            username="delivery_artist",
+            password="password",
+            role=Role.ARTIST,
+        )
+        self.fan = CustomUser.objects.create_user(username="delivery_fan", password="password", role=Role.FAN)
+        self.content = Content.objects.create(
+            title="Range Track",
+            artist=self.artist,
+            file=SimpleUploadedFile("range.mp3", b"0123456789", content_type="audio/mpeg"),
+            is_approved=True,
+        )
+        self.url = reverse("content_media", args=[self.content.pk])
+
+    def body(self, response):
+        return b"".join(response.streaming_content)
+
+    def test_full_and_ranged_responses(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.body(response), b"0123456789")
+        self.assertEqual(response["Accept-Ranges"], "bytes")
+        self.assertEqual(response["Content-Type"], "audio/mpeg")
+        self.assertTrue(response["Content-Disposition"].startswith("inline"))
+
+        response = self.client.get(self.url, HTTP_RANGE="bytes=2-5")
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response["Content-Range"], "bytes 2-5/10")
+        self.assertEqual(response["Content-Length"], "4")
+        self.assertEqual(self.body(response), b"2345")
+
+        response = self.client.get(self.url, HTTP_RANGE="bytes=-3")
+        self.assertEqual(self.body(response), b"789")
+
+        response = self.client.get(self.url, HTTP_RANGE="bytes=20-")
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response["Content-Range"], "bytes */10")
+
+    def test_conditional_requests(self):
+        etag = self.client.get(self.url)["ETag"]
+
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        response = self.client.get(self.url, HTTP_RANGE="bytes=0-1", HTTP_IF_RANGE='"stale"')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.body(response), b"0123456789")
+
+    def test_access_rules_for_streaming_and_downloads(self):
+        Content.objects.filter(pk=self.content.pk).update(is_approved=False)
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+        self.client.force_login(self.artist)
+        self.assertEqual(self.client.get(self.url).status_code, 200)
+        Content.objects.filter(pk=self.content.pk).update(is_approved=True)
+
+        download_url = reverse("content_download", args=[self.content.pk])
+        self.client.force_login(self.fan)
+        self.assertEqual(self.client.get(download_url).status_code, 403)
+
+        CustomUser.objects.filter(pk=self.fan.pk).update(can_download_content=True)
+        response = self.client.get(download_url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Disposition"], 'attachment; filename="range-track.mp3"')
+
+    @override_settings(MEDIA_DELIVERY_BACKEND="x-accel-redirect", MEDIA_ACCEL_REDIRECT_PREFIX="/protected-media/")
+    def test_accel_redirect_offloads_the_transfer(self):
+        response = self.client.get(self.url, HTTP_RANGE="bytes=2-5")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["X-Accel-Redirect"], f"/protected-media/{self.content.file.name}")
+        self.assertEqual(response.content, b"")
+
+
+class HlsTranscodingTest(TemporaryMediaRootMixin, TestCase):
+    def setUp(self):
+        self.artist = CustomUser.objects.create_user(
+            username="hls_artist",
+            password="password",
+            role=Role.ARTIST,
+        )
+
+    @staticmethod
+    def fake_ladder(source_path, output_dir, plan, has_audio):
+        for rung, _width in plan:
+            os.makedirs(os.path.join(output_dir, rung.name))
+            with open(os.path.join(output_dir, rung.name, "index.m3u8"), "w") as handle:
+                handle.write("#EXTM3U\n#EXTINF:6.0,\nsegment_00000.ts\n#EXT-X-ENDLIST\n")
+            with open(os.path.join(output_dir, rung.name, "segment_00000.ts"), "wb") as handle:
+                handle.write(b"ts-" + rung.name.encode())
+
+    def upload_video(self, probe):
+        with mock.patch.object(transcoding, "ffmpeg_available", return_value=True), \
+                mock.patch.object(transcoding, "probe_video", return_value=probe), \
+                mock.patch.object(transcoding, "run_ladder", side_effect=self.fake_ladder), \
+                self.captureOnCommitCallbacks(execute=True):
+            content = Content.objects.create(
+                title="Ladder Clip",
+                artist=self.artist,
+                file=sample_upload_file(filename="ladder.mp4"),
+                is_approved=True,
+            )
+        content.refresh_from_db()
+        return content
+
+    def test_ladder_skips_upscaling_and_keeps_even_widths(self):
+        plan = transcoding.plan_ladder(1920, 600)
+
+        self.assertEqual([(rung.name, width) for rung, width in plan], [("240p", 768), ("480p", 1536)])
+        self.assertEqual([rung.name for rung, _ in transcoding.plan_ladder(320, 180)], ["240p"])
+
+    def test_upload_publishes_master_playlist_and_serves_segments(self):
+        content = self.upload_video({"width": 1280, "height": 720, "has_audio": True})
+
+        self.assertEqual(content.hls_status, Content.HLS_READY)
+        self.assertEqual([item["name"] for item in content.hls_renditions], ["240p", "480p", "720p"])
+        master = b"".join(self.client.get(content.hls_url).streaming_content).decode()
+        self.assertIn("RESOLUTION=854x480", master)
+        self.assertIn("480p/index.m3u8", master)
+
+        segment = self.client.get(reverse("content_hls", args=[content.pk, "720p/segment_00000.ts"]))
+        self.assertEqual(segment["Content-Type"], "video/mp2t")
+        self.assertEqual(b"".join(segment.streaming_content), b"ts-720p")
+        self.assertEqual(self.client.get(reverse("content_hls", args=[content.pk, "../../x"])).status_code, 404)
+
+        html = render_to_string("partials/media_display.html", {"content": content})
+        self.assertLess(html.index("application/vnd.apple.mpegurl"), html.index('type="video/mp4"'))
+
+    def test_failed_transcode_falls_back_to_the_original_file(self):
+        with mock.patch.object(transcoding, "ffmpeg_available", return_value=True), \
+                mock.patch.object(transcoding, "probe_video", side_effect=ValueError("No video stream found.")), \
+                self.assertLogs("content.transcoding", level="WARNING"), \
+                self.captureOnCommitCallbacks(execute=True):
+            content = Content.objects.create(
+                title="Broken Clip",
+                artist=self.artist,
+                file=sample_upload_file(filename="broken.mp4"),
+                is_approved=True,
+            )
+        content.refresh_from_db()
+
+        self.assertEqual(content.hls_status, Content.HLS_FAILED)
+        self.assertIsNone(content.hls_url)
+        html = render_to_string("partials/media_display.html", {"content": content})
+        self.assertNotIn("mpegurl", html)
+        self.assertIn(content.stream_url, html)
+
+
+class WatermarkCacheTest(TemporaryMediaRootMixin, TestCase):
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp(prefix="watermarks-")
+        self.addCleanup(shutil.rmtree, self.cache_dir, ignore_errors=True)
+        settings_override = self.settings(WATERMARK_CACHE_DIR=self.cache_dir, WATERMARK_CACHE_MAX_BYTES=10_000)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.artist = CustomUser.objects.create_user(
+            username="watermark_artist",
+            password="password",
+            role=Role.ARTIST,
+        )
+        self.fan = CustomUser.objects.create_user(
+            username="watermark_fan",
+            password="password",
+            role=Role.FAN,
+            can_download_content=True,
+        )
+        self.content = Content.objects.create(
+            title="Watermark Clip",
+            artist=self.artist,
+            file=sample_upload_file(filename="watermark.mp4"),
+            is_approved=True,
+        )
+        self.renders = []
+
+    def fake_render(self, source_path, target_path, text):
+        self.renders.append(text)
+        with open(target_path, "wb") as handle:
+            handle.write(text.encode())
+
+    def test_concurrent_requests_for_one_viewer_share_a_render(self):
+        started, release = threading.Event(), threading.Event()
+
+        def slow_render(source_path, target_path, text):
+            started.set()
+            release.wait(5)
+            self.fake_render(source_path, target_path, text)
+
+        with mock.patch.object(watermarks, "render_watermark", side_effect=slow_render):
+            first = watermarks.request_watermark(self.content, self.fan)
+            started.wait(5)
+            second = watermarks.request_watermark(self.content, self.fan)
+            release.set()
+            self.assertIs(first, second)
+            name = first.result(timeout=5)
+            self.assertEqual(watermarks.get_watermarked(self.content, self.fan, timeout=1), name)
+
+        self.assertEqual(self.renders, ["Watermarked for watermark_fan"])
+
+    def test_cache_evicts_least_recently_used_files(self):
+        for index in range(3):
+            path = os.path.join(self.cache_dir, f"old-{index}.mp4")
+            with open(path, "wb") as handle:
+                handle.write(b"x" * 4000)
+            os.utime(path, (time.time() - 100 + index, time.time() - 100 + index))
+        os.utime(os.path.join(self.cache_dir, "old-0.mp4"))  # recently served
+
+        self.assertEqual(watermarks.evict(), 1)
+        self.assertEqual(sorted(os.listdir(self.cache_dir)), ["old-0.mp4", "old-2.mp4"])
+
+    def test_video_download_serves_the_viewers_cached_copy(self):
+        self.client.force_login(self.fan)
+        url = reverse("content_download", args=[self.content.pk])
+
+        with mock.patch.object(watermarks, "enabled", return_value=True), \
+                mock.patch.object(watermarks, "render_watermark", side_effect=self.fake_render):
+            first = self.client.get(url)
+            second = self.client.get(url)
+
+        self.assertEqual(b"".join(first.streaming_content), b"Watermarked for watermark_fan")
+        self.assertEqual(first["Content-Disposition"], 'attachment; filename="watermark-clip.mp4"')
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(len(self.renders), 1)
+        with self.content.file.open("rb") as source:
+            self.assertEqual(source.read(), b"fake-video-content")
+
+    def test_render_maps_audio_optionally_for_silent_videos(self):
+        with mock.patch.object(watermarks.ffmpeg.nodes.OutputStream, "run", autospec=True) as run:
+            watermarks.render_watermark("silent.mp4", "out.mp4", "Watermarked for watermark_fan")
+
+        args = run.call_args.args[0].get_args()
+        self.assertIn("0:a?", args)
+        self.assertNotIn("0:a", args)
+
+
+class ResumableUploadTest(TemporaryMediaRootMixin, TestCase):
+    def setUp(self):
+        self.session_dir = tempfile.mkdtemp(prefix="upload-sessions-")
+        self.addCleanup(shutil.rmtree, self.session_dir, ignore_errors=True)
+        settings_override = self.settings(UPLOAD_SESSION_DIR=self.session_dir)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.artist = CustomUser.objects.create_user(
+            username="resumable_artist",
+            password="password",
+            role=Role.ARTIST,
+        )
+        self.limit = ArtistUploadLimit.objects.create(artist=self.artist, upload_limit=2)
+        self.client.login(username="resumable_artist", password="password")
+        self.payload = os.urandom(150_000)
+
+    def create_session(self, length=None, filetype="audio/mpeg", **extra):
+        data = {
+            "title": "Resumable Track",
+            "description": "Sent in chunks",
+            "tags": "live, demo",
+            "upload_filename": "track.mp3",
+            "upload_filetype": filetype,
+            **extra,
+        }
+        return self.client.post(
+            reverse("resumable_upload_create"),
+            data,
+            headers={"Upload-Length": str(length if length is not None else len(self.payload))},
+        )
+
+    def patch(self, url, offset, chunk):
+        return self.client.patch(
+            url,
+            data=chunk,
+            content_type="application/offset+octet-stream",
+            headers={"Upload-Offset": str(offset)},
+        )
+
+    def test_quota_size_and_type_are_checked_before_any_bytes(self):
+        self.assertEqual(self.create_session(length=51 * 1024 * 1024).status_code, 400)
+        self.assertEqual(self.create_session(filetype="application/zip").status_code, 400)
+
+        self.limit.uploads_used = 2
+        self.limit.save()
+        response = self.create_session()
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(UploadSession.objects.exists())
+
+    def test_chunks_resume_and_complete_into_pending_content(self):
+        response = self.create_session()
+        self.assertEqual(response.status_code, 201)
+        url = response["Location"]
+
+        response = self.patch(url, 0, self.payload[:60_000])
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(response["Upload-Offset"], "60000")
+
+        # A retried chunk with a stale offset is refused with the real one.
+        response = self.patch(url, 0, self.payload[:60_000])
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response["Upload-Offset"], "60000")
+
+        # Another worker picks up the session without the in-process hasher.
+        uploads._hashers.clear()
+        self.assertEqual(self.client.head(url)["Upload-Offset"], "60000")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.patch(url, 60_000, self.payload[60_000:])
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(response["Content-Location"], reverse("artist_content", kwargs={"artist_id": self.artist.id}))
+
+        session = UploadSession.objects.get()
+        content = session.content
+        self.addCleanup(content.file.delete, save=False)
+        self.assertEqual(session.sha256, hashlib.sha256(self.payload).hexdigest())
+        self.assertFalse(content.is_approved)
+        self.assertEqual(sorted(content.tags.names()), ["demo", "live"])
+        with content.file.open("rb") as handle:
+            self.assertEqual(handle.read(), self.payload)
+        self.assertFalse(os.path.exists(uploads.temp_path(session)))
+        self.limit.refresh_from_db()
+        self.assertEqual(self.limit.uploads_used, 1)
+
+    def test_chunk_past_declared_length_is_rejected(self):
+        url = self.create_session(length=10)["Location"]
+        response = self.patch(url, 0, b"x" * 11)
+        self.assertEqual(response.status_code, 413)
+        self.assertEqual(UploadSession.objects.get().offset, 0)
+
+    def test_chunk_that_loses_its_offset_while_streaming_is_discarded(self):
+        url = self.create_session()["Location"]
+        self.patch(url, 0, self.payload[:1000])
+        session = UploadSession.objects.get()
+        winner = self.payload[1000:3000]
+
+        class RacedStream:
+            # A competing PATCH for the same offset commits mid-read.
+            def __init__(self, body):
+                self.body = BytesIO(body)
+                self.raced = False
+
+            def read(self, size):
+                if not self.raced:
+                    self.raced = True
+                    uploads.append_chunk(session.pk, session.artist, 1000, BytesIO(winner), len(winner))
+                return self.body.read(size)
+
+        with self.assertRaises(uploads.OffsetMismatch):
+            uploads.append_chunk(session.pk, self.artist, 1000, RacedStream(b"y" * 2000), 2000)
+
+        session.refresh_from_db()
+        self.assertEqual(session.offset, 3000)
+        with open(uploads.temp_path(session), "rb") as handle:
+            self.assertEqual(handle.read(), self.payload[:3000])
+        self.assertEqual(os.listdir(self.session_dir), [os.path.basename(uploads.temp_path(session))])
+
+    def test_purge_removes_idle_sessions_and_partial_files(self):
+        url = self.create_session()["Location"]
+        self.patch(url, 0, self.payload[:1000])
+        session = UploadSession.objects.get()
+        UploadSession.objects.filter(pk=session.pk).update(updated_at=timezone.now() - timedelta(hours=48))
+
+        call_command("purge_upload_sessions", stdout=StringIO())
+
+        self.assertFalse(UploadSession.objects.exists())
+        self.assertFalse(os.path.exists(uploads.temp_path(session)))
+
+
+class ContentAddressedStorageTest(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp(prefix="media-")
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        settings_override = self.settings(MEDIA_ROOT=self.media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.artist = CustomUser.objects.create_user(
+            username="blob_artist",
+            password="password",
+            role=Role.ARTIST,
+        )
+
+    def create_content(self, **fields):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Content.objects.create(title="Blob", artist=self.artist, is_approved=True, **fields)
+
+    def test_identical_uploads_share_one_counted_blob(self):
+        first = self.create_content(file=sample_upload_file(filename="fresh.mp4"))
+        second = self.create_content(file=sample_upload_file(filename="fresh.mp4"))
+
+        self.assertEqual(first.file.name, second.file.name)
+        self.assertRegex(first.file.name, r"^content/[0-9a-f]{2}/[0-9a-f]{64}\.mp4$")
+        self.assertEqual(MediaBlob.objects.get(name=first.file.name).ref_count, 2)
+
+        path = first.file.path
+        with self.captureOnCommitCallbacks(execute=True):
+            first.delete()
+        self.assertTrue(os.path.exists(path))
+        self.assertEqual(MediaBlob.objects.get(name=second.file.name).ref_count, 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            second.delete()
+        self.assertFalse(os.path.exists(path))
+        self.assertFalse(MediaBlob.objects.exists())
+
+    def test_replacing_a_file_releases_the_old_blob(self):
+        content = self.create_content(file=sample_upload_file(filename="old.mp4"))
+        old_path = content.file.path
+
+        content = Content.objects.get(pk=content.pk)
+        content.file = SimpleUploadedFile("new.mp4", b"other-bytes", content_type="video/mp4")
+        with self.captureOnCommitCallbacks(execute=True):
+            content.save()
+
+        self.assertFalse(os.path.exists(old_path))
+        self.assertEqual(list(MediaBlob.objects.values_list("name", flat=True)), [content.file.name])
+
+    def test_identical_thumbnail_and_video_reuse_processed_output(self):
+        first = self.create_content(file=sample_upload_file(), thumbnail=sample_image_file())
+        first.refresh_from_db()
+        self.assertTrue(first.thumbnail_renditions)
+        Content.objects.filter(pk=first.pk).update(
+            hls_status=Content.HLS_READY,
+            hls_playlist=f"hls/{first.pk}/abc/master.m3u8",
+            hls_renditions=[{"name": "240p"}],
+        )
+
+        with mock.patch.object(thumbnails, "schedule_renditions") as schedule_renditions, mock.patch.object(
+            transcoding, "ffmpeg_available", return_value=True
+        ), mock.patch.object(transcoding, "schedule_transcode") as schedule_transcode:
+            second = self.create_content(file=sample_upload_file(), thumbnail=sample_image_file())
+
+        schedule_renditions.assert_not_called()
+        schedule_transcode.assert_not_called()
+        second.refresh_from_db()
+        self.assertEqual(second.thumbnail_renditions, first.thumbnail_renditions)
+        self.assertEqual(second.hls_status, Content.HLS_READY)
+        self.assertEqual(second.hls_playlist, f"hls/{first.pk}/abc/master.m3u8")
+
+        # Shared renditions outlive the item that built them.
+        with self.captureOnCommitCallbacks(execute=True):
+            first.delete()
+        for name in second.thumbnail_renditions["jpeg"].values():
+            self.assertTrue(default_storage.exists(name))
+
+    def test_fold_duplicate_media_moves_legacy_files_into_blobs(self):
+        legacy = [
+            default_storage.save("content/card.mp3", ContentFile(b"same-track")),
+            default_storage.save("content/card.mp3", ContentFile(b"same-track")),
+        ]
+        self.assertNotEqual(legacy[0], legacy[1])
+        rows = [Content.objects.create(title=f"Card {index}", artist=self.artist) for index in range(2)]
+        for content, name in zip(rows, legacy):
+            Content.objects.filter(pk=content.pk).update(file=name)
+
+        output = StringIO()
+        call_command("fold_duplicate_media", stdout=output)
+
+        names = set(Content.objects.filter(pk__in=[row.pk for row in rows]).values_list("file", flat=True))
+        self.assertEqual(len(names), 1)
+        blob = MediaBlob.objects.get(name=names.pop())
+        self.assertEqual(blob.ref_count, 2)
+        self.assertTrue(default_storage.exists(blob.name))
+        for name in legacy:
+            self.assertFalse(default_storage.exists(name))
+        self.assertIn("1 duplicate(s), 10 byte(s) reclaimed", output.getvalue())
+
+    def test_publish_survives_a_release_racing_ahead_of_its_reference(self):
+        storage = Content._meta.get_field("file").storage
+        name = storage.save("content/race.mp3", ContentFile(b"racing-bytes"))
+        with self.captureOnCommitCallbacks(execute=True):
+            storage.release(name)
+        real_retain = storage.retain
+
+        def retain_after_concurrent_remove(*args, **kwargs):
+            # The other process's on_commit remove() ran before our row existed.
+            if os.path.exists(storage.path(name)):
+                os.remove(storage.path(name))
+            return real_retain(*args, **kwargs)
+
+        with mock.patch.object(storage, "retain", side_effect=retain_after_concurrent_remove):
+            self.assertEqual(storage.save("content/race.mp3", ContentFile(b"racing-bytes")), name)
+
+        self.assertEqual(MediaBlob.objects.get(name=name).ref_count, 1)
+        with storage.open(name) as handle:
+            self.assertEqual(handle.read(), b"racing-bytes")
+
+
+class MediaMetadataTest(TemporaryMediaRootMixin, TestCase):
+    def setUp(self):
+        self.artist = CustomUser.objects.create_user(
+            username="metadata_artist",
+            password="password",
+            role=Role.ARTIST,
+        )
+
+    def png_upload(self, size=(64, 36)):
+        output = BytesIO()
+        Image.new("RGB", size, (10, 20, 30)).save(output, format="PNG")
+        return SimpleUploadedFile("still.png", output.getvalue(), content_type="image/png")
+
+    def test_image_upload_records_kind_mime_and_dimensions(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            content = Content.objects.create(title="Still", artist=self.artist, file=self.png_upload())
+        self.assertTrue(content.is_image_file)
+        self.assertEqual(content.media_mime, "image/png")
+
+        content.refresh_from_db()
+        self.assertEqual((content.media_width, content.media_height), (64, 36))
+        self.assertIsNotNone(content.media_probed_at)
+        self.assertEqual(Content.objects.filter(media_kind=Content.MEDIA_IMAGE).get(), content)
+
+    def test_video_probe_stores_duration_bitrate_and_size(self):
+        probe = {
+            "format": {"duration": "125.4", "bit_rate": "1800000"},
+            "streams": [
+                {"codec_type": "video", "width": 1280, "height": 720},
+                {"codec_type": "audio"},
+            ],
+        }
+        with mock.patch.object(metadata, "ffprobe_available", return_value=True), mock.patch.object(
+            metadata.ffmpeg, "probe", return_value=probe
+        ), self.captureOnCommitCallbacks(execute=True):
+            content = Content.objects.create(title="Clip", artist=self.artist, file=sample_upload_file())
+
+        content.refresh_from_db()
+        self.assertEqual(content.media_kind, Content.MEDIA_VIDEO)
+        self.assertEqual(content.media_mime, "video/mp4")
+        self.assertEqual((content.media_width, content.media_height, content.media_bitrate), (1280, 720, 1800000))
+        self.assertEqual(content.duration_label, "2:05")
+
+    def test_backfill_command_classifies_and_probes_existing_rows(self):
+        content = Content.objects.create(title="Old still", artist=self.artist, file=self.png_upload((40, 30)))
+        Content.objects.filter(pk=content.pk).update(
+            media_kind=Content.MEDIA_NONE, media_mime="", media_width=None, media_height=None, media_probed_at=None
+        )
+        audio = Content.objects.create(
+            title="Old track", artist=self.artist, file=sample_upload_file("old.mp3", "audio/mpeg")
+        )
+
+        output = StringIO()
+        with mock.patch.object(metadata, "ffprobe_available", return_value=False):
+            call_command("extract_media_metadata", "--batch-size", "1", stdout=output)
+
+        content.refresh_from_db()
+        audio.refresh_from_db()
+        self.assertEqual((content.media_kind, content.media_width, content.media_height), ("image", 40, 30))
+        self.assertEqual(audio.media_kind, Content.MEDIA_AUDIO)
+        self.assertIsNone(audio.media_probed_at)
+        self.assertIn("Probed 1 file(s). Skipped 1", output.getvalue())
+
+    def test_files_assigned_by_name_get_their_media_kind(self):
+        content = Content.objects.create(title="Imported", artist=self.artist, file="content/imported.mp3")
+        self.assertEqual(content.media_kind, Content.MEDIA_AUDIO)
+
+        content = Content.objects.get(pk=content.pk)
+        content.file.name = "content/imported.png"
+        content.save()
+        content.refresh_from_db()
+        self.assertEqual((content.media_kind, content.media_mime), (Content.MEDIA_IMAGE, "image/png"))
+
+
+class WaveformTest(TemporaryMediaRootMixin, TestCase):
+    def setUp(self):
+        self.artist = CustomUser.objects.create_user(
+            username="waveform_artist",
+            password="password",
+            role=Role.ARTIST,
+        )
+
+    @staticmethod
+    def tone(seconds=2):
+        ramp = np.linspace(0, 1, waveforms.SAMPLE_RATE * seconds)
+        return (np.sin(ramp * 440 * np.pi) * ramp * 30000).astype("<i2")
+
+    def upload_track(self, samples, title="Track"):
+        with mock.patch.object(transcoding, "ffmpeg_available", return_value=True), \
+                mock.patch.object(waveforms, "decode_pcm", return_value=samples) as decode, \
+                self.captureOnCommitCallbacks(execute=True):
+            content = Content.objects.create(
+                title=title,
+                artist=self.artist,
+                file=sample_upload_file("track.mp3", "audio/mpeg"),
+                is_approved=True,
+            )
+        content.refresh_from_db()
+        return content, decode
+
+    def test_peaks_round_trip_through_the_sidecar(self):
+        samples = self.tone()
+        levels = waveforms.compute_peaks(samples)
+        decoded = waveforms.decode_peaks(waveforms.encode_peaks(levels, 2000))
+
+        self.assertEqual(decoded["duration_ms"], 2000)
+        self.assertEqual([len(mins) for mins, _maxs in decoded["levels"]], list(waveforms.PEAK_LEVELS))
+        for (mins, maxs), (expected_mins, expected_maxs) in zip(decoded["levels"], levels):
+            np.testing.assert_array_equal(mins, expected_mins)
+            np.testing.assert_array_equal(maxs, expected_maxs)
+        coarsest_mins, coarsest_maxs = decoded["levels"][-1]
+        self.assertTrue((coarsest_mins <= coarsest_maxs).all())
+        self.assertGreater(coarsest_maxs[-1], coarsest_maxs[0])
+        self.assertEqual(len(waveforms.compute_peaks(np.zeros(0, dtype=np.int16))[0][0]), waveforms.PEAK_LEVELS[0])
+
+    def test_audio_upload_serves_peaks_and_reuses_them_for_identical_files(self):
+        content, _decode = self.upload_track(self.tone())
+
+        self.assertTrue(content.waveform_peaks.startswith("waveforms/"))
+        response = self.client.get(content.waveform_url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b"".join(response.streaming_content)[:4], waveforms.MAGIC)
+        html = render_to_string("partials/media_display.html", {"content": content})
+        self.assertIn(f'data-waveform-url="{content.waveform_url}"', html)
+
+        duplicate, decode = self.upload_track(self.tone(), title="Same track")
+        decode.assert_not_called()
+        self.assertEqual(duplicate.waveform_peaks, content.waveform_peaks)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            duplicate.delete()
+        self.assertTrue(default_storage.exists(content.waveform_peaks))
+
+    def test_video_uploads_get_no_waveform(self):
+        with mock.patch.object(waveforms, "decode_pcm") as decode, self.captureOnCommitCallbacks(execute=True):
+            content = Content.objects.create(title="Clip", artist=self.artist, file=sample_upload_file())
+        decode.assert_not_called()
+        self.assertIsNone(content.waveform_url)
+
+
+class VideoPreviewTest(TemporaryMediaRootMixin, TestCase):
+    def setUp(self):
+        self.artist = CustomUser.objects.create_user(
+            username="preview_artist",
+            password="password",
+            role=Role.ARTIST,
+        )
+
+    @staticmethod
+    def fake_frame(source_path, *args):
+        with open(args[-1], "wb") as handle:
+            handle.write(b"jpeg-" + str(len(args)).encode())
+
+    def upload_video(self, title="Preview Clip"):
+        with mock.patch.object(transcoding, "ffmpeg_available", return_value=True), \
+                mock.patch.object(transcoding, "schedule_transcode"), \
+                mock.patch.object(previews, "probe_duration", return_value=95.0), \
+                mock.patch.object(previews, "render_poster", side_effect=self.fake_frame) as poster, \
+                mock.patch.object(previews, "render_sprite", side_effect=self.fake_frame), \
+                self.captureOnCommitCallbacks(execute=True):
+            content = Content.objects.create(
+                title=title,
+                artist=self.artist,
+                file=sample_upload_file(filename="preview.mp4"),
+                is_approved=True,
+            )
+        content.refresh_from_db()
+        return content, poster
+
+    def test_vtt_maps_each_interval_to_its_sprite_tile(self):
+        interval, frames = previews.plan_sprite(95.0)
+        self.assertEqual((interval, frames), (2, 48))
+        self.assertEqual(previews.plan_sprite(3600.0), (36, 100))
+
+        vtt = previews.build_vtt("sprite.jpg", 95.0, interval, frames)
+        self.assertTrue(vtt.startswith("WEBVTT\n"))
+        self.assertIn("00:00:20.000 --> 00:00:22.000\nsprite.jpg#xywh=0,90,160,90", vtt)
+        self.assertIn("00:01:34.000 --> 00:01:35.000\nsprite.jpg#xywh=1120,360,160,90", vtt)
+
+    def test_video_card_uses_poster_and_serves_sprite_index(self):
+        content, _poster = self.upload_video()
+
+        self.assertEqual(set(content.video_previews), {"source", "interval", "poster", "sprite", "vtt"})
+        html = render_to_string("partials/media_display.html", {"content": content})
+        self.assertIn(f'poster="{content.video_poster_url}"', html)
+        self.assertIn('preload="none"', html)
+        self.assertIn(f'data-preview-vtt="{content.preview_vtt_url}"', html)
+
+        response = self.client.get(content.preview_vtt_url)
+        self.assertEqual(response["Content-Type"], "text/vtt")
+        sprite = posixpath.basename(content.video_previews["sprite"])
+        self.assertIn(f"{sprite}#xywh=0,0,160,90".encode(), b"".join(response.streaming_content))
+        poster = self.client.get(content.video_poster_url)
+        self.assertEqual(poster["Content-Type"], "image/jpeg")
+        self.assertEqual(self.client.get(reverse("content_preview", args=[content.pk, "other.jpg"])).status_code, 404)
+
+    def test_identical_upload_reuses_previews_and_keeps_them_on_delete(self):
+        content, _poster = self.upload_video()
+        duplicate, poster = self.upload_video(title="Same clip")
+
+        poster.assert_not_called()
+        self.assertEqual(duplicate.video_previews, content.video_previews)
+        with self.captureOnCommitCallbacks(execute=True):
+            duplicate.delete()
+        self.assertTrue(default_storage.exists(content.video_previews["sprite"]))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            content.file = None
+            content.save()
+        self.assertEqual(content.video_previews, {})
+        self.assertFalse(default_storage.exists(duplicate.video_previews["sprite"]))
+
+
+class QueuedVoteIngestionTest(TestCase):
+    # (content index, rank, otp code): covers repeats, the ceiling rule,
+    # re-voting one item, a wrong code and running out of OTP votes.
+    SCRIPT = [
+        (0, 8, "123456"),
+        (1, 8, "123456"),
+        (1, 9, "123456"),
+        (1, 6, "654321"),
+        (1, 6, "123456"),
+        (0, 4, "123456"),
+        (2, 3, "123456"),
+        (3, 2, "123456"),
+    ]
+
+    def setUp(self):
+        cache.clear()
+        self.artist = CustomUser.objects.create_user(
+            username="queue_artist",
+            password="password",
+            role=Role.ARTIST,
+        )
+        self.genre = Genre.objects.create(name="Queued Genre")
+        self.contents = [
+            Content.objects.create(
+                title=f"Queued {index}",
+                artist=self.artist,
+                genre=self.genre,
+                is_approved=True,
+                is_approved_for_voting=True,
+            )
+            for index in range(4)
+        ]
+
+    def make_fan(self, username):
+        fan = CustomUser.objects.create_user(username=username, password="password", role=Role.FAN)
+        OTP.objects.create(user=fan, otp_code="123456", remaining_votes=4, is_active=True)
+        self.client.login(username=username, password="password")
+        return fan
+
+    def post_vote(self, index, rank, otp_code):
+        return self.client.post(
+            reverse("vote_content", args=[self.contents[index].id]),
+            data=json.dumps({"vote_value": rank, "otp_code": otp_code, "voter_tag": "script"}),
+            content_type="application/json",
+        ).json()
+
+    def final_state(self, fan):
+        votes = sorted(
+            Vote.objects.filter(fan=fan).values_list("content__title", "base_value", "value", "otp_code")
+        )
+        return votes, OTP.objects.get(user=fan).remaining_votes
+
+    def test_queued_votes_end_up_like_synchronous_ones(self):
+        sync_fan = self.make_fan("sync_fan")
+        sync_outcomes = [self.post_vote(*step)["message"] for step in self.SCRIPT]
+
+        queued_fan = self.make_fan("queued_fan")
+        with override_settings(VOTE_INGESTION_MODE="queued"):
+            acks = [self.post_vote(*step) for step in self.SCRIPT]
+        self.assertFalse(PendingVote.objects.exclude(status=PendingVote.STATUS_PENDING).exists())
+        self.assertTrue(all(ack.get("provisional") for ack in acks if ack["status"] == "success"))
+
+        self.assertEqual(vote_queue.apply_pending_votes(batch_size=2), (4, 0))
+        queued_outcomes = [
+            self.client.get(ack["status_url"]).json()["message"] if ack["status"] == "success" else ack["message"]
+            for ack in acks
+        ]
+
+        self.assertEqual(queued_outcomes, sync_outcomes)
+        self.assertEqual(sync_outcomes.count("Invalid/expired OTP"), 2)
+        self.assertIn("Rank 8 already used in this genre", sync_outcomes)
+        self.assertEqual(self.final_state(queued_fan), self.final_state(sync_fan))
+
+    @override_settings(VOTE_INGESTION_MODE="queued")
+    def test_worker_rejects_votes_the_hot_state_let_through(self):
+        fan = self.make_fan("late_fan")
+        ack = self.post_vote(0, 5, "123456")
+        # An admin cancels the OTP after the vote was accepted.
+        OTP.objects.filter(user=fan).update(is_active=False)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(vote_queue.apply_pending_votes(), (0, 1))
+
+        status = self.client.get(ack["status_url"]).json()
+        self.assertEqual(status, {"status": "rejected", "message": "Invalid/expired OTP"})
+        self.assertFalse(Vote.objects.filter(fan=fan).exists())
+        # The reservation is dropped, so rank 5 is free again.
+        self.assertIsNone(cache.get(vote_queue.RANKS_KEY.format(fan_id=fan.pk, genre_id=self.genre.pk)))
+
+
+class RankLedgerTest(TestCase):
+    def setUp(self):
+        self.artist = CustomUser.objects.create_user(username="ledger_artist", password="password", role=Role.ARTIST)
+        self.fan = CustomUser.objects.create_user(username="ledger_fan", password="password", role=Role.FAN)
+        self.genre = Genre.objects.create(name="Ledger Genre")
+        self.contents = [
+            Content.objects.create(
+                title=f"Ledger {index}",
+                artist=self.artist,
+                genre=self.genre,
+                is_approved=True,
+                is_approved_for_voting=True,
+            )
+            for index in range(4)
+        ]
+
+    def vote(self, index, rank, at=None):
+        return voting.cast_vote(self.fan, self.contents[index], rank, "", "ledger", tokens_paused=True, at=at)
+
+    def ledger(self):
+        return RankLedger.objects.get(fan=self.fan, genre_key=self.genre.pk)
+
+    def test_ledger_follows_votes_and_matches_a_rebuild(self):
+        self.vote(0, 8)
+        self.vote(1, 5)
+        with self.assertRaisesMessage(voting.VoteRejected, "Rank 5 already used in this genre"):
+            self.vote(2, 5)
+        with self.assertRaisesMessage(voting.VoteRejected, "You must rank lower than or equal to 8"):
+            self.vote(2, 9)
+        # Re-voting replaces rank 8 on the first item.
+        self.vote(0, 3)
+
+        ledger = self.ledger()
+        self.assertEqual((ledger.used_mask, ledger.ceiling), ((1 << 2) | (1 << 4), 5))
+        with self.assertNumQueries(1):
+            ledger_check = RankLedger.objects.filter(fan=self.fan, genre_key=self.genre.pk).first()
+        self.assertEqual(rank_ledger.rank_error(ledger_check, 8), "You must rank lower than or equal to 5")
+
+        out = StringIO()
+        call_command("rebuild_rank_ledger", stdout=out)
+        self.assertIn("Rebuilt 1 rank ledger row(s).", out.getvalue())
+        rebuilt = self.ledger()
+        self.assertEqual(
+            (rebuilt.used_mask, rebuilt.ceiling, rebuilt.expires_at),
+            (ledger.used_mask, ledger.ceiling, ledger.expires_at),
+        )
+
+    def test_votes_leaving_the_window_free_their_ranks(self):
+        yesterday = timezone.now() - timedelta(hours=23)
+        self.vote(0, 2, at=yesterday)
+        self.assertEqual(self.ledger().expires_at, yesterday + rank_ledger.VOTE_WINDOW)
+        with self.assertRaisesMessage(voting.VoteRejected, "You must rank lower than or equal to 2"):
+            self.vote(1, 7)
+
+        # Two hours later the first vote has left the window.
+        Vote.objects.filter(fan=self.fan).update(timestamp=yesterday - timedelta(hours=2))
+        RankLedger.objects.filter(fan=self.fan).update(expires_at=timezone.now() - timedelta(hours=1))
+        self.vote(1, 7)
+        self.assertEqual(self.ledger().used_mask, 1 << 6)
+
+    def test_vote_changes_outside_cast_vote_drop_the_row(self):
+        self.vote(0, 4)
+        Vote.objects.get(fan=self.fan, content=self.contents[0]).delete()
+        self.assertFalse(RankLedger.objects.filter(fan=self.fan).exists())
+        self.vote(1, 10)
+
+        other_genre = Genre.objects.create(name="Other Ledger Genre")
+        self.contents[1].genre = other_genre
+        self.contents[1].save()
+        self.assertFalse(RankLedger.objects.filter(fan=self.fan).exists())
+        self.vote(2, 10)
+
+    def test_missing_row_is_created_locked_and_rebuilt_from_votes(self):
+        self.vote(0, 6)
+        RankLedger.objects.filter(fan=self.fan).delete()
+
+        with transaction.atomic():
+            ledger = rank_ledger.locked_ledger(self.fan.pk, self.genre.pk, timezone.now())
+
+        self.assertEqual((ledger.used_mask, ledger.ceiling), (1 << 5, 6))
+        self.assertEqual(RankLedger.objects.filter(fan=self.fan).count(), 1)
+        self.assertEqual(self.ledger().used_mask, 1 << 5)
+
+
+class ContentLiveUpdatesTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.artist = CustomUser.objects.create_user(username="live_updates_artist", password="password", role=Role.ARTIST)
+        self.fan = CustomUser.objects.create_user(username="live_updates_fan", password="password", role=Role.FAN)
+        self.content = Content.objects.create(
+            title="Live Updates",
+            artist=self.artist,
+            is_approved=True,
+            is_approved_for_voting=True,
+        )
+
+    def test_a_burst_of_changes_becomes_one_broadcast_per_tick(self):
+        with mock.patch.object(live_updates, "_schedule") as schedule:
+            with self.captureOnCommitCallbacks(execute=True):
+                increment_counters(self.content.pk, vote_count=1, vote_sum=4)
+            schedule.assert_not_called()  # nobody is watching
+
+            cache.set(live_updates.WATCHERS_KEY.format(content_id=self.content.pk), 1)
+            cache.set(live_updates.COMMENT_CURSOR_KEY.format(content_id=self.content.pk), 0)
+            with self.captureOnCommitCallbacks(execute=True):
+                for _ in range(5):
+                    increment_counters(self.content.pk, vote_count=1, vote_sum=8)
+                Comment.objects.create(content=self.content, user=self.fan, text="Loud!")
+                increment_counters(self.content.pk, comment_count=1)
+            schedule.assert_called_once_with(self.content.pk)
+
+            layer = mock.Mock(group_send=mock.AsyncMock())
+            with mock.patch.object(live_updates, "get_channel_layer", return_value=layer):
+                live_updates.broadcast(self.content.pk)
+            group, message = layer.group_send.await_args.args
+            self.assertEqual(group, live_updates.group_name(self.content.pk))
+            update = message["update"]
+            self.assertEqual((update["votes"], update["average_vote"], update["comment_count"]), (6, 7.3, 1))
+            self.assertEqual([comment["text"] for comment in update["comments"]], ["Loud!"])
+
+            # The broadcast released the tick; the next change starts a new one.
+            with self.captureOnCommitCallbacks(execute=True):
+                increment_counters(self.content.pk, view_count=1)
+            self.assertEqual(schedule.call_count, 2)
+
+    @override_settings(CONTENT_UPDATES_TICK_MS=250)
+    def test_ticks_are_queued_as_celery_countdowns(self):
+        cache.set(live_updates.WATCHERS_KEY.format(content_id=self.content.pk), 1)
+        tick_key = live_updates.TICK_KEY.format(content_id=self.content.pk)
+
+        with mock.patch.object(tasks.broadcast_content_update, "apply_async") as apply_async:
+            with self.captureOnCommitCallbacks(execute=True):
+                increment_counters(self.content.pk, vote_count=1, vote_sum=5)
+        apply_async.assert_called_once_with(args=[self.content.pk], countdown=0.25)
+        self.assertIsNotNone(cache.get(tick_key))
+
+        # Eagerly (no broker) the broadcast runs at once and frees the tick,
+        # so a one-shot process leaves nothing claimed behind it.
+        cache.delete(tick_key)
+        layer = mock.Mock(group_send=mock.AsyncMock())
+        with mock.patch.object(live_updates, "get_channel_layer", return_value=layer):
+            with self.captureOnCommitCallbacks(execute=True):
+                increment_counters(self.content.pk, vote_count=1, vote_sum=5)
+        layer.group_send.assert_awaited_once()
+        self.assertIsNone(cache.get(tick_key))
+
+    async def test_socket_receives_updates_and_respects_visibility(self):
+        communicator = WebsocketCommunicator(URLRouter(websocket_urlpatterns), f"/ws/content/{self.content.id}/")
+        communicator.scope["user"] = self.fan
+        connected, _ = await communicator.connect()
+        self.assertTrue(connected)
+
+        await database_sync_to_async(Comment.objects.create)(content=self.content, user=self.fan, text="Hi")
+        await database_sync_to_async(live_updates.broadcast)(self.content.id)
+        update = await communicator.receive_json_from()
+        self.assertEqual(update["content_id"], self.content.id)
+        self.assertEqual(update["watching"], 1)
+        self.assertEqual([comment["text"] for comment in update["comments"]], ["Hi"])
+        await communicator.disconnect()
+        self.assertEqual(await database_sync_to_async(live_updates.watcher_count)(self.content.id), 0)
+
+        hidden = await database_sync_to_async(Content.objects.create)(title="Hidden", artist=self.artist)
+        outsider = WebsocketCommunicator(URLRouter(websocket_urlpatterns), f"/ws/content/{hidden.id}/")
+        outsider.scope["user"] = self.fan
+        connected, code = await outsider.connect()
+        self.assertFalse(connected)
+        self.assertEqual(code, 4403)
+
+
+class VoteBenchmarkCommandTest(TestCase):
+    def test_benchmark_reports_json_and_removes_its_contest(self):
+        with tempfile.TemporaryDirectory() as directory:
+            output = os.path.join(directory, "votes.json")
+            out = StringIO()
+            call_command(
+                "benchmark_votes",
+                fans=3,
+                contents=4,
+                genres=2,
+                votes_per_fan=3,
+                concurrency=1,
+                label="ci",
+                output=output,
+                stdout=out,
+            )
+            with open(output, encoding="utf-8") as handle:
+                report = json.load(handle)
+
+        self.assertIn("9 vote(s)", out.getvalue())
+        self.assertEqual(report["label"], "ci")
+        self.assertEqual(report["requests"], 9)
+        self.assertEqual(report["outcomes"], {"accepted": 9, "rejected": 0, "error": 0})
+        self.assertEqual(report["error_rate"], 0)
+        self.assertGreater(report["queries_per_request"]["mean"], 0)
+        self.assertLessEqual(report["latency_ms"]["p50"], report["latency_ms"]["p99"])
+        self.assertFalse(CustomUser.objects.filter(username__startswith="bench-").exists())
+        self.assertFalse(Genre.objects.filter(name__startswith="bench-").exists())
+
+
 class LiveStreamVoucherFlowTest(TestCase):
     def setUp(self):
         self.artist = CustomUser.objects.create_user(
@@ -0,0 +1,182 @@
+"""
+Responsive thumbnail renditions.
+
+Content.save() only stores the uploaded image. `generate_renditions` runs in
+the background (content.tasks, eager when no celery broker is configured),
+crops the upload to 16:9 once and writes JPEG and WebP copies at each
+THUMBNAIL_RENDITION_WIDTHS width. The storage names are kept on
+Content.thumbnail_renditions, which templates turn into `srcset` lists.
+"""
+import logging
+import math
+import posixpath
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from PIL import Image, UnidentifiedImageError
+
+from .models import Content, _get_resample_filter
+
+
+logger = logging.getLogger(__name__)
+
+THUMBNAIL_ASPECT = 16 / 9
+RENDITION_FORMATS = {
+    "jpeg": ("JPEG", "jpg", {"quality": 85, "optimize": True, "progressive": True}),
+    "webp": ("WEBP", "webp", {"quality": 80, "method": 4}),
+}
+
+
+def rendition_widths():
+    return sorted({int(width) for width in getattr(settings, "THUMBNAIL_RENDITION_WIDTHS", (320, 640, 1280))})
+
+
+def _crop_box(width, height):
+    if width / height > THUMBNAIL_ASPECT:
+        crop_width = max(1, round(height * THUMBNAIL_ASPECT))
+        left = (width - crop_width) // 2
+        return (left, 0, left + crop_width, height)
+    crop_height = max(1, round(width / THUMBNAIL_ASPECT))
+    top = (height - crop_height) // 2
+    return (0, top, width, top + crop_height)
+
+
+def _load_source(file, largest_width):
+    """
+    Open the upload and return it cropped to 16:9 in RGB. JPEGs are decoded
+    with `Image.draft` at the smallest DCT scale that still covers the
+    largest rendition, which skips most of the decode work on big photos.
+    """
+    image = Image.open(file)
+    if image.format == "JPEG":
+        left, top, right, bottom = _crop_box(*image.size)
+        factor = min(1.0, largest_width / (right - left))
+        image.draft("RGB", (math.ceil(image.width * factor), math.ceil(image.height * factor)))
+    image = image.crop(_crop_box(*image.size))
+    if image.mode != "RGB":
+        image = image.convert("RGB")
+    return image
+
+
+def _render(source, widths):
+    """
+    Yield (width, image) from largest to smallest, each downscaled from the
+    previous step. Sources narrower than the smallest width still get one
+    rendition so every item has a srcset.
+    """
+    targets = [width for width in widths if width <= source.width] or widths[:1]
+    current = source
+    for width in sorted(targets, reverse=True):
+        size = (width, max(1, round(width / THUMBNAIL_ASPECT)))
+        current = current.resize(size, _get_resample_filter()) if current.size != size else current
+        yield width, current
+
+
+def _encode(image, fmt):
+    pil_format, _extension, options = RENDITION_FORMATS[fmt]
+    output = BytesIO()
+    image.save(output, format=pil_format, **options)
+    return output.getvalue()
+
+
+def _shared(renditions):
+    source_name = (renditions or {}).get("source")
+    if not source_name:
+        return False
+    held = Content.objects.filter(thumbnail=source_name).values_list("thumbnail_renditions", flat=True)
+    return any(other == renditions for other in held)
+
+
+def reuse_renditions(content):
+    """
+    Give `content` the renditions already built for the same thumbnail blob
+    by another item. Returns False when there are none yet.
+    """
+    source_name = content.thumbnail.name
+    candidates = (
+        Content.objects.filter(thumbnail=source_name)
+        .exclude(pk=content.pk)
+        .values_list("thumbnail_renditions", flat=True)
+    )
+    renditions = next((other for other in candidates if other.get("source") == source_name), None)
+    if renditions is None:
+        return False
+    content.thumbnail_renditions = renditions
+    Content.objects.filter(pk=content.pk, thumbnail=source_name).update(thumbnail_renditions=renditions)
+    return True
+
+
+def delete_renditions(renditions):
+    if _shared(renditions):
+        return  # another item with the same thumbnail blob still uses them
+    for fmt in RENDITION_FORMATS:
+        for name in (renditions or {}).get(fmt, {}).values():
+            try:
+                default_storage.delete(name)
+            except OSError:
+                logger.warning("Could not delete thumbnail rendition %s.", name, exc_info=True)
+
+
+def generate_renditions(content_id):
+    """
+    Build and store every rendition for one content item. Returns the new
+    renditions mapping, or None when the item or its thumbnail is gone or
+    the upload is not a readable image.
+    """
+    content = Content.objects.filter(pk=content_id).only("id", "thumbnail", "thumbnail_renditions").first()
+    if content is None or not content.thumbnail:
+        return None
+
+    source_name = content.thumbnail.name
+    widths = rendition_widths()
+    try:
+        with content.thumbnail.open("rb") as file:
+            source = _load_source(file, widths[-1])
+    except (UnidentifiedImageError, FileNotFoundError):
+        logger.warning("Thumbnail for content %s is not a readable image.", content_id, exc_info=True)
+        return None
+
+    stem = posixpath.splitext(posixpath.basename(source_name))[0]
+    directory = f"thumbnails/renditions/{content.pk}"
+    renditions = {"source": source_name, **{fmt: {} for fmt in RENDITION_FORMATS}}
+    for width, image in _render(source, widths):
+        for fmt, (_pil_format, extension, _options) in RENDITION_FORMATS.items():
+            name = default_storage.save(
+                f"{directory}/{stem}-{width}.{extension}",
+                ContentFile(_encode(image, fmt)),
+            )
+            renditions[fmt][str(width)] = name
+
+    # Only publish if the thumbnail was not replaced while we were working.
+    with transaction.atomic():
+        updated = Content.objects.filter(pk=content.pk, thumbnail=source_name).update(
+            thumbnail_renditions=renditions
+        )
+    if not updated:
+        delete_renditions(renditions)
+        return None
+
+    delete_renditions(content.thumbnail_renditions)
+
+    from .feed import bump_feed_version
+
+    bump_feed_version()
+    return renditions
+
+
+def schedule_renditions(content_id):
+    """
+    Queue rendition generation once the surrounding transaction commits.
+    """
+    from .tasks import generate_thumbnail_renditions
+
+    def enqueue():
+        try:
+            generate_thumbnail_renditions.delay(content_id)
+        except Exception:
+            logger.exception("Could not generate thumbnail renditions for content %s.", content_id)
+
+    transaction.on_commit(enqueue)
@@ -0,0 +1,253 @@
+"""
+HLS adaptive-bitrate ladder for uploaded video.
+
+Saving a Content with a new video file queues `transcode_to_hls` (see
+content.tasks). It probes the upload and encodes every HLS_LADDER rung no
+taller than the source in a single ffmpeg run, then writes a master
+playlist. The result is copied into storage under hls/<content id>/<token>/
+and recorded on Content.hls_* once complete. Players fall back to the
+original file until hls_status is "ready".
+"""
+import logging
+import os
+import posixpath
+import shutil
+import tempfile
+import uuid
+from collections import namedtuple
+
+import ffmpeg
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import transaction
+
+from .models import Content
+
+
+logger = logging.getLogger(__name__)
+
+Rung = namedtuple("Rung", "name height video_bitrate audio_bitrate")
+
+HLS_LADDER = (
+    Rung("240p", 240, 400_000, 64_000),
+    Rung("480p", 480, 1_000_000, 96_000),
+    Rung("720p", 720, 2_500_000, 128_000),
+)
+SEGMENT_SECONDS = 6
+KEYFRAME_INTERVAL = 48  # frames; keeps segment boundaries aligned across rungs
+MASTER_PLAYLIST = "master.m3u8"
+VARIANT_PLAYLIST = "index.m3u8"
+
+
+def ffmpeg_available():
+    return shutil.which("ffmpeg") is not None and shutil.which("ffprobe") is not None
+
+
+def probe_video(path):
+    """
+    Return {"width", "height", "has_audio"} for the first video stream.
+    """
+    info = ffmpeg.probe(path)
+    video = next((stream for stream in info["streams"] if stream.get("codec_type") == "video"), None)
+    if video is None:
+        raise ValueError("No video stream found.")
+    return {
+        "width": int(video["width"]),
+        "height": int(video["height"]),
+        "has_audio": any(stream.get("codec_type") == "audio" for stream in info["streams"]),
+    }
+
+
+def plan_ladder(width, height):
+    """
+    [(rung, output_width)] for every rung that does not upscale the source;
+    sources shorter than the lowest rung still get that one.
+    """
+    rungs = [rung for rung in HLS_LADDER if rung.height <= height] or [HLS_LADDER[0]]
+    # libx264 needs even dimensions.
+    return [(rung, max(2, round(width * rung.height / height / 2) * 2)) for rung in rungs]
+
+
+def run_ladder(source_path, output_dir, plan, has_audio):
+    """
+    Encode every planned rung in one ffmpeg process (decode once, split).
+    """
+    source = ffmpeg.input(source_path)
+    videos = source.video.filter_multi_output("split", len(plan))
+    outputs = []
+    for index, (rung, width) in enumerate(plan):
+        rung_dir = os.path.join(output_dir, rung.name)
+        os.makedirs(rung_dir, exist_ok=True)
+        streams = [videos.stream(index).filter("scale", width, rung.height)]
+        options = {
+            "c:v": "libx264",
+            "preset": "veryfast",
+            "profile:v": "main",
+            "b:v": rung.video_bitrate,
+            "maxrate": int(rung.video_bitrate * 1.07),
+            "bufsize": rung.video_bitrate * 2,
+            "g": KEYFRAME_INTERVAL,
+            "keyint_min": KEYFRAME_INTERVAL,
+            "sc_threshold": 0,
+            "f": "hls",
+            "hls_time": SEGMENT_SECONDS,
+            "hls_playlist_type": "vod",
+            "hls_segment_filename": os.path.join(rung_dir, "segment_%05d.ts"),
+        }
+        if has_audio:
+            streams.append(source.audio)
+            options.update({"c:a": "aac", "b:a": rung.audio_bitrate, "ac": 2})
+        outputs.append(ffmpeg.output(*streams, os.path.join(rung_dir, VARIANT_PLAYLIST), **options))
+    ffmpeg.merge_outputs(*outputs).overwrite_output().run(capture_stdout=True, capture_stderr=True)
+
+
+def master_playlist(plan, has_audio):
+    codecs = "avc1.4d401f,mp4a.40.2" if has_audio else "avc1.4d401f"
+    lines = ["#EXTM3U", "#EXT-X-VERSION:3"]
+    for rung, width in plan:
+        bandwidth = rung.video_bitrate + (rung.audio_bitrate if has_audio else 0)
+        lines.append(f'#EXT-X-STREAM-INF:BANDWIDTH={bandwidth},RESOLUTION={width}x{rung.height},CODECS="{codecs}"')
+        lines.append(f"{rung.name}/{VARIANT_PLAYLIST}")
+    return "\n".join(lines) + "\n"
+
+
+def delete_hls_tree(directory, storage=default_storage):
+    if not directory:
+        return
+    try:
+        folders, files = storage.listdir(directory)
+    except (FileNotFoundError, NotImplementedError):
+        return
+    for name in files:
+        storage.delete(posixpath.join(directory, name))
+    for folder in folders:
+        delete_hls_tree(posixpath.join(directory, folder), storage)
+
+
+def release_hls_tree(directory):
+    """
+    Delete an HLS tree unless another item still plays from it.
+    """
+    if directory and not Content.objects.filter(hls_playlist__startswith=f"{directory}/").exists():
+        delete_hls_tree(directory)
+
+
+def reuse_ladder(content):
+    """
+    Point `content` at a ready ladder built for the same file blob by
+    another item. Returns False when there is none.
+    """
+    sibling = (
+        Content.objects.filter(file=content.file.name, hls_status=Content.HLS_READY)
+        .exclude(pk=content.pk)
+        .values("hls_playlist", "hls_renditions")
+        .first()
+    )
+    if sibling is None:
+        return False
+    content.hls_status = Content.HLS_READY
+    content.hls_playlist = sibling["hls_playlist"]
+    content.hls_renditions = sibling["hls_renditions"]
+    Content.objects.filter(pk=content.pk, file=content.file.name).update(
+        hls_status=content.hls_status,
+        hls_playlist=content.hls_playlist,
+        hls_renditions=content.hls_renditions,
+    )
+    return True
+
+
+def _copy_to_storage(local_dir, directory):
+    for root, _dirs, files in os.walk(local_dir):
+        for filename in sorted(files):
+            local_path = os.path.join(root, filename)
+            relative = os.path.relpath(local_path, local_dir).replace(os.sep, "/")
+            with open(local_path, "rb") as handle:
+                default_storage.save(posixpath.join(directory, relative), File(handle))
+
+
+def _local_source(field_file, workdir):
+    try:
+        return field_file.path
+    except NotImplementedError:
+        # Remote storage: ffmpeg needs a seekable local copy.
+        local_path = os.path.join(workdir, "source" + posixpath.splitext(field_file.name)[1])
+        with field_file.open("rb") as source, open(local_path, "wb") as target:
+            shutil.copyfileobj(source, target)
+        return local_path
+
+
+def transcode_to_hls(content_id):
+    """
+    Build and publish the HLS ladder for one content item. Returns the
+    rendition list, or None when the item is gone, is not a video, or
+    ffmpeg fails (hls_status is then "failed").
+    """
+    content = Content.objects.filter(pk=content_id).first()
+    if content is None or not content.file or not content.is_video_file:
+        return None
+    if content.hls_status != Content.HLS_READY and reuse_ladder(content):
+        return content.hls_renditions  # same blob was transcoded for another item
+
+    source_name = content.file.name
+    Content.objects.filter(pk=content.pk, file=source_name).update(hls_status=Content.HLS_PROCESSING)
+    directory = f"hls/{content.pk}/{uuid.uuid4().hex[:12]}"
+
+    with tempfile.TemporaryDirectory(prefix="hls-") as workdir:
+        output_dir = os.path.join(workdir, "out")
+        try:
+            source_path = _local_source(content.file, workdir)
+            info = probe_video(source_path)
+            plan = plan_ladder(info["width"], info["height"])
+            run_ladder(source_path, output_dir, plan, info["has_audio"])
+        except (ffmpeg.Error, OSError, ValueError, KeyError) as exc:
+            stderr = getattr(exc, "stderr", b"") or b""
+            logger.warning(
+                "HLS transcoding failed for content %s: %s", content_id, stderr.decode(errors="replace")[-2000:] or exc
+            )
+            Content.objects.filter(pk=content.pk, file=source_name).update(hls_status=Content.HLS_FAILED)
+            return None
+
+        with open(os.path.join(output_dir, MASTER_PLAYLIST), "w", encoding="utf-8") as handle:
+            handle.write(master_playlist(plan, info["has_audio"]))
+        _copy_to_storage(output_dir, directory)
+
+    renditions = [
+        {
+            "name": rung.name,
+            "width": width,
+            "height": rung.height,
+            "bandwidth": rung.video_bitrate + (rung.audio_bitrate if info["has_audio"] else 0),
+            "playlist": f"{rung.name}/{VARIANT_PLAYLIST}",
+        }
+        for rung, width in plan
+    ]
+    previous_directory = posixpath.dirname(content.hls_playlist) if content.hls_playlist else ""
+
+    # Publish only if the file was not replaced while ffmpeg was running.
+    with transaction.atomic():
+        updated = Content.objects.filter(pk=content.pk, file=source_name).update(
+            hls_status=Content.HLS_READY,
+            hls_playlist=posixpath.join(directory, MASTER_PLAYLIST),
+            hls_renditions=renditions,
+        )
+    if not updated:
+        delete_hls_tree(directory)
+        return None
+    if previous_directory and previous_directory != directory:
+        release_hls_tree(previous_directory)
+    return renditions
+
+
+def schedule_transcode(content_id):
+    """
+    Queue HLS transcoding once the surrounding transaction commits.
+    """
+    from .tasks import transcode_content_hls
+
+    def enqueue():
+        try:
+            transcode_content_hls.delay(content_id)
+        except Exception:
+            logger.exception("Could not queue HLS transcoding for content %s.", content_id)
+
+    transaction.on_commit(enqueue)
@@ -0,0 +1,245 @@
+"""
+Resumable, tus-style uploads.
+
+An UploadSession is created with the file's length, type and the content
+metadata. Quota, size and type are checked before any bytes arrive. Each
+PATCH streams its body into a scratch file under UPLOAD_SESSION_DIR while
+a SHA-256 is fed incrementally, then appends it to the session's temp file
+under a short row lock that checks and advances the offset. When the
+offset reaches the length, the temp file is moved (not copied) into
+storage and attached to a new Content row.
+
+Hash state cannot be stored in the database, so each process keeps the
+running hasher per session. A chunk landing on another worker re-reads
+the bytes already on disk once and carries on from there.
+"""
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.db import transaction
+from django.utils import timezone
+from taggit.utils import parse_tags
+
+from .models import ArtistUploadLimit, Content, UploadSession
+
+
+CHUNK_READ_SIZE = 64 * 1024
+
+_hashers = {}
+_hashers_lock = threading.Lock()
+
+
+class UploadError(Exception):
+    status = 400
+
+
+class OffsetMismatch(UploadError):
+    status = 409
+
+
+class UploadTooLarge(UploadError):
+    status = 413
+
+
+class QuotaExceeded(UploadError):
+    status = 403
+
+
+class _AssembledUpload(File):
+    """
+    A finished temp file. FileSystemStorage moves anything exposing
+    temporary_file_path() into place instead of copying it, and the media
+    storage takes the digest from `sha256` rather than hashing it again.
+    """
+
+    def __init__(self, file, name, sha256):
+        super().__init__(file, name=name)
+        self.sha256 = sha256
+
+    def temporary_file_path(self):
+        return self.file.name
+
+
+def session_dir():
+    return str(getattr(settings, "UPLOAD_SESSION_DIR", settings.BASE_DIR / "upload_sessions"))
+
+
+def temp_path(session):
+    return os.path.join(session_dir(), f"{session.pk}.part")
+
+
+def has_upload_quota(artist):
+    upload_limit = ArtistUploadLimit.objects.filter(artist=artist).first()
+    return upload_limit is None or upload_limit.has_upload_quota()
+
+
+def consume_upload_quota(artist):
+    upload_limit = ArtistUploadLimit.objects.filter(artist=artist).first()
+    if upload_limit and not upload_limit.suspended_by_admin:
+        upload_limit.uploads_used += 1
+        upload_limit.save()
+
+
+def _hasher_for(session):
+    """
+    Running SHA-256 of the first `session.offset` bytes. Returns a copy, so
+    two requests racing for the same offset never feed one hasher.
+    """
+    with _hashers_lock:
+        cached = _hashers.get(session.pk)
+    if cached and cached[0] == session.offset:
+        return cached[1].copy()
+
+    hasher = hashlib.sha256()
+    remaining = session.offset
+    if remaining:
+        with open(temp_path(session), "rb") as handle:
+            while remaining:
+                block = handle.read(min(CHUNK_READ_SIZE, remaining))
+                if not block:
+                    break
+                hasher.update(block)
+                remaining -= len(block)
+    return hasher
+
+
+def _check_chunk(session, offset, length):
+    if session.is_complete:
+        raise OffsetMismatch("Upload is already complete.")
+    if offset != session.offset:
+        raise OffsetMismatch(f"Expected offset {session.offset}.")
+    if offset + length > session.length:
+        raise UploadTooLarge("Chunk extends past the declared upload length.")
+
+
+def _receive_chunk(session, stream, length):
+    """
+    Stream up to `length` bytes into a scratch file beside the part file,
+    continuing the session's hash. Returns (path, bytes written, hasher).
+    """
+    hasher = _hasher_for(session)
+    os.makedirs(session_dir(), exist_ok=True)
+    handle = tempfile.NamedTemporaryFile(
+        dir=session_dir(), prefix=f"{session.pk}.", suffix=".chunk", delete=False
+    )
+    written = 0
+    try:
+        with handle:
+            while written < length:
+                block = stream.read(min(CHUNK_READ_SIZE, length - written))
+                if not block:
+                    break  # client went away; keep what arrived
+                handle.write(block)
+                hasher.update(block)
+                written += len(block)
+    except BaseException:
+        os.remove(handle.name)
+        raise
+    return handle.name, written, hasher
+
+
+def append_chunk(session_id, artist, offset, stream, length):
+    """
+    Append up to `length` bytes from `stream` at `offset`. Returns the
+    updated session; completes it when the last byte arrives.
+
+    The body is read before any row lock is taken. The session row is then
+    locked only to re-check the offset, append the received bytes and
+    advance it; a chunk that lost a race for its offset is discarded.
+    """
+    session = UploadSession.objects.get(pk=session_id, artist=artist)
+    _check_chunk(session, offset, length)
+    chunk_path, written, hasher = _receive_chunk(session, stream, length)
+
+    try:
+        with transaction.atomic():
+            session = UploadSession.objects.select_for_update().get(pk=session_id, artist=artist)
+            _check_chunk(session, offset, length)
+            with open(temp_path(session), "ab") as handle, open(chunk_path, "rb") as chunk:
+                # Drop bytes from a chunk that failed before its offset was saved.
+                handle.truncate(session.offset)
+                shutil.copyfileobj(chunk, handle, CHUNK_READ_SIZE)
+
+            session.offset += written
+            with _hashers_lock:
+                _hashers[session.pk] = (session.offset, hasher)
+            if session.offset == session.length:
+                session.sha256 = hasher.hexdigest()
+                session.save(update_fields=["offset", "sha256", "updated_at"])
+                complete_session(session)
+            else:
+                session.save(update_fields=["offset", "updated_at"])
+    finally:
+        os.remove(chunk_path)
+    return session
+
+
+def complete_session(session):
+    """
+    Move the assembled file into storage and create the Content row.
+    """
+    if not has_upload_quota(session.artist):
+        raise QuotaExceeded("You have reached your upload limit. Contact admin for assistance.")
+
+    content = Content(
+        title=session.title,
+        description=session.description,
+        genre=session.genre,
+        artist=session.artist,
+        is_approved=False,  # Needs admin approval
+        is_visible=True,
+    )
+    with open(temp_path(session), "rb") as handle:
+        content.file = _AssembledUpload(handle, name=session.filename, sha256=session.sha256)
+        if session.thumbnail:
+            with session.thumbnail.open("rb") as thumbnail:
+                content.thumbnail = File(thumbnail, name=os.path.basename(session.thumbnail.name))
+                content.save()
+        else:
+            content.save()
+    if session.tags:
+        content.tags.set(parse_tags(session.tags))
+    consume_upload_quota(session.artist)
+
+    session.content = content
+    session.completed_at = timezone.now()
+    session.save(update_fields=["content", "completed_at", "updated_at"])
+    transaction.on_commit(lambda: discard_session_files(session, keep_temp=False))
+    return content
+
+
+def discard_session_files(session, keep_temp=False):
+    with _hashers_lock:
+        _hashers.pop(session.pk, None)
+    if not keep_temp:
+        try:
+            os.remove(temp_path(session))
+        except FileNotFoundError:
+            pass
+    if session.thumbnail:
+        session.thumbnail.delete(save=False)
+
+
+def terminate_session(session):
+    discard_session_files(session)
+    session.delete()
+
+
+def purge_stale_sessions(max_age_hours=None):
+    """
+    Delete unfinished sessions idle for longer than UPLOAD_SESSION_TTL_HOURS.
+    Returns the number removed.
+    """
+    hours = max_age_hours if max_age_hours is not None else getattr(settings, "UPLOAD_SESSION_TTL_HOURS", 24)
+    cutoff = timezone.now() - timedelta(hours=hours)
+    removed = 0
+    for session in UploadSession.objects.filter(completed_at__isnull=True, updated_at__lt=cutoff):
+        terminate_session(session)
+        removed += 1
+    return removed
@@ -5,10 +5,18 @@ from . import views
 
 urlpatterns = [
     path('upload/', views.upload_content, name='upload_content'),
+    path('uploads/', views.resumable_upload_create, name='resumable_upload_create'),
+    path('uploads/<uuid:session_id>/', views.resumable_upload, name='resumable_upload'),
     path('list/', views.list_content, name='content_list'),
     path("increment-views/<int:content_id>/", views.increment_views, name="increment_views"),
     path('content/<int:content_id>/', views.content_detail, name='content_detail'), 
+    path('media/<int:content_id>/', views.stream_content, name='content_media'),
+    path('media/<int:content_id>/download/', views.download_content, name='content_download'),
+    path('media/<int:content_id>/hls/<path:name>', views.stream_content_hls, name='content_hls'),
+    path('media/<int:content_id>/waveform/', views.stream_content_waveform, name='content_waveform'),
+    path('media/<int:content_id>/preview/<str:name>', views.stream_content_preview, name='content_preview'),
     path('vote_content/<int:content_id>/', views.vote_content, name='vote_content'),
+    path('votes/pending/<int:pending_id>/', views.pending_vote_status, name='pending_vote_status'),
     path('delete/<int:pk>/', views.delete_content, name='delete_content'),  # New URL for content deletion
     path('content/toggle/<int:content_id>/<str:action>/', views.toggle_content_approval, name='toggle_content_approval'),
     path('content/visibility/<int:content_id>/<str:action>/', views.toggle_content_visibility, name='toggle_content_visibility'),
@@ -0,0 +1,167 @@
+"""
+Write-behind buffer for content view tracking. In "buffered" mode unique
+(content, viewer) pairs collect in per-content cache sets and are drained into
+content_viewers by `manage.py flush_content_views`. Redis sets are shared across
+workers; other cache backends fall back to a single-process local set.
+"""
+import threading
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import Content
+
+
+BUFFERED_MODE = "buffered"
+PENDING_KEY = "content-views:pending:{content_id}"
+DIRTY_KEY = "content-views:dirty"
+
+
+def buffering_enabled():
+    return getattr(settings, "CONTENT_VIEW_TRACKING_MODE", "sync") == BUFFERED_MODE
+
+
+def _buffer_ttl():
+    return max(60, int(getattr(settings, "CONTENT_VIEW_BUFFER_TTL_SECONDS", 60 * 60 * 24)))
+
+
+class _RedisViewBuffer:
+    def __init__(self, client):
+        self.client = client
+
+    def _key(self, key):
+        return cache.make_and_validate_key(key)
+
+    def add(self, content_id, user_id):
+        pending_key = self._key(PENDING_KEY.format(content_id=content_id))
+        pipe = self.client.pipeline()
+        pipe.sadd(pending_key, user_id)
+        pipe.expire(pending_key, _buffer_ttl())
+        pipe.sadd(self._key(DIRTY_KEY), content_id)
+        pipe.scard(pending_key)
+        return int(pipe.execute()[-1])
+
+    def pending_count(self, content_id):
+        return int(self.client.scard(self._key(PENDING_KEY.format(content_id=content_id))))
+
+    def _pop_set(self, key):
+        pipe = self.client.pipeline()  # MULTI/EXEC: read and delete atomically
+        pipe.smembers(key)
+        pipe.delete(key)
+        members, _ = pipe.execute()
+        return {int(member) for member in members}
+
+    def drain_dirty(self):
+        return self._pop_set(self._key(DIRTY_KEY))
+
+    def drain(self, content_id):
+        return self._pop_set(self._key(PENDING_KEY.format(content_id=content_id)))
+
+    def requeue(self, content_id, user_ids):
+        for user_id in user_ids:
+            self.add(content_id, user_id)
+
+
+class _LocalViewBuffer:
+    _lock = threading.Lock()
+
+    def _update(self, key, mutate):
+        with self._lock:
+            current = set(cache.get(key) or ())
+            result = mutate(current)
+            if current:
+                cache.set(key, current, timeout=_buffer_ttl())
+            else:
+                cache.delete(key)
+            return result
+
+    def add(self, content_id, user_id):
+        self._update(DIRTY_KEY, lambda ids: ids.add(content_id))
+        return self._update(
+            PENDING_KEY.format(content_id=content_id),
+            lambda ids: ids.add(user_id) or len(ids),
+        )
+
+    def pending_count(self, content_id):
+        return len(cache.get(PENDING_KEY.format(content_id=content_id)) or ())
+
+    def _pop_set(self, key):
+        def pop_all(ids):
+            popped = set(ids)
+            ids.clear()
+            return popped
+
+        return self._update(key, pop_all)
+
+    def drain_dirty(self):
+        return self._pop_set(DIRTY_KEY)
+
+    def drain(self, content_id):
+        return self._pop_set(PENDING_KEY.format(content_id=content_id))
+
+    def requeue(self, content_id, user_ids):
+        for user_id in user_ids:
+            self.add(content_id, user_id)
+
+
+def _get_buffer():
+    get_client = getattr(getattr(cache, "_cache", None), "get_client", None)
+    if get_client is not None:
+        return _RedisViewBuffer(get_client(write=True))
+    return _LocalViewBuffer()
+
+
+def buffer_view(content, user):
+    """
+    Queue a view and return the approximate viewer count (persisted + pending).
+    Pending viewers who already exist in the table are only counted once flushed.
+    """
+    pending = _get_buffer().add(content.id, user.id)
+    return content.view_count + pending
+
+
+def approximate_view_count(content):
+    if not buffering_enabled():
+        return content.view_count
+    return content.view_count + _get_buffer().pending_count(content.id)
+
+
+def flush_buffered_views(batch_size=None):
+    """
+    Drain every buffered content set into content_viewers.
+    Returns (content_items, views) processed. Unflushed ids are requeued on error.
+    """
+    batch_size = max(1, int(batch_size or getattr(settings, "CONTENT_VIEW_FLUSH_BATCH_SIZE", 500)))
+    view_buffer = _get_buffer()
+    User = get_user_model()
+    flushed_contents = 0
+    flushed_views = 0
+
+    for content_id in sorted(view_buffer.drain_dirty()):
+        user_ids = sorted(view_buffer.drain(content_id))
+        if not user_ids:
+            continue
+
+        content = Content.objects.filter(pk=content_id).only("pk").first()
+        if not content:
+            continue
+
+        start = 0
+        try:
+            for start in range(0, len(user_ids), batch_size):
+                chunk = user_ids[start:start + batch_size]
+                existing_user_ids = list(
+                    User.objects.filter(pk__in=chunk).values_list("pk", flat=True)
+                )
+                with transaction.atomic():
+                    content.viewers.add(*existing_user_ids)
+                flushed_views += len(existing_user_ids)
+        except Exception:
+            view_buffer.requeue(content_id, user_ids[start:])
+            raise
+
+        flushed_contents += 1
+
+    return flushed_contents, flushed_views
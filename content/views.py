@@ -5,22 +5,30 @@ from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib.admin.views.decorators import staff_member_required
 from django.forms import modelform_factory
-from .models import Content, Vote, LivePerformance, ArtistUploadLimit, Comment, Badge, Voucher
-from users.models import OTP, CustomUser, VotingTokenPolicy
-from .forms import ContentUploadForm, CommentForm, StartLiveStreamForm, VoucherEntryForm
-from django.db.models import Avg, Sum, Max
+from .models import Content, Vote, LivePerformance, ArtistUploadLimit, Comment, Badge, Voucher, UploadSession, PendingVote
+from users.models import CustomUser, VotingTokenPolicy
+from .forms import ContentUploadForm, CommentForm, StartLiveStreamForm, VoucherEntryForm, ResumableUploadForm, MAX_UPLOAD_BYTES
+from .counters import increment_counters
+from . import uploads, vote_queue, voting, watermarks
+from .delivery import serve_file, serve_stored_file
+from .feed import get_featured_feed
+from .interests import get_interest_profile, interest_vectors
+from .leaderboard import leaderboard_queryset
+from .neighbors import neighbor_ids, schedule_neighbor_refresh
+from .view_buffer import approximate_view_count, buffer_view, buffering_enabled
+from django.db.models import Avg, Sum
 from django.views import View
 from django.contrib.auth.models import User
 from django.utils.timezone import now
 from django.core.paginator import Paginator
 from django.db.models import Count, Q, Case, When, IntegerField, Value
-from datetime import timedelta
 from users.utils import send_notification  # Ensure this is correctly imported
 import random
 from django.db.models import F
 import string
 from django.urls import reverse
-from django.http import Http404, HttpResponseForbidden, JsonResponse
+from django.utils.text import slugify
+from django.http import Http404, HttpResponse, HttpResponseForbidden, JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.core.mail import send_mail
 from django.conf import settings
@@ -31,11 +39,15 @@ from django.utils.timezone import now
 from .forms import ContentUploadForm
 from subscriptions.models import UserSubscription
 from django.views.decorators.csrf import csrf_protect
-from django.views.decorators.http import require_POST
+from django.views.decorators.http import require_POST, require_safe, require_http_methods
 from django.middleware.csrf import get_token
+import base64
 import logging
 import json
+import os
+import posixpath
 import uuid
+from django.core.files.storage import default_storage
 from django.db import transaction
 from django.utils.decorators import method_decorator
 from django.views.decorators.cache import never_cache
@@ -62,10 +74,15 @@ def track_content_view(content, user):
     Record a unique view for an authenticated user and return the latest count.
     """
     if not user.is_authenticated:
-        return content.viewers.count()
+        return approximate_view_count(content)
+
+    if buffering_enabled():
+        return buffer_view(content, user)
 
+    # view_count is bumped by content.counters.sync_view_count for new viewers only.
     content.viewers.add(user)
-    return content.viewers.count()
+    content.refresh_from_db(fields=["view_count"])
+    return content.view_count
 
 
 def get_up_next_contents(content, user=None, limit=4):
@@ -85,45 +102,14 @@ def _empty_up_next_sections():
     }
 
 
-def _user_interest_profile(user, current_content, sample_size=50):
-    profile = {
-        "followed_artist_ids": set(),
-        "genre_ids": set(),
-        "tag_names": set(),
-    }
-
-    if not user or not user.is_authenticated:
-        return profile
-
-    profile["followed_artist_ids"] = set(
-        user.following.values_list("following_id", flat=True)
-    )
-
-    interest_contents = (
-        public_content_queryset().filter(Q(viewers=user) | Q(votes__fan=user))
-        .exclude(id=current_content.id)
-        .select_related("genre")
-        .prefetch_related("tags")
-        .distinct()
-        .order_by("-upload_date")[:sample_size]
-    )
-
-    for item in interest_contents:
-        if item.genre_id:
-            profile["genre_ids"].add(item.genre_id)
-        profile["tag_names"].update(item.tags.names())
-
-    return profile
-
-
 def _personalized_up_next_ids(base_queryset, content, user, limit):
     if limit <= 0:
         return []
 
-    profile = _user_interest_profile(user, content)
-    followed_artist_ids = list(profile["followed_artist_ids"])
-    user_genre_ids = list(profile["genre_ids"])
-    user_tag_names = list(profile["tag_names"])
+    followed_artist_ids, user_genre_ids, user_tag_names = interest_vectors(
+        get_interest_profile(user),
+        exclude_content_id=content.id,
+    )
 
     if not followed_artist_ids and not user_genre_ids and not user_tag_names:
         return []
@@ -183,8 +169,6 @@ def _personalized_up_next_ids(base_queryset, content, user, limit):
             same_current_genre_match=same_current_genre_match,
             interest_tag_count=interest_tag_count,
             shared_tag_count=shared_tag_count,
-            vote_count=Count("votes", distinct=True),
-            viewer_count=Count("viewers", distinct=True),
         )
         .order_by(
             "-followed_artist_match",
@@ -193,7 +177,7 @@ def _personalized_up_next_ids(base_queryset, content, user, limit):
             "-same_current_genre_match",
             "-shared_tag_count",
             "-vote_count",
-            "-viewer_count",
+            "-view_count",
             "-upload_date",
         )
         .distinct()
@@ -201,33 +185,19 @@ def _personalized_up_next_ids(base_queryset, content, user, limit):
     )
 
 
-def get_up_next_sections(content, user=None, limit=4):
+def _live_up_next_ids(base_queryset, content, selected_ids, limit):
     """
-    Return grouped "Up next" content for rendering a structured sidebar.
-    Logged-in users first get recommendations from follows, viewed content,
-    and voting history before the generic current-content fallbacks.
+    Query same-creator and related-creator ids directly; used for content that
+    has not been scored into the neighbor table yet.
     """
-    if limit <= 0:
-        return _empty_up_next_sections()
-
-    base_queryset = (
-        public_content_queryset()
-        .exclude(id=content.id)
-        .select_related("artist", "genre")
-        .prefetch_related("votes")
-    )
-
-    personalized_ids = _personalized_up_next_ids(base_queryset, content, user, limit)
-    selected_ids = list(personalized_ids)
     remaining = limit - len(selected_ids)
-
     same_creator_ids = list(
         base_queryset.filter(artist=content.artist)
         .exclude(id__in=selected_ids)
         .order_by("-upload_date")
         .values_list("id", flat=True)[:remaining]
     )
-    selected_ids.extend(same_creator_ids)
+    selected_ids = selected_ids + same_creator_ids
 
     content_tag_names = list(content.tags.names())
     related_creator_ids = []
@@ -251,17 +221,50 @@ def get_up_next_sections(content, user=None, limit=4):
                 .exclude(id__in=selected_ids)
                 .annotate(same_genre_match=same_genre_match)
                 .annotate(shared_tag_count=Count("tags", filter=Q(tags__name__in=content_tag_names), distinct=True))
-                .annotate(shared_vote_count=Count("votes", distinct=True))
                 .order_by(
                     "-same_genre_match",
                     "-shared_tag_count",
-                    "-shared_vote_count",
+                    "-vote_count",
                     "-upload_date",
                 )
                 .distinct()
                 .values_list("id", flat=True)[:remaining]
             )
 
+    return same_creator_ids, related_creator_ids
+
+
+def get_up_next_sections(content, user=None, limit=4):
+    """
+    Return grouped "Up next" content for rendering a structured sidebar.
+    Logged-in users first get recommendations from follows, viewed content,
+    and voting history before the generic current-content fallbacks.
+    """
+    if limit <= 0:
+        return _empty_up_next_sections()
+
+    base_queryset = (
+        public_content_queryset()
+        .exclude(id=content.id)
+        .select_related("artist", "genre")
+    )
+
+    personalized_ids = _personalized_up_next_ids(base_queryset, content, user, limit)
+    selected_ids = list(personalized_ids)
+    remaining = limit - len(selected_ids)
+
+    precomputed = neighbor_ids(content, exclude_ids=selected_ids)
+    if precomputed is not None:
+        same_creator_ids, related_creator_ids = precomputed
+        same_creator_ids = same_creator_ids[:max(remaining, 0)]
+        remaining = limit - len(selected_ids) - len(same_creator_ids)
+        related_creator_ids = related_creator_ids[:max(remaining, 0)]
+    else:
+        same_creator_ids, related_creator_ids = _live_up_next_ids(
+            base_queryset, content, selected_ids, limit
+        )
+
+    selected_ids.extend(same_creator_ids)
     selected_ids.extend(related_creator_ids)
     fallback_ids = []
     remaining = limit - len(selected_ids)
@@ -336,6 +339,104 @@ def upload_content(request):
     return render(request, 'content/upload.html', {'form': form})
 
 
+TUS_VERSION = "1.0.0"
+
+
+def _tus_response(status=204, **headers):
+    response = HttpResponse(status=status)
+    response["Tus-Resumable"] = TUS_VERSION
+    response["Cache-Control"] = "no-store"
+    for name, value in headers.items():
+        response[name.replace("_", "-")] = str(value)
+    return response
+
+
+def _tus_error(message, status, **headers):
+    response = JsonResponse({"status": "error", "message": message}, status=status)
+    response["Tus-Resumable"] = TUS_VERSION
+    for name, value in headers.items():
+        response[name.replace("_", "-")] = str(value)
+    return response
+
+
+@login_required
+@require_http_methods(["OPTIONS", "POST"])
+def resumable_upload_create(request):
+    """
+    Start a resumable upload (tus "creation"). The POST carries the content
+    metadata plus upload_filename/upload_filetype and the Upload-Length
+    header; quota, size and type are checked before any file bytes arrive.
+    """
+    if request.method == "OPTIONS":
+        return _tus_response(Tus_Version=TUS_VERSION, Tus_Extension="creation,termination", Tus_Max_Size=MAX_UPLOAD_BYTES)
+
+    if not request.user.is_artist():
+        return _tus_error("You don't have permission to upload content.", 403)
+    if not uploads.has_upload_quota(request.user):
+        return _tus_error("You have reached your upload limit. Contact admin for assistance.", 403)
+
+    data = request.POST.copy()
+    if "Upload-Length" in request.headers:
+        data["upload_length"] = request.headers["Upload-Length"]
+    form = ResumableUploadForm(data, request.FILES)
+    if not form.is_valid():
+        response = JsonResponse({"status": "error", "errors": form.errors}, status=400)
+        response["Tus-Resumable"] = TUS_VERSION
+        return response
+
+    session = form.save(commit=False)
+    session.artist = request.user
+    session.save()
+    return _tus_response(
+        status=201,
+        Location=reverse('resumable_upload', args=[session.pk]),
+        Upload_Offset=0,
+    )
+
+
+@login_required
+@require_http_methods(["HEAD", "PATCH", "DELETE"])
+def resumable_upload(request, session_id):
+    """
+    HEAD reports the current offset, PATCH appends a chunk at Upload-Offset
+    and DELETE abandons the upload. The last PATCH creates the Content row.
+    """
+    session = get_object_or_404(UploadSession, pk=session_id, artist=request.user)
+
+    if request.method == "HEAD":
+        return _tus_response(status=200, Upload_Offset=session.offset, Upload_Length=session.length)
+
+    if request.method == "DELETE":
+        uploads.terminate_session(session)
+        return _tus_response()
+
+    if request.content_type != "application/offset+octet-stream":
+        return _tus_error("Content-Type must be application/offset+octet-stream.", 415)
+    try:
+        offset = int(request.headers["Upload-Offset"])
+        length = int(request.headers["Content-Length"])
+    except (KeyError, ValueError):
+        return _tus_error("Upload-Offset and Content-Length are required.", 400)
+    if offset < 0 or length < 0:
+        return _tus_error("Upload-Offset and Content-Length must not be negative.", 400)
+
+    try:
+        session = uploads.append_chunk(session.pk, request.user, offset, request, length)
+    except uploads.UploadError as exc:
+        session.refresh_from_db(fields=["offset"])
+        return _tus_error(str(exc), exc.status, Upload_Offset=session.offset)
+
+    if not session.is_complete:
+        return _tus_response(Upload_Offset=session.offset)
+
+    messages.success(request, "Content uploaded successfully and is pending review.")
+    return _tus_response(
+        Upload_Offset=session.offset,
+        Upload_Checksum=f"sha256 {base64.b64encode(bytes.fromhex(session.sha256)).decode()}",
+        Content_Location=reverse('artist_content', kwargs={'artist_id': request.user.id}),
+    )
+
+
 
 
 
@@ -351,12 +452,15 @@ def add_comment(request, content_id):
     if not text:
         return JsonResponse({"status": "error", "message": "Comment text cannot be empty."}, status=400)
 
-    comment = Comment.objects.create(
-        content=content,
-        user=request.user,
-        text=text,
-        timestamp=now()
-    )
+    with transaction.atomic():
+        comment = Comment.objects.create(
+            content=content,
+            user=request.user,
+            text=text,
+            timestamp=now()
+        )
+        increment_counters(content.id, comment_count=1)
+    content.refresh_from_db(fields=["comment_count"])
 
     # Send notification to content owner (if commenter isn't the owner)
     if request.user != content.artist:
@@ -372,7 +476,7 @@ def add_comment(request, content_id):
             "text": comment.text,
             "timestamp": comment.timestamp.strftime("%b %d, %Y %H:%M"),
         },
-        "comment_count": content.comments.count()
+        "comment_count": content.comment_count
     })
 
 
@@ -416,12 +520,10 @@ def send_upload_reset_notification(artist):
 
 
 def get_featured_contents(limit=50):
-    return (
-        public_content_queryset()
-        .select_related('artist', 'genre')
-        .prefetch_related('votes')
-        .order_by('-upload_date')[:limit]
-    )
+    """
+    Featured cards served from the versioned feed cache (see content.feed).
+    """
+    return get_featured_feed(limit=limit)
 
 
 def list_content(request, content_id=None):
@@ -682,89 +784,26 @@ def vote_content(request, content_id):
         if not can_view_content(request.user, content):
             return vote_error('Content is not available', status_code=404)
 
-        if not content.is_approved_for_voting:
-            return vote_error('Voting is not open for this content')
-
-        if VotingTokenPolicy.voting_is_suspended():
-            return vote_error('Voting is suspended by admin')
-
-        if vote_value not in range(1, 11):
-            return vote_error('Invalid rating (1-10 only)')
-
-        if not voter_tag:
-            return vote_error('Voter tag is required')
-
-        tokens_paused = VotingTokenPolicy.tokens_are_paused() or request.user.has_free_pass
-        otp = None
-        if not tokens_paused:
-            otp = OTP.objects.filter(
-                user=request.user,
-                otp_code=otp_code,
-                is_active=True,
-                remaining_votes__gt=0
-            ).first()
-            if not otp:
-                return vote_error('Invalid/expired OTP')
-
-        active_vote_cutoff = now() - timedelta(days=1)
-        active_votes = Vote.objects.filter(
-            fan=request.user,
-            content__genre=content.genre,
-            timestamp__gte=active_vote_cutoff,
-        )
-        existing_vote = active_votes.filter(base_value=vote_value).exists()
-        if existing_vote:
-            return vote_error(f'Rank {vote_value} already used in this genre')
-
-        highest_previous_vote = active_votes.aggregate(Max('base_value'))['base_value__max'] or 10
-        if vote_value > highest_previous_vote:
-            return vote_error(f'You must rank lower than or equal to {highest_previous_vote}')
-
-        badge = getattr(request.user, 'badge', None)
-        vote_multiplier = badge.vote_multiplier() if badge else 1
-        calculated_value = vote_value * vote_multiplier
-
-        chat_url = None
-        with transaction.atomic():
-            if otp:
-                locked_otp = OTP.objects.select_for_update().filter(
-                    pk=otp.pk,
-                    user=request.user,
-                    is_active=True,
-                    remaining_votes__gt=0,
-                ).first()
-                if not locked_otp or not locked_otp.use_vote():
-                    return vote_error('OTP vote limit reached')
-
-            vote, created = Vote.objects.update_or_create(
-                content=content,
-                fan=request.user,
-                defaults={
-                    'base_value': vote_value,
-                    'value': calculated_value,
-                    'otp_code': "FREE" if tokens_paused else otp_code,
-                    'tag': voter_tag,
-                    'is_badge_vote': bool(badge)
-                }
-            )
-            if not created:
-                Vote.objects.filter(pk=vote.pk).update(timestamp=now())
-                vote.refresh_from_db(fields=["timestamp"])
-
-            if content.artist_id != request.user.id and not request.user.is_admin():
-                try:
-                    from chatapp.services import record_match_rating
-
-                    chat_result = record_match_rating(
-                        rater=request.user,
-                        rated=content.artist,
-                        score=vote_value,
-                        source_content=content,
-                    )
-                    if chat_result.get("thread"):
-                        chat_url = reverse("chatapp:direct", args=[content.artist_id])
-                except ValueError:
-                    pass
+        try:
+            voting.check_vote(content, vote_value, voter_tag)
+            tokens_paused = voting.tokens_paused_for(request.user)
+            if vote_queue.queueing_enabled():
+                pending = vote_queue.enqueue_vote(
+                    request.user, content, vote_value, otp_code, voter_tag, tokens_paused
+                )
+                return JsonResponse(
+                    {
+                        'status': 'success',
+                        'message': f'Vote {vote_value} received!',
+                        'provisional': True,
+                        'status_url': reverse('pending_vote_status', args=[pending.pk]),
+                        'chat_url': None,
+                        'inbox_url': None,
+                    }
+                )
+            chat_url = voting.cast_vote(request.user, content, vote_value, otp_code, voter_tag, tokens_paused)
+        except voting.VoteRejected as rejected:
+            return vote_error(rejected.message)
 
         return JsonResponse(
             {
@@ -783,6 +822,22 @@ def vote_content(request, content_id):
 
 
 
+@login_required
+@require_safe
+def pending_vote_status(request, pending_id):
+    """
+    Outcome of a vote accepted in queued ingestion mode.
+    """
+    pending = get_object_or_404(PendingVote, pk=pending_id, fan=request.user)
+    if pending.status == PendingVote.STATUS_APPLIED:
+        message = f'Vote {pending.base_value} recorded!'
+    elif pending.status == PendingVote.STATUS_REJECTED:
+        message = pending.detail
+    else:
+        message = f'Vote {pending.base_value} received!'
+    return JsonResponse({'status': pending.status, 'message': message})
+
+
 def assign_or_upgrade_badge_for_user(user, level=None):
     badge, created = Badge.objects.get_or_create(user=user)
 
@@ -810,11 +865,9 @@ def assign_or_upgrade_badge(request, user_id, level=None):
 
 
 def calculate_final_ranking():
-    # Calculate total points for each content item.
+    # Totals come from the maintained leaderboard columns (content.leaderboard).
     # Badge assignment is now managed only through admin badge assignment.
-    return Content.objects.annotate(
-        total_points=Sum('votes__value')
-    ).order_by('-total_points')
+    return leaderboard_queryset()
 
 @login_required
 @require_POST
@@ -845,6 +898,7 @@ def toggle_content_approval(request, content_id, action):
         if not content.is_approved:
             content.is_approved = True
             content.save()
+            schedule_neighbor_refresh([content.id])
             send_notification_to_followers(
                 content.artist,
                 f"{content.artist.username} just published new content: {content.title}",
@@ -900,7 +954,7 @@ def recommend_content(request):
     recommendations = (
     public_content_queryset()
     .filter(Q(tags__name__in=user_tags))
-    .annotate(vote_count=Count('votes'))
+    .distinct()
     .order_by('-vote_count')[:10]
     )
 
@@ -910,23 +964,98 @@ def recommend_content(request):
 
 
 
-def watermark_video(video_file, username):
+@require_safe
+def stream_content(request, content_id):
     """
-    Adds a dynamic watermark with the viewer's username to the video.
+    Serve the content file inline for players, honoring Range requests.
     """
-    import ffmpeg
-    watermark_text = f'Watermarked for {username}'
+    content = get_object_or_404(Content, id=content_id)
+    if not content.file or not can_view_content(request.user, content):
+        raise Http404("Content is not available.")
+    return serve_file(request, content.file)
 
-    try:
-        ffmpeg.input(video_file.path).output(
-            video_file.path,
-            vf=f"drawtext=text='{watermark_text}':fontsize=24:fontcolor=white:x=10:y=10"
-        ).run()
-    except Exception as e:
-        raise ValueError(f"Watermarking failed: {e}")
 
+@require_safe
+def stream_content_waveform(request, content_id):
+    """
+    Serve the precomputed waveform peaks of an audio item.
+    """
+    content = get_object_or_404(Content, id=content_id)
+    if not content.waveform_peaks or not can_view_content(request.user, content):
+        raise Http404("Content is not available.")
+    return serve_stored_file(request, default_storage, content.waveform_peaks)
 
 
+@require_safe
+def stream_content_preview(request, content_id, name):
+    """
+    Serve the poster frame, scrub sprite or its WebVTT index of a video.
+    """
+    content = get_object_or_404(Content, id=content_id)
+    if not can_view_content(request.user, content):
+        raise Http404("Content is not available.")
+    stored = {
+        posixpath.basename(value): value
+        for key, value in (content.video_previews or {}).items()
+        if key in ("poster", "sprite", "vtt")
+    }
+    if name not in stored:
+        raise Http404("Content is not available.")
+    return serve_stored_file(request, default_storage, stored[name])
+
+
+@require_safe
+def stream_content_hls(request, content_id, name):
+    """
+    Serve the HLS master/variant playlists and segments of a content item.
+    """
+    content = get_object_or_404(Content, id=content_id)
+    if content.hls_status != Content.HLS_READY or not can_view_content(request.user, content):
+        raise Http404("Content is not available.")
+    directory = posixpath.dirname(content.hls_playlist)
+    path = posixpath.normpath(posixpath.join(directory, name))
+    if not path.startswith(directory + "/"):
+        raise Http404("Content is not available.")
+    return serve_stored_file(request, content.file.storage, path)
+
+
+@login_required
+@require_safe
+def download_content(request, content_id):
+    """
+    Serve the content file as an attachment to users allowed to download it.
+    """
+    content = get_object_or_404(Content, id=content_id)
+    if not content.file or not can_view_content(request.user, content):
+        raise Http404("Content is not available.")
+    if not (request.user.can_download or content.artist_id == request.user.id):
+        return HttpResponseForbidden("You do not have permission to download this content.")
+
+    extension = os.path.splitext(content.file.name)[1]
+    filename = f"{slugify(content.title) or 'content'}{extension}"
+    if not (content.is_video_file and watermarks.enabled()):
+        return serve_file(request, content.file, as_attachment=True, filename=filename)
+
+    # Video downloads carry the viewer's name; copies are cached per viewer.
+    try:
+        name = watermarks.get_watermarked(
+            content, request.user, timeout=getattr(settings, "WATERMARK_WAIT_SECONDS", 15)
+        )
+    except watermarks.WatermarkError:
+        messages.error(request, "This download could not be prepared. Please try again later.")
+        return redirect("content_detail", content_id=content.id)
+    if name is None:
+        messages.info(request, "Your download is being prepared. Try again in a moment.")
+        return redirect("content_detail", content_id=content.id)
+    return serve_stored_file(
+        request,
+        watermarks.cache_storage(),
+        name,
+        as_attachment=True,
+        filename=filename,
+        accel_prefix=getattr(settings, "WATERMARK_ACCEL_REDIRECT_PREFIX", None),
+    )
+
 
 def home(request):
     """
@@ -0,0 +1,231 @@
+"""
+Queued vote ingestion for contest peaks. With VOTE_INGESTION_MODE=queued,
+vote_content checks a vote against hot state in the shared cache, appends
+it to the PendingVote outbox and answers with a provisional acknowledgement.
+`manage.py apply_pending_votes` then applies the outbox in batched
+transactions with the same rules as the synchronous path (content.voting),
+so any vote the hot state let through wrongly is rejected there.
+
+Hot state, rebuilt from Vote plus pending outbox rows whenever it is missing:
+  ranks  per (fan, genre): {content id: [rank, accepted at]} for the window
+  otp    per OTP: votes left after the ones already queued
+It is shared across workers only with a Redis cache (REDIS_URL), like the
+buffered view tracking.
+"""
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from django.utils.timezone import now
+
+from users.models import OTP
+
+from .models import PendingVote, Vote
+from .rank_ledger import VOTE_WINDOW
+from .voting import VoteRejected, cast_vote, find_otp
+
+
+logger = logging.getLogger(__name__)
+
+QUEUED_MODE = "queued"
+RANKS_KEY = "vote-queue:ranks:{fan_id}:{genre_id}"
+OTP_KEY = "vote-queue:otp:{otp_id}"
+LOCK_KEY = "vote-queue:lock:{fan_id}"
+LOCK_SECONDS = 5
+
+
+def queueing_enabled():
+    return getattr(settings, "VOTE_INGESTION_MODE", "sync") == QUEUED_MODE
+
+
+def _state_ttl():
+    return max(1, int(getattr(settings, "VOTE_QUEUE_STATE_SECONDS", 120)))
+
+
+def _ranks_key(fan_id, genre_id):
+    return RANKS_KEY.format(fan_id=fan_id, genre_id=genre_id if genre_id is not None else "none")
+
+
+def _load_ranks(fan_id, genre_id, at):
+    cutoff = at - VOTE_WINDOW
+    ranks = {
+        content_id: [rank, stamp.timestamp()]
+        for content_id, rank, stamp in Vote.objects.filter(
+            fan_id=fan_id, content__genre_id=genre_id, timestamp__gte=cutoff
+        ).values_list("content_id", "base_value", "timestamp")
+    }
+    # Queued votes replace the fan's earlier vote on the same content, as
+    # update_or_create will when they are applied.
+    for content_id, rank, stamp in (
+        PendingVote.objects.filter(fan_id=fan_id, genre_id=genre_id, status=PendingVote.STATUS_PENDING)
+        .order_by("pk")
+        .values_list("content_id", "base_value", "accepted_at")
+    ):
+        ranks[content_id] = [rank, stamp.timestamp()]
+    return ranks
+
+
+def _check_ranks(ranks, vote_value, at):
+    cutoff = (at - VOTE_WINDOW).timestamp()
+    active = [rank for rank, stamp in ranks.values() if stamp >= cutoff]
+    if vote_value in active:
+        raise VoteRejected(f"Rank {vote_value} already used in this genre")
+    highest_previous_vote = max(active, default=10)
+    if vote_value > highest_previous_vote:
+        raise VoteRejected(f"You must rank lower than or equal to {highest_previous_vote}")
+
+
+def _reserve_otp(otp):
+    key = OTP_KEY.format(otp_id=otp.pk)
+    for _attempt in range(2):
+        if cache.get(key) is None:
+            queued = PendingVote.objects.filter(
+                fan_id=otp.user_id,
+                otp_code=otp.otp_code,
+                tokens_paused=False,
+                status=PendingVote.STATUS_PENDING,
+            ).count()
+            cache.add(key, otp.remaining_votes - queued, timeout=_state_ttl())
+        try:
+            left = cache.decr(key)
+        except ValueError:
+            continue  # expired between add and decr
+        if left < 0:
+            _release_otp(key)
+            break
+        return key
+    # Same message the synchronous path gives once the OTP is used up.
+    raise VoteRejected("Invalid/expired OTP")
+
+
+def _release_otp(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        pass
+
+
+def _acquire(fan_id):
+    # Fail fast: one fan's votes are seconds apart, so a held lock means a
+    # duplicate submission rather than something worth waiting for.
+    key = LOCK_KEY.format(fan_id=fan_id)
+    if not cache.add(key, 1, timeout=LOCK_SECONDS):
+        raise VoteRejected("Another vote is still being processed, please try again")
+    return key
+
+
+def enqueue_vote(fan, content, vote_value, otp_code, voter_tag, tokens_paused):
+    """
+    Accept a vote into the outbox or raise VoteRejected. Checks run in the
+    same order and with the same messages as content.voting.cast_vote.
+    """
+    at = now()
+    otp = None if tokens_paused else find_otp(fan, otp_code)
+    lock_key = _acquire(fan.pk)
+    otp_key = None
+    try:
+        if otp:
+            otp_key = _reserve_otp(otp)
+        ranks_key = _ranks_key(fan.pk, content.genre_id)
+        ranks = cache.get(ranks_key)
+        if ranks is None:
+            ranks = _load_ranks(fan.pk, content.genre_id, at)
+        _check_ranks(ranks, vote_value, at)
+
+        pending = PendingVote.objects.create(
+            content=content,
+            fan=fan,
+            genre_id=content.genre_id,
+            base_value=vote_value,
+            otp_code="" if tokens_paused else otp_code,
+            tokens_paused=tokens_paused,
+            tag=voter_tag,
+            accepted_at=at,
+        )
+        ranks[content.pk] = [vote_value, at.timestamp()]
+        cache.set(ranks_key, ranks, timeout=_state_ttl())
+        otp_key = None
+        return pending
+    finally:
+        if otp_key:
+            _release_otp(otp_key)
+        cache.delete(lock_key)
+
+
+def _forget_state(rows):
+    keys = set()
+    for row in rows:
+        keys.add(_ranks_key(row.fan_id, row.genre_id))
+        if not row.tokens_paused:
+            otp_ids = OTP.objects.filter(user_id=row.fan_id, otp_code=row.otp_code).values_list("pk", flat=True)
+            keys.update(OTP_KEY.format(otp_id=otp_id) for otp_id in otp_ids)
+    cache.delete_many(list(keys))
+
+
+def apply_pending_votes(batch_size=None):
+    """
+    Apply pending outbox rows oldest first, one transaction per batch.
+    Returns (applied, rejected).
+    """
+    batch_size = max(1, int(batch_size or getattr(settings, "VOTE_QUEUE_BATCH_SIZE", 200)))
+    applied = rejected = 0
+    while True:
+        with transaction.atomic():
+            rows = list(
+                PendingVote.objects.select_for_update(skip_locked=True, of=("self",))
+                .filter(status=PendingVote.STATUS_PENDING)
+                .select_related("fan", "content", "content__artist")
+                .order_by("pk")[:batch_size]
+            )
+            if not rows:
+                break
+            failed = []
+            for row in rows:
+                try:
+                    # A savepoint per vote, so one rejection keeps the rest.
+                    with transaction.atomic():
+                        cast_vote(
+                            row.fan,
+                            row.content,
+                            row.base_value,
+                            row.otp_code,
+                            row.tag,
+                            row.tokens_paused,
+                            at=row.accepted_at,
+                        )
+                    row.status = PendingVote.STATUS_APPLIED
+                    applied += 1
+                except VoteRejected as exc:
+                    row.status, row.detail = PendingVote.STATUS_REJECTED, exc.message[:255]
+                except Exception:
+                    logger.exception("Could not apply queued vote %s.", row.pk)
+                    row.status, row.detail = PendingVote.STATUS_REJECTED, "Something went wrong"
+                if row.status == PendingVote.STATUS_REJECTED:
+                    failed.append(row)
+                    rejected += 1
+                row.processed_at = now()
+            PendingVote.objects.bulk_update(rows, ["status", "detail", "processed_at"])
+            if failed:
+                # Hot state counted these votes; rebuild it without them.
+                transaction.on_commit(lambda failed=failed: _forget_state(failed))
+    return applied, rejected
+
+
+def purge_processed_votes(max_age_hours=None):
+    """
+    Delete applied/rejected outbox rows older than VOTE_QUEUE_RETENTION_HOURS.
+    """
+    hours = max_age_hours if max_age_hours is not None else getattr(settings, "VOTE_QUEUE_RETENTION_HOURS", 24)
+    cutoff = now() - timedelta(hours=hours)
+    deleted, _ = PendingVote.objects.exclude(status=PendingVote.STATUS_PENDING).filter(processed_at__lt=cutoff).delete()
+    return deleted
+
+
+@receiver(post_save, sender=OTP)
+def forget_otp_state(sender, instance, **kwargs):
+    # Grants, resets and applied votes all change what is left.
+    transaction.on_commit(lambda: cache.delete(OTP_KEY.format(otp_id=instance.pk)))
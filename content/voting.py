@@ -0,0 +1,120 @@
+"""
+Vote rules and the vote write, shared by vote_content and the queued
+ingestion worker (content.vote_queue).
+
+`check_vote` holds the checks that only need the content row and the
+(cached) voting policy. `cast_vote` holds the ones that must run against the
+database: the OTP, the 24h per-genre rank rule (against the fan's
+content.rank_ledger row), and the Vote/OTP/match rating writes. Both raise
+VoteRejected with the message the client sees.
+"""
+from django.db import transaction
+from django.urls import reverse
+from django.utils.timezone import now
+
+from users.models import OTP, VotingTokenPolicy
+
+from . import rank_ledger
+from .models import Vote
+
+
+FREE_OTP_CODE = "FREE"
+
+
+class VoteRejected(Exception):
+    def __init__(self, message):
+        super().__init__(message)
+        self.message = message
+
+
+def tokens_paused_for(fan):
+    return VotingTokenPolicy.tokens_are_paused() or fan.has_free_pass
+
+
+def check_vote(content, vote_value, voter_tag):
+    if not content.is_approved_for_voting:
+        raise VoteRejected("Voting is not open for this content")
+    if VotingTokenPolicy.voting_is_suspended():
+        raise VoteRejected("Voting is suspended by admin")
+    if vote_value not in range(1, 11):
+        raise VoteRejected("Invalid rating (1-10 only)")
+    if not voter_tag:
+        raise VoteRejected("Voter tag is required")
+
+
+def find_otp(fan, otp_code):
+    otp = OTP.objects.filter(user=fan, otp_code=otp_code, is_active=True, remaining_votes__gt=0).first()
+    if not otp:
+        raise VoteRejected("Invalid/expired OTP")
+    return otp
+
+
+def check_rank(fan, genre_id, vote_value, at):
+    """
+    Lock the fan's rank ledger row for the genre and check the vote against
+    it. Call inside the vote transaction; returns the locked row.
+    """
+    ledger = rank_ledger.locked_ledger(fan.pk, genre_id, at)
+    error = rank_ledger.rank_error(ledger, vote_value)
+    if error:
+        raise VoteRejected(error)
+    return ledger
+
+
+def cast_vote(fan, content, vote_value, otp_code, voter_tag, tokens_paused, at=None):
+    """
+    Validate against the database and record the vote. `at` is when the
+    vote was accepted (defaults to now); queued votes pass their arrival
+    time so the 24h window matches the synchronous path. Returns the chat
+    URL when the vote unlocked a peer chat.
+    """
+    stamp = at or now()
+    otp = None if tokens_paused else find_otp(fan, otp_code)
+
+    badge = getattr(fan, "badge", None)
+    vote_multiplier = badge.vote_multiplier() if badge else 1
+
+    chat_url = None
+    with transaction.atomic():
+        ledger = check_rank(fan, content.genre_id, vote_value, stamp)
+        if otp:
+            locked_otp = OTP.objects.select_for_update().filter(
+                pk=otp.pk,
+                user=fan,
+                is_active=True,
+                remaining_votes__gt=0,
+            ).first()
+            if not locked_otp or not locked_otp.use_vote():
+                raise VoteRejected("OTP vote limit reached")
+
+        with rank_ledger.recording():
+            vote, created = Vote.objects.update_or_create(
+                content=content,
+                fan=fan,
+                defaults={
+                    "base_value": vote_value,
+                    "value": vote_value * vote_multiplier,
+                    "otp_code": FREE_OTP_CODE if tokens_paused else otp_code,
+                    "tag": voter_tag,
+                    "is_badge_vote": bool(badge),
+                },
+            )
+        if not created or at is not None:
+            Vote.objects.filter(pk=vote.pk).update(timestamp=stamp)
+        rank_ledger.record(ledger, fan.pk, content.genre_id, vote_value, stamp, replaced=not created)
+
+        if content.artist_id != fan.id and not fan.is_admin():
+            try:
+                from chatapp.services import record_match_rating
+
+                chat_result = record_match_rating(
+                    rater=fan,
+                    rated=content.artist,
+                    score=vote_value,
+                    source_content=content,
+                )
+                if chat_result.get("thread"):
+                    chat_url = reverse("chatapp:direct", args=[content.artist_id])
+            except ValueError:
+                pass
+    return chat_url
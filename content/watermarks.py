@@ -0,0 +1,202 @@
+"""
+Per-viewer watermarked copies of uploaded video.
+
+Each (content file, viewer) pair gets one rendition in WATERMARK_CACHE_DIR.
+That directory sits outside MEDIA_ROOT, so copies are only reachable
+through the gated download view. Renders run on a small thread pool.
+Concurrent requests for the same key in a process share one job, and
+finished files are published with an atomic rename. The cache is an LRU
+bounded by WATERMARK_CACHE_MAX_BYTES: hits refresh the file's mtime, and
+the oldest files are evicted after each new render.
+"""
+import hashlib
+import logging
+import os
+import shutil
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import ffmpeg
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+
+
+logger = logging.getLogger(__name__)
+
+PARTIAL_SUFFIX = ".partial"
+
+# Re-entrant: a job that finishes during submit() runs its callback inline.
+_lock = threading.RLock()
+_executor = None
+_inflight = {}
+
+
+class WatermarkError(Exception):
+    pass
+
+
+def cache_dir():
+    return str(getattr(settings, "WATERMARK_CACHE_DIR", settings.BASE_DIR / "watermark_cache"))
+
+
+def cache_storage():
+    return FileSystemStorage(location=cache_dir())
+
+
+def _max_bytes():
+    return max(0, int(getattr(settings, "WATERMARK_CACHE_MAX_BYTES", 2 * 1024 ** 3)))
+
+
+def _get_executor():
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=max(1, int(getattr(settings, "WATERMARK_WORKERS", 2))),
+                thread_name_prefix="watermark",
+            )
+        return _executor
+
+
+def cache_name(content, viewer):
+    """
+    Cache file name for a viewer's copy of the current content file. The
+    file name is part of the key, so re-uploads never serve an old copy.
+    """
+    digest = hashlib.sha256(f"{content.pk}:{content.file.name}:{viewer.pk}".encode()).hexdigest()[:24]
+    extension = os.path.splitext(content.file.name)[1].lower() or ".mp4"
+    return f"{content.pk}/{viewer.pk}-{digest}{extension}"
+
+
+def enabled():
+    return bool(getattr(settings, "WATERMARK_DOWNLOADS", True)) and shutil.which("ffmpeg") is not None
+
+
+def watermark_text(viewer):
+    return f"Watermarked for {viewer.username}"
+
+
+def render_watermark(source_path, target_path, text):
+    """
+    Burn `text` into the video at `source_path` and write `target_path`.
+    The audio track is copied when there is one ("0:a?" maps it optionally).
+    """
+    source = ffmpeg.input(source_path)
+    video = source.video.drawtext(
+        text=text,
+        fontsize=24,
+        fontcolor="white@0.8",
+        box=1,
+        boxcolor="black@0.35",
+        x=10,
+        y=10,
+    )
+    (
+        ffmpeg.output(video, source["a?"], target_path, **{"c:v": "libx264", "preset": "veryfast", "c:a": "copy"})
+        .overwrite_output()
+        .run(capture_stdout=True, capture_stderr=True)
+    )
+
+
+def _touch(path):
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+
+
+def evict(max_bytes=None, keep=None):
+    """
+    Delete least-recently-used renditions (never `keep`) until the cache
+    fits. Returns the number of files removed.
+    """
+    max_bytes = _max_bytes() if max_bytes is None else max_bytes
+    entries = []
+    for root, _dirs, files in os.walk(cache_dir()):
+        for filename in files:
+            path = os.path.join(root, filename)
+            if filename.endswith(PARTIAL_SUFFIX) or path == keep:
+                continue
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+    total = sum(size for _mtime, size, _path in entries)
+    removed = 0
+    for _mtime, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total -= size
+        removed += 1
+    return removed
+
+
+def _build(source_path, name, text):
+    target = os.path.join(cache_dir(), name)
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    partial = f"{target}.{threading.get_ident()}{PARTIAL_SUFFIX}"
+    try:
+        render_watermark(source_path, partial, text)
+        os.replace(partial, target)
+    except ffmpeg.Error as exc:
+        logger.warning("Watermark render failed for %s: %s", name, (exc.stderr or b"").decode(errors="replace")[-2000:])
+        raise WatermarkError(f"Could not watermark {name}.") from exc
+    finally:
+        if os.path.exists(partial):
+            os.remove(partial)
+    evict(keep=target)
+    return name
+
+
+def request_watermark(content, viewer):
+    """
+    Return a Future resolving to the cache name of the viewer's copy. Cache
+    hits resolve immediately; concurrent misses for the same key share a job.
+    """
+    name = cache_name(content, viewer)
+    path = os.path.join(cache_dir(), name)
+    with _lock:
+        future = _inflight.get(name)
+        if future is not None:
+            return future
+        if os.path.exists(path):
+            _touch(path)
+            return _completed(name)
+
+    executor = _get_executor()
+    with _lock:
+        future = _inflight.get(name)
+        if future is None:
+            future = executor.submit(_build, content.file.path, name, watermark_text(viewer))
+            _inflight[name] = future
+            future.add_done_callback(lambda _done: _forget(name))
+    return future
+
+
+def _completed(name):
+    future = Future()
+    future.set_result(name)
+    return future
+
+
+def _forget(name):
+    with _lock:
+        _inflight.pop(name, None)
+
+
+def get_watermarked(content, viewer, timeout=None):
+    """
+    Block up to `timeout` seconds for the viewer's copy. Returns its cache
+    name, or None if it is still rendering. Raises WatermarkError on failure.
+    """
+    future = request_watermark(content, viewer)
+    try:
+        return future.result(timeout=timeout)
+    except TimeoutError:
+        return None
@@ -0,0 +1,169 @@
+"""
+Precomputed waveform peaks for audio content.
+
+After an mp3 upload, `build_waveform` (content.tasks) decodes it once with
+ffmpeg to mono 16-bit PCM and reduces the samples to min/max peak pairs at
+each PEAK_LEVELS zoom level with NumPy. The result is a small binary
+sidecar (about 5 KB) stored next to the media and recorded on
+Content.waveform_peaks. Players fetch it from the gated content_waveform
+view and draw without decoding the audio.
+
+Sidecar layout, little-endian:
+    header  4s magic "GGWF", u8 version, u8 level count, u16 reserved,
+            u32 sample rate, u32 duration in ms
+    level   u32 peak count, then count (min, max) int8 pairs
+Levels are stored finest first.
+"""
+import logging
+import posixpath
+import struct
+
+import ffmpeg
+import numpy as np
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+
+from .models import Content
+
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = 8000
+# Peaks per track, finest first; each level is 4x coarser than the last.
+PEAK_LEVELS = (2048, 512, 128)
+MAGIC = b"GGWF"
+VERSION = 1
+HEADER = struct.Struct("<4sBBHII")
+LEVEL = struct.Struct("<I")
+
+
+def sidecar_name(source_name):
+    # Keyed by the media file's storage name, which is unique per blob, so
+    # identical uploads share one sidecar.
+    return f"waveforms/{posixpath.splitext(source_name)[0]}.peaks"
+
+
+def decode_pcm(path):
+    """
+    Mono signed 16-bit samples at SAMPLE_RATE.
+    """
+    out, _err = (
+        ffmpeg.input(path)
+        .output("pipe:", format="s16le", acodec="pcm_s16le", ac=1, ar=SAMPLE_RATE)
+        .global_args("-nostdin")
+        .run(capture_stdout=True, capture_stderr=True)
+    )
+    return np.frombuffer(out, dtype="<i2")
+
+
+def _to_int8(values):
+    return np.clip(np.round(values.astype(np.float32) * (127 / 32768)), -127, 127).astype(np.int8)
+
+
+def compute_peaks(samples):
+    """
+    [(mins, maxs)] as int8 arrays, one pair per PEAK_LEVELS entry.
+    """
+    finest = PEAK_LEVELS[0]
+    if not len(samples):
+        samples = np.zeros(finest, dtype=np.int16)
+    elif len(samples) < finest:
+        samples = np.repeat(samples, -(-finest // len(samples)))
+    # Buckets spread evenly over the track, so peak i always covers the
+    # same fraction of its duration.
+    starts = np.linspace(0, len(samples), finest, endpoint=False).astype(np.intp)
+    mins, maxs = np.minimum.reduceat(samples, starts), np.maximum.reduceat(samples, starts)
+
+    levels = []
+    for count in PEAK_LEVELS:
+        factor = finest // count
+        levels.append((
+            _to_int8(mins.reshape(count, factor).min(axis=1)),
+            _to_int8(maxs.reshape(count, factor).max(axis=1)),
+        ))
+    return levels
+
+
+def encode_peaks(levels, duration_ms):
+    parts = [HEADER.pack(MAGIC, VERSION, len(levels), 0, SAMPLE_RATE, duration_ms)]
+    for mins, maxs in levels:
+        pairs = np.empty(len(mins) * 2, dtype=np.int8)
+        pairs[0::2], pairs[1::2] = mins, maxs
+        parts.append(LEVEL.pack(len(mins)))
+        parts.append(pairs.tobytes())
+    return b"".join(parts)
+
+
+def decode_peaks(data):
+    """
+    Inverse of encode_peaks: {"sample_rate", "duration_ms", "levels": [(mins, maxs)]}.
+    """
+    magic, version, level_count, _reserved, sample_rate, duration_ms = HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("Not a waveform sidecar.")
+    offset = HEADER.size
+    levels = []
+    for _index in range(level_count):
+        (count,) = LEVEL.unpack_from(data, offset)
+        offset += LEVEL.size
+        pairs = np.frombuffer(data, dtype=np.int8, count=count * 2, offset=offset)
+        offset += count * 2
+        levels.append((pairs[0::2], pairs[1::2]))
+    return {"sample_rate": sample_rate, "duration_ms": duration_ms, "levels": levels}
+
+
+def release_sidecar(name):
+    """
+    Delete a sidecar unless another item still uses it.
+    """
+    if name and not Content.objects.filter(waveform_peaks=name).exists():
+        default_storage.delete(name)
+
+
+def build_waveform(content_id):
+    """
+    Build (or reuse) and publish the waveform sidecar for one audio item.
+    Returns its storage name, or None when the item is gone, is not audio,
+    or ffmpeg fails.
+    """
+    content = Content.objects.filter(pk=content_id).only("id", "file", "media_kind").first()
+    if content is None or not content.file or not content.is_audio_file:
+        return None
+
+    source_name = content.file.name
+    name = sidecar_name(source_name)
+    if not default_storage.exists(name):
+        try:
+            samples = decode_pcm(content.file.path)
+        except (ffmpeg.Error, OSError) as exc:
+            stderr = getattr(exc, "stderr", b"") or b""
+            logger.warning(
+                "Waveform decoding failed for content %s: %s", content_id, stderr.decode(errors="replace")[-2000:] or exc
+            )
+            return None
+        data = encode_peaks(compute_peaks(samples), len(samples) * 1000 // SAMPLE_RATE)
+        name = default_storage.save(name, ContentFile(data))
+
+    # Publish only if the file was not replaced while ffmpeg was running.
+    with transaction.atomic():
+        updated = Content.objects.filter(pk=content.pk, file=source_name).update(waveform_peaks=name)
+    if not updated:
+        release_sidecar(name)
+        return None
+    return name
+
+
+def schedule_waveform(content_id):
+    """
+    Queue waveform generation once the surrounding transaction commits.
+    """
+    from .tasks import build_content_waveform
+
+    def enqueue():
+        try:
+            build_content_waveform.delay(content_id)
+        except Exception:
+            logger.exception("Could not queue waveform generation for content %s.", content_id)
+
+    transaction.on_commit(enqueue)
@@ -0,0 +1,64 @@
+"""
+YouTube link parsing. Content.save() stores the result in
+Content.youtube_video_id, so nothing re-parses links at render time.
+"""
+import re
+from urllib.parse import parse_qs, urlparse
+
+
+VIDEO_ID_RE = re.compile(r"[A-Za-z0-9_-]{11}")
+
+
+def extract_video_id(url):
+    """
+    The 11-character video id of a watch, share, embed or shorts link, or
+    "" when `url` is not one.
+    """
+    if not url:
+        return ""
+
+    parsed = urlparse(url.strip())
+    host = parsed.netloc.lower()
+    video_id = None
+
+    if host in {"youtu.be", "www.youtu.be"}:
+        video_id = parsed.path.strip("/").split("/")[0]
+    elif "youtube.com" in host or "youtube-nocookie.com" in host:
+        if parsed.path == "/watch":
+            video_id = parse_qs(parsed.query).get("v", [None])[0]
+        elif parsed.path.startswith("/embed/"):
+            video_id = parsed.path.split("/embed/", 1)[1].split("/")[0]
+        elif parsed.path.startswith("/shorts/"):
+            video_id = parsed.path.split("/shorts/", 1)[1].split("/")[0]
+
+    if video_id and VIDEO_ID_RE.fullmatch(video_id):
+        return video_id
+    return ""
+
+
+def backfill_video_ids(model, batch_size=500):
+    """
+    Store the parsed id on every `model` row whose stored id is stale, in
+    keyset-paged batches. Returns the number of rows changed.
+    """
+    rows = (
+        model.objects.exclude(youtube_url__isnull=True)
+        .exclude(youtube_url="")
+        .only("id", "youtube_url", "youtube_video_id")
+        .order_by("pk")
+    )
+    changed = 0
+    last_pk = 0
+    while True:
+        batch = list(rows.filter(pk__gt=last_pk)[:batch_size])
+        if not batch:
+            return changed
+        last_pk = batch[-1].pk
+        stale = []
+        for row in batch:
+            video_id = extract_video_id(row.youtube_url)
+            if row.youtube_video_id != video_id:
+                row.youtube_video_id = video_id
+                stale.append(row)
+        model.objects.bulk_update(stale, ["youtube_video_id"])
+        changed += len(stale)
@@ -14,6 +14,9 @@ django_asgi_app = get_asgi_application()
 from chatapp.routing import websocket_urlpatterns as chat_websocket_urlpatterns
 from content.routing import websocket_urlpatterns as content_websocket_urlpatterns
 from livestream.routing import websocket_urlpatterns as livestream_websocket_urlpatterns
+from search.typeahead import warm_on_startup
+
+warm_on_startup()
 
 websocket_urlpatterns = (
     content_websocket_urlpatterns
@@ -0,0 +1,11 @@
+import os
+
+from celery import Celery
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "ggenre.settings")
+
+# Background jobs (thumbnail renditions, ...). Without CELERY_BROKER_URL the
+# tasks run eagerly in-process, see CELERY_TASK_ALWAYS_EAGER in settings.
+app = Celery("ggenre")
+app.config_from_object("django.conf:settings", namespace="CELERY")
+app.autodiscover_tasks()
@@ -263,6 +263,23 @@ STATIC_ROOT = BASE_DIR / "staticfiles"
 
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
+# How gated content files are sent: "django" (Range-aware FileResponse),
+# "x-accel-redirect" (nginx internal location at MEDIA_ACCEL_REDIRECT_PREFIX,
+# mapped to MEDIA_ROOT) or "x-sendfile" (Apache/lighttpd).
+MEDIA_DELIVERY_BACKEND = os.getenv("MEDIA_DELIVERY_BACKEND", "django").strip().lower()
+MEDIA_ACCEL_REDIRECT_PREFIX = os.getenv("MEDIA_ACCEL_REDIRECT_PREFIX", "/protected-media/")
+# Per-viewer watermarked video downloads (content.watermarks): an LRU disk
+# cache outside MEDIA_ROOT, filled by a small in-process render pool.
+WATERMARK_DOWNLOADS = env_bool("WATERMARK_DOWNLOADS", True)
+WATERMARK_CACHE_DIR = os.getenv("WATERMARK_CACHE_DIR") or str(BASE_DIR / "watermark_cache")
+WATERMARK_CACHE_MAX_BYTES = env_int("WATERMARK_CACHE_MAX_BYTES", 2 * 1024 ** 3)
+WATERMARK_WORKERS = env_int("WATERMARK_WORKERS", 2)
+WATERMARK_WAIT_SECONDS = env_float("WATERMARK_WAIT_SECONDS", 15)
+WATERMARK_ACCEL_REDIRECT_PREFIX = os.getenv("WATERMARK_ACCEL_REDIRECT_PREFIX", "/protected-watermarks/")
+# Resumable uploads (content.uploads): partial files live here until the
+# last chunk arrives; unfinished sessions expire after the TTL.
+UPLOAD_SESSION_DIR = os.getenv("UPLOAD_SESSION_DIR") or str(BASE_DIR / "upload_sessions")
+UPLOAD_SESSION_TTL_HOURS = env_int("UPLOAD_SESSION_TTL_HOURS", 24)
 
 
 REDIS_URL = os.getenv("REDIS_URL", "").strip()
@@ -276,6 +293,68 @@ if REDIS_URL:
 else:
     CHANNEL_LAYERS = {"default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}}
 
+if REDIS_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": REDIS_URL,
+            "KEY_PREFIX": os.getenv("CACHE_KEY_PREFIX", "ggenre"),
+        }
+    }
+else:
+    CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+# Celery runs background jobs when a broker is configured; otherwise tasks
+# execute eagerly in the calling process (development and tests).
+CELERY_BROKER_URL = os.getenv("CELERY_BROKER_URL", "").strip()
+CELERY_TASK_ALWAYS_EAGER = env_bool("CELERY_TASK_ALWAYS_EAGER", not CELERY_BROKER_URL)
+CELERY_TASK_EAGER_PROPAGATES = True
+CELERY_TASK_IGNORE_RESULT = True
+CELERY_TASK_ACKS_LATE = True
+CELERY_WORKER_PREFETCH_MULTIPLIER = 1
+
+
+# "sync" writes every unique view straight to content_viewers; "buffered"
+# collects views in the shared cache and flushes them with `flush_content_views`.
+CONTENT_VIEW_TRACKING_MODE = os.getenv("CONTENT_VIEW_TRACKING_MODE", "sync").strip().lower()
+CONTENT_VIEW_FLUSH_BATCH_SIZE = env_int("CONTENT_VIEW_FLUSH_BATCH_SIZE", 500)
+CONTENT_VIEW_BUFFER_TTL_SECONDS = env_int("CONTENT_VIEW_BUFFER_TTL_SECONDS", 60 * 60 * 24)
+# "sync" records each vote inside the request; "queued" checks it against hot
+# state in the shared cache, stores it in the PendingVote outbox and lets
+# `apply_pending_votes` commit it in batches.
+VOTE_INGESTION_MODE = os.getenv("VOTE_INGESTION_MODE", "sync").strip().lower()
+VOTE_QUEUE_BATCH_SIZE = env_int("VOTE_QUEUE_BATCH_SIZE", 200)
+VOTE_QUEUE_STATE_SECONDS = env_int("VOTE_QUEUE_STATE_SECONDS", 120)
+VOTE_QUEUE_RETENTION_HOURS = env_int("VOTE_QUEUE_RETENTION_HOURS", 24)
+# Rows per batch when the admin dashboard applies an OTP action to many users.
+BULK_OTP_BATCH_SIZE = env_int("BULK_OTP_BATCH_SIZE", 500)
+# Rows fetched per database round trip (and per Parquet row group) by the
+# streaming exports in users.exports.
+EXPORT_CHUNK_SIZE = env_int("EXPORT_CHUNK_SIZE", 2000)
+# Content page websocket (ws/content/<id>/): changes to one item are coalesced
+# into at most one broadcast per tick.
+CONTENT_UPDATES_TICK_MS = env_int("CONTENT_UPDATES_TICK_MS", 250)
+FEATURED_FEED_CACHE_SECONDS = env_int("FEATURED_FEED_CACHE_SECONDS", 60)
+FEATURED_FEED_LOCK_SECONDS = env_int("FEATURED_FEED_LOCK_SECONDS", 10)
+CONTENT_NEIGHBOR_TOP_K = env_int("CONTENT_NEIGHBOR_TOP_K", 12)
+# Per-process cache of user interest profiles; other workers see updates after this TTL.
+INTEREST_PROFILE_CACHE_SECONDS = env_int("INTEREST_PROFILE_CACHE_SECONDS", 300)
+# Per-process snapshot of VotingTokenPolicy; admin changes reach other workers within this TTL.
+VOTING_POLICY_CACHE_SECONDS = env_int("VOTING_POLICY_CACHE_SECONDS", 5)
+# Responsive thumbnail renditions (JPEG + WebP) generated in the background.
+THUMBNAIL_RENDITION_WIDTHS = [int(width) for width in env_list("THUMBNAIL_RENDITION_WIDTHS", ["320", "640", "1280"])]
+
+# Content search: "inverted_index" (BM25 over search_searchposting) or
+# "database" (SQLite FTS5 / MySQL FULLTEXT created by search migrations).
+SEARCH_BACKEND = os.getenv("SEARCH_BACKEND", "inverted_index")
+SEARCH_POPULARITY_WEIGHT = env_float("SEARCH_POPULARITY_WEIGHT", 0.15)
+SEARCH_RESULTS_PER_PAGE = env_int("SEARCH_RESULTS_PER_PAGE", 20)
+SEARCH_MAX_RESULTS = env_int("SEARCH_MAX_RESULTS", 500)
+# Autocomplete prefix index: built per process at startup; other workers'
+# changes are picked up after this many seconds.
+TYPEAHEAD_WARM_ON_STARTUP = env_bool("TYPEAHEAD_WARM_ON_STARTUP", True)
+TYPEAHEAD_REFRESH_SECONDS = env_int("TYPEAHEAD_REFRESH_SECONDS", 30)
+
 
 LOG_LEVEL = os.getenv("DJANGO_LOG_LEVEL", "INFO").upper()
 LOGGING = {
@@ -33,6 +33,7 @@ urlpatterns = [
     path('chat/', include('chatapp.urls')),
     path('livestreams/', include('livestream.urls')),
     path('subscriptions/', include('subscriptions.urls')),
+    path('search/', include('search.urls')),
 
     # Password change URLs
     path('password-change/', 
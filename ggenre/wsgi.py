@@ -14,3 +14,7 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'ggenre.settings')
 
 application = get_wsgi_application()
+
+from search.typeahead import warm_on_startup  # noqa: E402 - needs the app registry
+
+warm_on_startup()
@@ -0,0 +1,168 @@
+"""
+Ranking backends for content search.
+
+`inverted_index` (default) scores SearchPosting rows with BM25 in Python and
+works on every database. `database` hands matching to SQLite FTS5 or MySQL
+FULLTEXT when the search migration could create them, and falls back to the
+inverted index otherwise. Both blend the text score with content popularity.
+"""
+import logging
+import math
+
+from django.conf import settings
+from django.db import DatabaseError, connection, transaction
+from django.db.models import Avg, Count
+
+from .indexing import tokenize
+from .models import SearchDocument, SearchPosting
+
+
+logger = logging.getLogger(__name__)
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+
+def _popularity_weight():
+    return float(getattr(settings, "SEARCH_POPULARITY_WEIGHT", 0.15))
+
+
+def _max_candidates():
+    return max(1, int(getattr(settings, "SEARCH_MAX_RESULTS", 500)))
+
+
+def _blend(text_scores, popularity):
+    """
+    Combine text relevance with log-damped popularity and return
+    [(content_id, score)] best first.
+    """
+    weight = _popularity_weight()
+    ranked = [
+        (content_id, score * (1.0 + weight * math.log1p(max(popularity.get(content_id, 0), 0))))
+        for content_id, score in text_scores.items()
+    ]
+    ranked.sort(key=lambda pair: (-pair[1], -pair[0]))
+    return ranked[:_max_candidates()]
+
+
+def _public_postings():
+    return SearchPosting.objects.filter(content__is_approved=True, content__is_visible=True)
+
+
+class InvertedIndexBackend:
+    name = "inverted_index"
+
+    def rank(self, query):
+        terms = sorted(set(tokenize(query)))
+        if not terms:
+            return []
+
+        stats = SearchDocument.objects.filter(
+            content__is_approved=True,
+            content__is_visible=True,
+        ).aggregate(total=Count("pk"), average_length=Avg("length"))
+        total_documents = stats["total"] or 0
+        average_length = stats["average_length"] or 1.0
+        if not total_documents:
+            return []
+
+        document_frequency = dict(
+            _public_postings()
+            .filter(term__in=terms)
+            .values("term")
+            .annotate(documents=Count("content_id"))
+            .values_list("term", "documents")
+        )
+
+        postings = (
+            _public_postings()
+            .filter(term__in=terms)
+            .values_list(
+                "content_id",
+                "term",
+                "weight",
+                "content__search_document__length",
+                "content__view_count",
+                "content__vote_sum",
+            )
+        )
+
+        text_scores = {}
+        popularity = {}
+        for content_id, term, weight, length, view_count, vote_sum in postings:
+            documents = document_frequency.get(term, 0)
+            idf = math.log(1 + (total_documents - documents + 0.5) / (documents + 0.5))
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * (length or 0) / average_length)
+            text_scores[content_id] = text_scores.get(content_id, 0.0) + idf * (
+                weight * (BM25_K1 + 1) / (weight + norm)
+            )
+            popularity[content_id] = view_count + vote_sum
+
+        return _blend(text_scores, popularity)
+
+
+class DatabaseFullTextBackend:
+    """
+    SQLite FTS5 (bm25()) or MySQL FULLTEXT (MATCH ... AGAINST) relevance.
+    """
+    name = "database"
+
+    SQLITE_SQL = (
+        "SELECT d.content_id, -bm25(search_fts, 3.0, 1.0), c.view_count + c.vote_sum "
+        "FROM search_fts "
+        "JOIN search_searchdocument d ON d.id = search_fts.rowid "
+        "JOIN content_content c ON c.id = d.content_id "
+        "WHERE search_fts MATCH %s AND c.is_approved AND c.is_visible "
+        "ORDER BY bm25(search_fts, 3.0, 1.0) LIMIT %s"
+    )
+    MYSQL_SQL = (
+        "SELECT d.content_id, MATCH(d.title, d.body) AGAINST (%s IN NATURAL LANGUAGE MODE) AS relevance, "
+        "c.view_count + c.vote_sum "
+        "FROM search_searchdocument d "
+        "JOIN content_content c ON c.id = d.content_id "
+        "WHERE MATCH(d.title, d.body) AGAINST (%s IN NATURAL LANGUAGE MODE) "
+        "AND c.is_approved AND c.is_visible "
+        "ORDER BY relevance DESC LIMIT %s"
+    )
+
+    def rank(self, query):
+        terms = tokenize(query)
+        if not terms:
+            return []
+
+        if connection.vendor == "sqlite":
+            sql = self.SQLITE_SQL
+            params = [" OR ".join(f'"{term}"' for term in terms), _max_candidates()]
+        elif connection.vendor == "mysql":
+            sql = self.MYSQL_SQL
+            text = " ".join(terms)
+            params = [text, text, _max_candidates()]
+        else:
+            return InvertedIndexBackend().rank(query)
+
+        try:
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.execute(sql, params)
+                rows = cursor.fetchall()
+        except DatabaseError:
+            logger.warning("Full-text search unavailable; using the inverted index.", exc_info=True)
+            return InvertedIndexBackend().rank(query)
+
+        return _blend(
+            {content_id: float(score) for content_id, score, _ in rows},
+            {content_id: popularity for content_id, _, popularity in rows},
+        )
+
+
+BACKENDS = {
+    InvertedIndexBackend.name: InvertedIndexBackend,
+    DatabaseFullTextBackend.name: DatabaseFullTextBackend,
+}
+
+
+def get_backend():
+    name = getattr(settings, "SEARCH_BACKEND", InvertedIndexBackend.name)
+    try:
+        return BACKENDS[name]()
+    except KeyError:
+        raise ValueError(f"Unknown SEARCH_BACKEND {name!r}; expected one of {sorted(BACKENDS)}.")
@@ -0,0 +1,144 @@
+"""
+Keeps the search index in step with Content.
+
+Every content save, tag change, genre rename or artist rename re-tokenizes the
+affected items into SearchDocument/SearchPosting rows. Visibility is not
+stored in the index; queries join back to Content so bulk approval updates
+that bypass signals are still respected.
+"""
+import re
+import unicodedata
+from collections import Counter
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_save, pre_save
+from django.dispatch import receiver
+
+from content.models import Content, Genre
+
+from .models import SearchDocument, SearchPosting
+
+
+FIELD_WEIGHTS = {
+    "title": 3.0,
+    "tags": 2.0,
+    "genre": 2.0,
+    "artist": 2.0,
+    "description": 1.0,
+}
+MAX_TERM_LENGTH = 64
+STOP_WORDS = frozenset(
+    "a an and are as at be by for from has in is it its of on or that the to was were will with".split()
+)
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def normalize(text):
+    text = unicodedata.normalize("NFKD", text or "")
+    return "".join(char for char in text if not unicodedata.combining(char)).lower()
+
+
+def tokenize(text):
+    """
+    Split text into lowercase, accent-folded index terms without stop words.
+    """
+    return [
+        token[:MAX_TERM_LENGTH]
+        for token in _TOKEN_RE.findall(normalize(text))
+        if token not in STOP_WORDS and (len(token) > 1 or token.isdigit())
+    ]
+
+
+def _fields(content):
+    return {
+        "title": content.title or "",
+        "tags": " ".join(content.tags.names()),
+        "genre": content.genre.name if content.genre_id else "",
+        "artist": content.artist.username,
+        "description": content.description or "",
+    }
+
+
+def index_content(content):
+    """
+    Rebuild the index rows for one content item.
+    """
+    fields = _fields(content)
+    weights = Counter()
+    for field, text in fields.items():
+        for token in tokenize(text):
+            weights[token] += FIELD_WEIGHTS[field]
+
+    body = " ".join(fields[field] for field in ("tags", "genre", "artist", "description") if fields[field])
+    with transaction.atomic():
+        SearchDocument.objects.update_or_create(
+            content=content,
+            defaults={
+                "title": fields["title"][:255],
+                "body": body,
+                "length": float(sum(weights.values())),
+            },
+        )
+        SearchPosting.objects.filter(content=content).delete()
+        SearchPosting.objects.bulk_create(
+            [SearchPosting(term=term, content=content, weight=weight) for term, weight in weights.items()]
+        )
+    return len(weights)
+
+
+def rebuild_index(chunk_size=200):
+    """
+    Re-index every content item in primary-key chunks. Returns items indexed.
+    """
+    indexed = 0
+    last_pk = 0
+    queryset = Content.objects.select_related("artist", "genre").prefetch_related("tags").order_by("pk")
+    while True:
+        batch = list(queryset.filter(pk__gt=last_pk)[:chunk_size])
+        if not batch:
+            return indexed
+        for content in batch:
+            index_content(content)
+        indexed += len(batch)
+        last_pk = batch[-1].pk
+
+
+@receiver(post_save, sender=Content)
+def index_saved_content(sender, instance, raw=False, **kwargs):
+    if not raw:
+        index_content(instance)
+
+
+@receiver(m2m_changed, sender=Content.tags.through)
+def index_retagged_content(sender, instance, action, **kwargs):
+    if action in {"post_add", "post_remove", "post_clear"} and isinstance(instance, Content):
+        index_content(instance)
+
+
+@receiver(post_save, sender=Genre)
+def index_renamed_genre(sender, instance, created, raw=False, **kwargs):
+    if raw or created:
+        return
+    for content in instance.contents.select_related("artist", "genre"):
+        index_content(content)
+
+
+@receiver(pre_save, sender=get_user_model())
+def remember_previous_username(sender, instance, raw=False, update_fields=None, **kwargs):
+    # Logins save last_login with update_fields; only a username change matters.
+    instance._search_previous_username = None
+    if raw or not instance.pk or (update_fields is not None and "username" not in update_fields):
+        return
+    instance._search_previous_username = (
+        sender.objects.filter(pk=instance.pk).values_list("username", flat=True).first()
+    )
+
+
+@receiver(post_save, sender=get_user_model())
+def index_renamed_artist(sender, instance, created, raw=False, **kwargs):
+    previous = getattr(instance, "_search_previous_username", None)
+    if raw or created or previous is None or previous == instance.username:
+        return
+    for content in Content.objects.filter(artist=instance).select_related("artist", "genre"):
+        index_content(content)
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from search.indexing import rebuild_index
+
+
+class Command(BaseCommand):
+    help = "Re-tokenize every content item into the search index."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--chunk-size",
+            default=200,
+            type=int,
+            help="Number of content rows indexed per batch (default: 200).",
+        )
+
+    def handle(self, *args, **options):
+        indexed = rebuild_index(chunk_size=options["chunk_size"])
+        self.stdout.write(self.style.SUCCESS(f"Indexed {indexed} content item(s)."))
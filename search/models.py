@@ -1,3 +1,38 @@
 from django.db import models
 
-# Create your models here.
+from content.models import Content
+
+
+class SearchDocument(models.Model):
+    """
+    Indexed text for one content item. The inverted-index backend uses
+    `length` for BM25 normalisation; the database full-text backends match
+    against `title` and `body` directly.
+    """
+    content = models.OneToOneField(Content, on_delete=models.CASCADE, related_name='search_document')
+    title = models.CharField(max_length=255, blank=True)
+    body = models.TextField(blank=True)
+    length = models.FloatField(default=0)
+    indexed_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Search document for {self.content_id}"
+
+
+class SearchPosting(models.Model):
+    """
+    One (term, content) entry of the inverted index with its field-weighted
+    term frequency.
+    """
+    term = models.CharField(max_length=64)
+    content = models.ForeignKey(Content, on_delete=models.CASCADE, related_name='search_postings')
+    weight = models.FloatField()
+
+    class Meta:
+        unique_together = ('term', 'content')
+        indexes = [
+            models.Index(fields=['term', '-weight'], name='search_posting_term_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.term} -> {self.content_id} ({self.weight})"
@@ -0,0 +1,20 @@
+from django.conf import settings
+from django.core.paginator import Paginator
+
+from content.models import Content
+
+from .backends import get_backend
+
+
+def search_content(query, page=1, per_page=None):
+    """
+    Return a Page of public Content ranked by text relevance and popularity.
+    Only the requested page is loaded from the content table.
+    """
+    per_page = per_page or int(getattr(settings, "SEARCH_RESULTS_PER_PAGE", 20))
+    ranked_ids = [content_id for content_id, _ in get_backend().rank(query or "")]
+    page_obj = Paginator(ranked_ids, per_page).get_page(page)
+
+    items_by_id = Content.objects.select_related("artist", "genre").in_bulk(list(page_obj.object_list))
+    page_obj.object_list = [items_by_id[content_id] for content_id in page_obj.object_list if content_id in items_by_id]
+    return page_obj
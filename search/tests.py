@@ -1,3 +1,272 @@
-from django.test import TestCase
+from io import StringIO
+from unittest import mock
+import shutil
+import tempfile
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import DatabaseError, transaction
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from content.models import Content, Genre
+from users.models import CustomUser, Role
+
+from . import typeahead
+from .indexing import tokenize
+from .models import SearchDocument, SearchPosting
+from .services import search_content
+
+
+def sample_upload_file(filename="test.mp4", content_type="video/mp4"):
+    return SimpleUploadedFile(filename, b"fake-video-content", content_type=content_type)
+
+
+class SearchIndexTest(TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp(prefix="media-")
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        settings_override = self.settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.artist = CustomUser.objects.create_user(
+            username="search_artist",
+            password="password",
+            role=Role.ARTIST,
+        )
+        self.genre = Genre.objects.create(name="Afrobeat")
+        self.exact = Content.objects.create(
+            title="Sunset Highlife Groove",
+            description="Guitar lines over a slow groove.",
+            artist=self.artist,
+            genre=self.genre,
+            file=sample_upload_file(filename="search_exact.mp4"),
+            is_approved=True,
+        )
+        self.partial = Content.objects.create(
+            title="Morning Session",
+            description="A long improvised jam that drifts into a groove near the end.",
+            artist=self.artist,
+            file=sample_upload_file(filename="search_partial.mp4"),
+            is_approved=True,
+        )
+        self.hidden = Content.objects.create(
+            title="Hidden Groove",
+            artist=self.artist,
+            file=sample_upload_file(filename="search_hidden.mp4"),
+            is_approved=False,
+        )
+
+    def test_tokenize_folds_case_accents_and_stop_words(self):
+        self.assertEqual(tokenize("The Café of Lagos, 2024!"), ["cafe", "lagos", "2024"])
+
+    def test_signals_index_fields_and_follow_tag_genre_and_artist_changes(self):
+        self.exact.tags.add("Palmwine")
+        self.genre.name = "Juju"
+        self.genre.save()
+        self.artist.username = "renamed_artist"
+        self.artist.save()
+
+        terms = set(SearchPosting.objects.filter(content=self.exact).values_list("term", flat=True))
+        self.assertTrue({"sunset", "groove", "palmwine", "juju", "renamed_artist"} <= terms)
+        self.assertNotIn("afrobeat", terms)
+        self.assertEqual(SearchDocument.objects.get(content=self.exact).title, "Sunset Highlife Groove")
+
+    def test_bm25_ranks_title_matches_first_and_hides_unpublished_content(self):
+        page = search_content("groove")
+
+        self.assertEqual([item.pk for item in page], [self.exact.pk, self.partial.pk])
+
+    def test_popularity_breaks_close_text_scores(self):
+        twin = Content.objects.create(
+            title="Sunset Highlife Groove",
+            description="Guitar lines over a slow groove.",
+            artist=self.artist,
+            genre=self.genre,
+            file=sample_upload_file(filename="search_twin.mp4"),
+            is_approved=True,
+        )
+        Content.objects.filter(pk=twin.pk).update(view_count=50)
+
+        self.assertEqual(search_content("sunset groove")[0].pk, twin.pk)
+
+    def test_results_are_paginated(self):
+        page = search_content("groove", page=2, per_page=1)
+
+        self.assertEqual(page.paginator.count, 2)
+        self.assertEqual([item.pk for item in page], [self.partial.pk])
+
+    @override_settings(SEARCH_BACKEND="database")
+    def test_database_backend_uses_full_text_index(self):
+        with self.assertNoLogs("search.backends", level="WARNING"):
+            page = search_content("highlife")
+
+        self.assertEqual([item.pk for item in page], [self.exact.pk])
+
+    def test_rebuild_command_reindexes_everything(self):
+        SearchPosting.objects.all().delete()
+        out = StringIO()
+
+        call_command("rebuild_search_index", stdout=out)
+
+        self.assertIn("Indexed 3 content item(s).", out.getvalue())
+        self.assertEqual(search_content("sunset")[0].pk, self.exact.pk)
+
+    def test_search_results_page_uses_ranked_search(self):
+        response = self.client.get(reverse("search_results"), {"q": "groove"})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [item.pk for item in response.context["content"]],
+            [self.exact.pk, self.partial.pk],
+        )
+        self.assertNotContains(response, "Hidden Groove")
+
+
+class TypeaheadTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        media_root = tempfile.mkdtemp(prefix="media-")
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        settings_override = self.settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.artist = CustomUser.objects.create_user(
+            username="palmwine_artist",
+            password="password",
+            role=Role.ARTIST,
+        )
+        self.fan = CustomUser.objects.create_user(username="palmer_fan", password="password", role=Role.FAN)
+        self.admin = CustomUser.objects.create_user(username="typeahead_admin", password="password", role=Role.ADMIN)
+        self.genre = Genre.objects.create(name="Palmwine Highlife")
+        self.content = Content.objects.create(
+            title="The Palm Grove Sessions",
+            artist=self.artist,
+            genre=self.genre,
+            file=sample_upload_file(filename="typeahead.mp4"),
+            is_approved=True,
+        )
+        self.content.tags.add("palmtree")
+        Content.objects.create(
+            title="Palm Secret",
+            artist=self.artist,
+            file=sample_upload_file(filename="typeahead_hidden.mp4"),
+            is_approved=False,
+        )
+        typeahead.warm_index()
+
+    def labels(self, prefix, **kwargs):
+        return [(kind, label) for kind, _id, label, _weight, _extra in typeahead.suggest(prefix, **kwargs)]
+
+    def test_prefix_matches_any_word_start_without_queries(self):
+        with self.assertNumQueries(0):
+            results = self.labels("pal")
+
+        self.assertEqual(
+            results,
+            [
+                ("content", "The Palm Grove Sessions"),
+                ("artist", "palmwine_artist"),
+                ("genre", "Palmwine Highlife"),
+                ("tag", "palmtree"),
+            ],
+        )
+        self.assertEqual(self.labels("grove s"), [("content", "The Palm Grove Sessions")])
+        self.assertEqual(self.labels("highl"), [("genre", "Palmwine Highlife")])
+
+    def test_signals_patch_the_index_incrementally(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.content.title = "Lagos Nights"
+            self.content.save()
+            Content.objects.filter(title="Palm Secret").get().delete()
+            CustomUser.objects.create_user(username="palmsy", password="password", role=Role.ARTIST)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self.labels("lagos"), [("content", "Lagos Nights")])
+            self.assertEqual(self.labels("palm", kinds=("content", "artist")), [
+                ("artist", "palmsy"),
+                ("artist", "palmwine_artist"),
+            ])
+
+    def test_rolled_back_saves_never_reach_the_index(self):
+        try:
+            with transaction.atomic():
+                self.content.title = "Abandoned Title"
+                self.content.save()
+                raise DatabaseError("rolled back")
+        except DatabaseError:
+            pass
+
+        self.assertEqual(self.labels("abandoned"), [])
+        self.assertEqual(self.labels("grove"), [("content", "The Palm Grove Sessions")])
+
+    def test_bulk_admin_actions_patch_the_index(self):
+        from django.contrib.admin.sites import AdminSite
+        from content.admin import ContentAdmin
+
+        secret = Content.objects.get(title="Palm Secret")
+        admin = ContentAdmin(Content, AdminSite())
+        version = cache.get(typeahead.TYPEAHEAD_VERSION_KEY)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            admin.approve_content(None, Content.objects.filter(pk=secret.pk))
+        self.assertEqual(self.labels("secret"), [("content", "Palm Secret")])
+        self.assertGreater(cache.get(typeahead.TYPEAHEAD_VERSION_KEY), version)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            admin.hide_content(None, Content.objects.filter(pk=self.content.pk))
+        self.assertEqual(self.labels("grove"), [])
+
+        self.client.force_login(self.admin)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse("admin_dashboard"), {"action": "disapprove", "content_ids": [secret.pk]})
+        self.assertEqual(self.labels("secret"), [])
+
+    def test_lookups_see_a_consistent_index_while_it_is_patched(self):
+        index = typeahead.PrefixIndex.from_entries([("genre", 1, "Alpha Beat", 0, None)])
+        keys, entries = index._rows
+
+        index.put("genre", 2, "Alpha Wave")
+        index.discard("genre", 1)
+
+        # The pair a reader picked up earlier is never changed in place.
+        self.assertEqual(len(keys), len(entries))
+        self.assertEqual([entry[2] for entry in entries], ["Alpha Beat", "Alpha Beat"])
+        self.assertEqual([entry[2] for entry in index.lookup("alpha", {"genre"}, 5)], ["Alpha Wave"])
+
+    def test_other_process_changes_are_picked_up_on_version_change(self):
+        Content.objects.filter(pk=self.content.pk).update(title="Quiet Update")
+        self.assertEqual(self.labels("quiet"), [])
+
+        cache.incr(typeahead.TYPEAHEAD_VERSION_KEY)
+        with self.settings(TYPEAHEAD_REFRESH_SECONDS=0), mock.patch.object(typeahead, "_start_refresh") as refresh:
+            # The request keeps the old index and leaves the rebuild to a thread.
+            with self.assertNumQueries(0):
+                self.assertEqual(self.labels("quiet"), [])
+            refresh.assert_called_once_with()
+        typeahead.refresh_index()
+        self.assertEqual(self.labels("quiet"), [("content", "Quiet Update")])
+
+    def test_endpoint_returns_public_kinds_and_user_kind_only_to_admins(self):
+        url = reverse("search:autocomplete")
+
+        response = self.client.get(url, {"q": "palm", "kinds": "user,artist"})
+        self.assertEqual(
+            [(item["kind"], item["label"]) for item in response.json()["results"]],
+            [("artist", "palmwine_artist")],
+        )
+
+        self.client.force_login(self.admin)
+        response = self.client.get(url, {"q": "palm", "kinds": "user", "role": Role.FAN})
+        self.assertEqual(
+            response.json()["results"],
+            [
+                {
+                    "kind": "user",
+                    "id": self.fan.pk,
+                    "label": "palmer_fan",
+                    "url": reverse("user_profile", args=[self.fan.pk]),
+                }
+            ],
+        )
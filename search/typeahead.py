@@ -0,0 +1,402 @@
+"""
+In-memory prefix index for autocomplete.
+
+Every process holds sorted arrays of normalized keys (each label plus every
+word-start suffix of it) and answers prefix lookups with bisect, so a
+keystroke never reaches the database. Committed changes (signals, and
+refresh_content_entries for bulk updates) patch the local index and bump a
+shared cache version; other processes notice the new version
+within TYPEAHEAD_REFRESH_SECONDS and rebuild from the database in a
+background thread, serving the index they have until the new one is ready.
+"""
+import bisect
+import logging
+import re
+import threading
+import time
+from operator import itemgetter
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import DatabaseError, connections, transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from taggit.models import Tag
+
+from content.models import Content, Genre
+from users.models import Role
+
+from .indexing import normalize, tokenize
+
+
+logger = logging.getLogger(__name__)
+
+TYPEAHEAD_VERSION_KEY = "search:typeahead:version"
+PUBLIC_KINDS = ("content", "artist", "genre", "tag")
+ADMIN_KINDS = ("user",)
+KIND_PRIORITY = {"content": 0, "artist": 1, "genre": 2, "tag": 3, "user": 4}
+SCAN_LIMIT = 256
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def _refresh_seconds():
+    return max(0, int(getattr(settings, "TYPEAHEAD_REFRESH_SECONDS", 30)))
+
+
+def _keys(label):
+    words = tokenize(label)
+    return {" ".join(words[index:]) for index in range(len(words))} or {normalize(label).strip()} - {""}
+
+
+def _prefix_key(text):
+    """
+    Normalize typed text like the index keys, keeping the last (partial) word
+    even when it is short or looks like a stop word.
+    """
+    words = _WORD_RE.findall(normalize(text))
+    if not words:
+        return ""
+    kept = [word for word in words[:-1] if word in tokenize(word)]
+    return " ".join(kept + [words[-1]])
+
+
+class PrefixIndex:
+    """
+    Sorted (key, entry) arrays with bisect lookups. An entry is
+    (kind, object_id, label, weight, extra).
+
+    Lookups run without a lock, so writers never change the arrays in place:
+    put/discard build new ones and swap the (keys, entries) pair in a single
+    assignment (copy-on-write). Writers are serialized by the module lock.
+    """
+
+    def __init__(self):
+        self._rows = ([], [])
+        self._by_object = {}
+
+    def __len__(self):
+        return len(self._by_object)
+
+    @classmethod
+    def from_entries(cls, entries):
+        """
+        Build an index from (kind, object_id, label, weight, extra) entries
+        with a single sort instead of one insert per key.
+        """
+        index = cls()
+        unique = {}
+        for entry in entries:
+            unique[entry[:2]] = entry
+        pairs = []
+        for entry in unique.values():
+            keys = sorted(_keys(entry[2]))
+            pairs.extend((key, entry) for key in keys)
+            index._by_object[entry[:2]] = (keys, entry)
+        pairs.sort(key=itemgetter(0))
+        index._rows = ([key for key, _entry in pairs], [entry for _key, entry in pairs])
+        return index
+
+    def _remove(self, keys, entries, kind, object_id):
+        existing = self._by_object.pop((kind, object_id), None)
+        if not existing:
+            return
+        old_keys, entry = existing
+        for key in old_keys:
+            position = bisect.bisect_left(keys, key)
+            while position < len(keys) and keys[position] == key:
+                if entries[position] is entry:
+                    del keys[position]
+                    del entries[position]
+                    break
+                position += 1
+
+    def put(self, kind, object_id, label, weight=0, extra=None):
+        keys, entries = list(self._rows[0]), list(self._rows[1])
+        self._remove(keys, entries, kind, object_id)
+        entry = (kind, object_id, label, weight, extra)
+        new_keys = sorted(_keys(label))
+        for key in new_keys:
+            position = bisect.bisect_right(keys, key)
+            keys.insert(position, key)
+            entries.insert(position, entry)
+        self._by_object[(kind, object_id)] = (new_keys, entry)
+        self._rows = (keys, entries)
+
+    def discard(self, kind, object_id):
+        if (kind, object_id) not in self._by_object:
+            return
+        keys, entries = list(self._rows[0]), list(self._rows[1])
+        self._remove(keys, entries, kind, object_id)
+        self._rows = (keys, entries)
+
+    def lookup(self, prefix, kinds, limit, role=None):
+        prefix = _prefix_key(prefix)
+        if not prefix:
+            return []
+
+        keys, entries = self._rows
+        matches = {}
+        position = bisect.bisect_left(keys, prefix)
+        end = min(len(keys), position + SCAN_LIMIT)
+        while position < end and keys[position].startswith(prefix):
+            kind, object_id, label, weight, extra = entry = entries[position]
+            position += 1
+            if kind not in kinds or (role and kind == "user" and extra != role):
+                continue
+            matches[(kind, object_id)] = entry
+
+        ranked = sorted(
+            matches.values(),
+            key=lambda entry: (KIND_PRIORITY[entry[0]], -entry[3], entry[2].lower()),
+        )
+        return ranked[:limit]
+
+
+_lock = threading.Lock()
+_index = None
+_loaded_version = None
+_checked_at = 0.0
+_rebuilding = False
+
+
+def _current_version():
+    version = cache.get(TYPEAHEAD_VERSION_KEY)
+    if version is None:
+        cache.add(TYPEAHEAD_VERSION_KEY, 1, timeout=None)
+        version = cache.get(TYPEAHEAD_VERSION_KEY, 1)
+    return version
+
+
+def _bump_version():
+    try:
+        return cache.incr(TYPEAHEAD_VERSION_KEY)
+    except ValueError:
+        cache.add(TYPEAHEAD_VERSION_KEY, 1, timeout=None)
+        return cache.get(TYPEAHEAD_VERSION_KEY, 1)
+
+
+def _public_content():
+    return Content.objects.filter(is_approved=True, is_visible=True)
+
+
+def _index_entries():
+    for content_id, title, view_count, vote_sum in _public_content().values_list(
+        "id", "title", "view_count", "vote_sum"
+    ):
+        yield ("content", content_id, title, view_count + vote_sum, None)
+    for user_id, username, role in get_user_model().objects.exclude(role=Role.ADMIN).values_list(
+        "id", "username", "role"
+    ):
+        yield ("user", user_id, username, 0, role)
+        if role == Role.ARTIST:
+            yield ("artist", user_id, username, 0, None)
+    for genre_id, name in Genre.objects.values_list("id", "name"):
+        yield ("genre", genre_id, name, 0, None)
+    for tag_id, name in (
+        Tag.objects.filter(
+            taggit_taggeditem_items__content_type__app_label="content",
+            taggit_taggeditem_items__object_id__in=_public_content().values("id"),
+        )
+        .distinct()
+        .values_list("id", "name")
+    ):
+        yield ("tag", tag_id, name, 0, None)
+
+
+def build_index():
+    return PrefixIndex.from_entries(_index_entries())
+
+
+def warm_index():
+    """
+    Build the process-local index now (called at startup and on version change).
+    """
+    global _index, _loaded_version, _checked_at
+    version = _current_version()
+    index = build_index()
+    with _lock:
+        _index, _loaded_version, _checked_at = index, version, time.monotonic()
+    return index
+
+
+def warm_on_startup():
+    """
+    Warm the index from the WSGI/ASGI entry point. A missing table (e.g.
+    before migrate) only means the first request builds it instead.
+    """
+    if not getattr(settings, "TYPEAHEAD_WARM_ON_STARTUP", True):
+        return
+    try:
+        warm_index()
+    except DatabaseError:
+        logger.warning("Could not warm the typeahead index at startup.", exc_info=True)
+
+
+def refresh_index():
+    """
+    Rebuild after another process changed the data; requests keep using the
+    previous index meanwhile.
+    """
+    global _rebuilding
+    try:
+        warm_index()
+    except DatabaseError:
+        logger.exception("Could not rebuild the typeahead index.")
+    finally:
+        with _lock:
+            _rebuilding = False
+
+
+def _refresh_in_thread():
+    try:
+        refresh_index()
+    finally:
+        connections.close_all()
+
+
+def _start_refresh():
+    global _rebuilding
+    with _lock:
+        if _rebuilding:
+            return
+        _rebuilding = True
+    threading.Thread(target=_refresh_in_thread, name="typeahead-refresh", daemon=True).start()
+
+
+def get_index():
+    global _checked_at
+    if _index is None:
+        return warm_index()
+    if time.monotonic() - _checked_at >= _refresh_seconds():
+        _checked_at = time.monotonic()
+        if _current_version() != _loaded_version:
+            _start_refresh()
+    return _index
+
+
+def suggest(prefix, kinds=PUBLIC_KINDS, limit=8, role=None):
+    return get_index().lookup(prefix, set(kinds), limit, role=role)
+
+
+def _patch(apply):
+    """
+    Apply an incremental change once the surrounding transaction commits, so
+    rolled-back writes never reach the index.
+    """
+    transaction.on_commit(lambda: _apply_patch(apply))
+
+
+def _apply_patch(apply):
+    """
+    Apply an incremental change locally and advertise it to other processes.
+    """
+    global _loaded_version
+    version = _bump_version()
+    with _lock:
+        if _index is None:
+            return
+        apply(_index)
+        if _loaded_version is not None and version == _loaded_version + 1:
+            _loaded_version = version
+
+
+@receiver(post_save, sender=Content)
+def refresh_content_entry(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+
+    def apply(index):
+        if instance.is_approved and instance.is_visible:
+            index.put("content", instance.id, instance.title, instance.view_count + instance.vote_sum)
+        else:
+            index.discard("content", instance.id)
+
+    _patch(apply)
+
+
+def refresh_content_entries(content_ids):
+    """
+    Re-index content changed with queryset.update() (admin and dashboard bulk
+    actions), which sends no post_save. Runs once the transaction commits.
+    """
+    content_ids = sorted({int(pk) for pk in content_ids if str(pk).isdigit()})
+    if not content_ids:
+        return
+
+    def refresh():
+        public = {
+            content_id: (title, view_count + vote_sum)
+            for content_id, title, view_count, vote_sum in _public_content()
+            .filter(pk__in=content_ids)
+            .values_list("id", "title", "view_count", "vote_sum")
+        }
+
+        def apply(index):
+            for content_id in content_ids:
+                if content_id in public:
+                    index.put("content", content_id, *public[content_id])
+                else:
+                    index.discard("content", content_id)
+
+        _apply_patch(apply)
+
+    transaction.on_commit(refresh)
+
+
+@receiver(post_delete, sender=Content)
+def drop_content_entry(sender, instance, **kwargs):
+    _patch(lambda index: index.discard("content", instance.id))
+
+
+@receiver(m2m_changed, sender=Content.tags.through)
+def refresh_tag_entries(sender, instance, action, pk_set, **kwargs):
+    # Tags are only ever added incrementally; stale ones fall out on rebuild.
+    if action != "post_add" or not pk_set or not isinstance(instance, Content):
+        return
+    if not (instance.is_approved and instance.is_visible):
+        return
+    tags = list(Tag.objects.filter(pk__in=pk_set).values_list("id", "name"))
+
+    def apply(index):
+        for tag_id, name in tags:
+            index.put("tag", tag_id, name)
+
+    _patch(apply)
+
+
+@receiver(post_save, sender=Genre)
+def refresh_genre_entry(sender, instance, raw=False, **kwargs):
+    if not raw:
+        _patch(lambda index: index.put("genre", instance.id, instance.name))
+
+
+@receiver(post_delete, sender=Genre)
+def drop_genre_entry(sender, instance, **kwargs):
+    _patch(lambda index: index.discard("genre", instance.id))
+
+
+@receiver(post_save, sender=get_user_model())
+def refresh_user_entry(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw or (update_fields is not None and not {"username", "role"} & set(update_fields)):
+        return
+
+    def apply(index):
+        index.discard("user", instance.id)
+        index.discard("artist", instance.id)
+        if instance.role == Role.ADMIN:
+            return
+        index.put("user", instance.id, instance.username, extra=instance.role)
+        if instance.role == Role.ARTIST:
+            index.put("artist", instance.id, instance.username)
+
+    _patch(apply)
+
+
+@receiver(post_delete, sender=get_user_model())
+def drop_user_entry(sender, instance, **kwargs):
+    def apply(index):
+        index.discard("user", instance.id)
+        index.discard("artist", instance.id)
+
+    _patch(apply)
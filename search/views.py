@@ -1,3 +1,61 @@
-from django.shortcuts import render
+from urllib.parse import urlencode
 
-# Create your views here.
+from django.http import JsonResponse
+from django.urls import reverse
+from django.views.decorators.http import require_GET
+
+from users.models import Role
+
+from .typeahead import ADMIN_KINDS, PUBLIC_KINDS, suggest
+
+
+MAX_SUGGESTIONS = 20
+DEFAULT_SUGGESTIONS = 8
+
+
+def _suggestion_url(kind, object_id, label):
+    if kind == "content":
+        return reverse("content_detail", args=[object_id])
+    if kind in {"artist", "user"}:
+        return reverse("user_profile", args=[object_id])
+    return f"{reverse('search_results')}?{urlencode({'q': label})}"
+
+
+@require_GET
+def autocomplete(request):
+    """
+    Prefix suggestions from the in-memory typeahead index as JSON.
+
+    `kinds` is a comma-separated subset of content, artist, genre, tag and
+    (admins only) user; `role` narrows user suggestions to one role.
+    """
+    query = request.GET.get("q", "").strip()
+    allowed = set(PUBLIC_KINDS)
+    if request.user.is_authenticated and request.user.is_admin():
+        allowed |= set(ADMIN_KINDS)
+
+    requested = {kind.strip() for kind in request.GET.get("kinds", "").split(",") if kind.strip()}
+    kinds = (requested & allowed) if requested else set(PUBLIC_KINDS)
+
+    try:
+        limit = int(request.GET.get("limit", DEFAULT_SUGGESTIONS))
+    except ValueError:
+        limit = DEFAULT_SUGGESTIONS
+    limit = max(1, min(limit, MAX_SUGGESTIONS))
+
+    role = request.GET.get("role")
+    if role not in {Role.ARTIST, Role.FAN}:
+        role = None
+
+    results = []
+    if query and kinds:
+        results = [
+            {
+                "kind": kind,
+                "id": object_id,
+                "label": label,
+                "url": _suggestion_url(kind, object_id, label),
+            }
+            for kind, object_id, label, _weight, _extra in suggest(query, kinds=kinds, limit=limit, role=role)
+        ]
+    return JsonResponse({"query": query, "results": results})
@@ -15,6 +15,25 @@
     button.setAttribute("aria-expanded", isOpen ? "true" : "false");
   }
 
+  // Queued ingestion acknowledges first; wait for the worker's verdict.
+  async function awaitQueuedVote(statusUrl) {
+    for (let attempt = 0; attempt < 15; attempt += 1) {
+      await new Promise(function (resolve) {
+        setTimeout(resolve, 1000);
+      });
+      try {
+        const response = await fetch(statusUrl, { credentials: "same-origin" });
+        const data = await response.json();
+        if (data.status !== "pending") {
+          return data;
+        }
+      } catch (error) {
+        console.error("Error checking vote status:", error);
+      }
+    }
+    return { status: "pending" };
+  }
+
   async function submitDetailVote(button, contentId) {
     const voteValue = parseInt(button.dataset.value, 10);
     const voteUrl = button.dataset.url;
@@ -76,6 +95,20 @@
             inboxLink.textContent = "Inbox";
             messageElem.appendChild(inboxLink);
           }
+        } else if (data.provisional && data.status_url) {
+          const outcome = await awaitQueuedVote(data.status_url);
+          if (outcome.status === "rejected") {
+            messageElem.className = "small mt-2 mb-0 text-danger";
+            messageElem.textContent = outcome.message || "Vote failed.";
+            optionButtons.forEach((optionButton) => {
+              optionButton.disabled = false;
+            });
+          } else {
+            if (outcome.message) {
+              messageElem.textContent = outcome.message;
+            }
+            window.location.reload();
+          }
         } else {
           setTimeout(function () {
             window.location.reload();
@@ -116,6 +149,83 @@
     }
   });
 
+  function renderLiveComment(list, comment) {
+    if (list.querySelector('[data-comment-id="' + comment.id + '"]')) {
+      return;
+    }
+    const item = document.createElement("div");
+    item.className = "watch-comment-item";
+    item.dataset.commentId = comment.id;
+    const body = document.createElement("div");
+    body.className = "comment-content";
+    const meta = document.createElement("p");
+    meta.className = "watch-comment-meta";
+    const link = document.createElement("a");
+    link.href = list.dataset.profileUrl.replace(/0\/$/, comment.user_id + "/");
+    const name = document.createElement("strong");
+    name.textContent = comment.user;
+    link.appendChild(name);
+    const time = document.createElement("small");
+    time.textContent = new Date(comment.timestamp).toLocaleString();
+    meta.append(link, " ", time);
+    const text = document.createElement("p");
+    text.className = "watch-comment-text";
+    text.textContent = comment.text;
+    body.append(meta, text);
+    item.appendChild(body);
+    list.querySelector(".watch-empty")?.remove();
+    list.prepend(item);
+  }
+
+  function applyLiveUpdate(list, update) {
+    const setText = function (selector, value) {
+      document.querySelectorAll(selector).forEach(function (element) {
+        element.textContent = value;
+      });
+    };
+    setText('.view-count[data-content-id="' + update.content_id + '"]', update.views);
+    setText(".watch-stats .vote-count", update.votes);
+    setText(".watch-stats .average-vote", update.average_vote);
+    setText(".watch-comments .comment-count", update.comment_count);
+    const watching = document.querySelector(".watch-stats .watching-count");
+    if (watching) {
+      watching.hidden = update.watching < 2;
+      watching.querySelector("[data-watching-count]").textContent = update.watching;
+    }
+    (update.comments || []).forEach(function (comment) {
+      renderLiveComment(list, comment);
+    });
+  }
+
+  // Vote totals, view counts and new comments pushed by the content socket.
+  function connectLiveUpdates(list, attempt) {
+    const protocol = window.location.protocol === "https:" ? "wss" : "ws";
+    const socket = new WebSocket(protocol + "://" + window.location.host + list.dataset.liveUpdatesUrl);
+    socket.addEventListener("open", function () {
+      attempt = 0;
+    });
+    socket.addEventListener("message", function (event) {
+      try {
+        applyLiveUpdate(list, JSON.parse(event.data));
+      } catch (error) {
+        console.error("Error applying live update:", error);
+      }
+    });
+    socket.addEventListener("close", function (event) {
+      if (event.code === 4403 || attempt >= 5) {
+        return;
+      }
+      setTimeout(function () {
+        connectLiveUpdates(list, attempt + 1);
+      }, 2000 * (attempt + 1));
+    });
+  }
+
+  const liveList = document.querySelector("[data-live-updates-url]");
+  if (liveList && "WebSocket" in window) {
+    connectLiveUpdates(liveList, 0);
+  }
+
   window.toggleDetailVoting = toggleDetailVoting;
   window.submitDetailVote = submitDetailVote;
 })();
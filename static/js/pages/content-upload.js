@@ -35,6 +35,117 @@
     }
   }
 
+  const CHUNK_SIZE = 5 * 1024 * 1024;
+  const MAX_RETRIES = 5;
+
+  function showUploadError(form, message) {
+    let alert = form.querySelector("[data-upload-error]");
+    if (!alert) {
+      alert = document.createElement("div");
+      alert.className = "alert alert-danger upload-non-field-errors";
+      alert.setAttribute("role", "alert");
+      alert.setAttribute("data-upload-error", "");
+      form.insertBefore(alert, form.firstElementChild);
+    }
+    alert.textContent = message;
+  }
+
+  function errorText(payload) {
+    if (payload.errors) {
+      return Object.keys(payload.errors)
+        .map(function (field) {
+          return payload.errors[field].join(" ");
+        })
+        .join(" ");
+    }
+    return payload.message || "Upload failed. Please try again.";
+  }
+
+  function wait(ms) {
+    return new Promise(function (resolve) {
+      window.setTimeout(resolve, ms);
+    });
+  }
+
+  // Resumable upload: create a session with the metadata, then PATCH the
+  // file in chunks. A dropped connection resumes from the server's offset,
+  // and the session URL is remembered so a reload can pick it up again.
+  async function resumableUpload(form, file, button) {
+    const csrfToken = form.querySelector("[name=csrfmiddlewaretoken]").value;
+    const storageKey = "gg-upload:" + [file.name, file.size, file.lastModified].join(":");
+    const baseHeaders = { "X-CSRFToken": csrfToken, "Tus-Resumable": "1.0.0" };
+    const label = button.innerHTML;
+
+    async function currentOffset(url) {
+      const response = await fetch(url, { method: "HEAD", headers: baseHeaders, credentials: "same-origin" });
+      return response.ok ? parseInt(response.headers.get("Upload-Offset"), 10) : null;
+    }
+
+    let url = window.localStorage.getItem(storageKey);
+    let offset = url ? await currentOffset(url).catch(function () { return null; }) : null;
+    if (offset === null) {
+      const body = new FormData(form);
+      body.delete("file");
+      body.delete("youtube_url");
+      body.append("upload_filename", file.name);
+      body.append("upload_filetype", file.type);
+      const response = await fetch(form.dataset.resumableUrl, {
+        method: "POST",
+        headers: Object.assign({ "Upload-Length": String(file.size) }, baseHeaders),
+        body: body,
+        credentials: "same-origin",
+      });
+      if (response.status !== 201) {
+        throw new Error(errorText(await response.json().catch(function () { return {}; })));
+      }
+      url = response.headers.get("Location");
+      offset = 0;
+      window.localStorage.setItem(storageKey, url);
+    }
+
+    let retries = 0;
+    while (true) {
+      button.innerHTML = "Uploading " + Math.floor((offset / file.size) * 100) + "%";
+      let response;
+      try {
+        response = await fetch(url, {
+          method: "PATCH",
+          headers: Object.assign(
+            { "Content-Type": "application/offset+octet-stream", "Upload-Offset": String(offset) },
+            baseHeaders
+          ),
+          body: file.slice(offset, offset + CHUNK_SIZE),
+          credentials: "same-origin",
+        });
+      } catch (networkError) {
+        if (++retries > MAX_RETRIES) {
+          button.innerHTML = label;
+          throw new Error("Connection lost. Submit again to resume the upload.");
+        }
+        await wait(1000 * retries);
+        offset = (await currentOffset(url).catch(function () { return null; })) ?? offset;
+        continue;
+      }
+
+      if (response.status === 204) {
+        retries = 0;
+        offset = parseInt(response.headers.get("Upload-Offset"), 10);
+        const done = response.headers.get("Content-Location");
+        if (done) {
+          window.localStorage.removeItem(storageKey);
+          window.location.assign(done);
+          return;
+        }
+      } else if (response.status === 409) {
+        offset = parseInt(response.headers.get("Upload-Offset"), 10);
+      } else {
+        window.localStorage.removeItem(storageKey);
+        button.innerHTML = label;
+        throw new Error(errorText(await response.json().catch(function () { return {}; })));
+      }
+    }
+  }
+
   document.addEventListener("DOMContentLoaded", function () {
     const forms = document.querySelectorAll(".needs-validation");
     Array.prototype.slice.call(forms).forEach(function (form) {
@@ -47,6 +158,21 @@
           }
 
           form.classList.add("was-validated");
+
+          const fileInput = form.querySelector("#id_file");
+          const file = fileInput && fileInput.files && fileInput.files[0];
+          const youtubeInput = form.querySelector("#id_youtube_url");
+          const hasYoutube = Boolean(youtubeInput && youtubeInput.value.trim());
+          if (event.defaultPrevented || !file || hasYoutube || !form.dataset.resumableUrl || !window.fetch) {
+            return;
+          }
+          event.preventDefault();
+          const button = form.querySelector("[type=submit]");
+          button.disabled = true;
+          resumableUpload(form, file, button).catch(function (error) {
+            button.disabled = false;
+            showUploadError(form, error.message);
+          });
         },
         false
       );
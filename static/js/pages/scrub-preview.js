@@ -0,0 +1,108 @@
+(function () {
+  "use strict";
+
+  const videos = document.querySelectorAll("video[data-preview-vtt]");
+  if (!videos.length) {
+    return;
+  }
+
+  // Height of the native control bar, where hovering means scrubbing.
+  const CONTROLS_HEIGHT = 48;
+
+  function parseTimestamp(value) {
+    const parts = value.trim().split(":").map(Number);
+    return parts.reduce(function (total, part) {
+      return total * 60 + part;
+    }, 0);
+  }
+
+  // Cues produced by content/previews.py: "start --> end" then "sprite#xywh=x,y,w,h".
+  function parseVtt(text, baseUrl) {
+    const cues = [];
+    const blocks = text.replace(/\r/g, "").split("\n\n");
+    blocks.forEach(function (block) {
+      const lines = block.trim().split("\n");
+      const timing = lines.findIndex(function (line) {
+        return line.indexOf("-->") !== -1;
+      });
+      if (timing === -1 || !lines[timing + 1]) {
+        return;
+      }
+      const range = lines[timing].split("-->");
+      const target = lines[timing + 1].split("#xywh=");
+      if (target.length !== 2) {
+        return;
+      }
+      const box = target[1].split(",").map(Number);
+      cues.push({
+        start: parseTimestamp(range[0]),
+        end: parseTimestamp(range[1]),
+        url: new URL(target[0], baseUrl).href,
+        x: box[0],
+        y: box[1],
+        width: box[2],
+        height: box[3],
+      });
+    });
+    return cues;
+  }
+
+  function findCue(cues, time) {
+    for (let index = 0; index < cues.length; index += 1) {
+      if (time < cues[index].end) {
+        return cues[index];
+      }
+    }
+    return cues[cues.length - 1];
+  }
+
+  function attach(video, cues) {
+    const frame = video.parentElement;
+    const preview = document.createElement("div");
+    preview.className = "gg-scrub-preview";
+    preview.hidden = true;
+    frame.appendChild(preview);
+
+    video.addEventListener("mousemove", function (event) {
+      const rect = video.getBoundingClientRect();
+      const duration = video.duration || cues[cues.length - 1].end;
+      if (!duration || rect.bottom - event.clientY > CONTROLS_HEIGHT) {
+        preview.hidden = true;
+        return;
+      }
+      const ratio = Math.min(1, Math.max(0, (event.clientX - rect.left) / rect.width));
+      const cue = findCue(cues, ratio * duration);
+      const left = Math.min(rect.width - cue.width, Math.max(0, ratio * rect.width - cue.width / 2));
+      preview.style.width = cue.width + "px";
+      preview.style.height = cue.height + "px";
+      preview.style.left = left + "px";
+      preview.style.backgroundImage = "url(\"" + cue.url + "\")";
+      preview.style.backgroundPosition = -cue.x + "px " + -cue.y + "px";
+      preview.hidden = false;
+    });
+    video.addEventListener("mouseleave", function () {
+      preview.hidden = true;
+    });
+  }
+
+  videos.forEach(function (video) {
+    // Load the index on first hover only; most cards are never scrubbed.
+    video.addEventListener("mouseenter", function () {
+      const url = new URL(video.dataset.previewVtt, window.location.href).href;
+      fetch(url, { credentials: "same-origin" })
+        .then(function (response) {
+          if (!response.ok) {
+            throw new Error("Preview index request failed.");
+          }
+          return response.text();
+        })
+        .then(function (text) {
+          const cues = parseVtt(text, url);
+          if (cues.length) {
+            attach(video, cues);
+          }
+        })
+        .catch(function () {});
+    }, { once: true });
+  });
+})();
@@ -0,0 +1,91 @@
+(function () {
+  "use strict";
+
+  const inputs = document.querySelectorAll("input[data-typeahead-url]");
+  if (!inputs.length) {
+    return;
+  }
+
+  const DEBOUNCE_MS = 120;
+  let listCounter = 0;
+
+  function optionLabel(result) {
+    return result.kind === "content" ? result.label : result.label + " (" + result.kind + ")";
+  }
+
+  inputs.forEach(function (input) {
+    const target = input.dataset.typeaheadTarget ? document.getElementById(input.dataset.typeaheadTarget) : null;
+    const navigate = input.hasAttribute("data-typeahead-navigate");
+    const datalist = document.createElement("datalist");
+    const byLabel = new Map();
+    let timer = null;
+    let controller = null;
+
+    listCounter += 1;
+    datalist.id = "typeahead-list-" + listCounter;
+    input.setAttribute("list", datalist.id);
+    input.setAttribute("autocomplete", "off");
+    input.insertAdjacentElement("afterend", datalist);
+
+    function render(results) {
+      byLabel.clear();
+      datalist.replaceChildren();
+      results.forEach(function (result) {
+        const label = optionLabel(result);
+        const option = document.createElement("option");
+        option.value = label;
+        datalist.appendChild(option);
+        byLabel.set(label, result);
+      });
+    }
+
+    function fetchSuggestions() {
+      const query = input.value.trim();
+      if (!query) {
+        render([]);
+        return;
+      }
+      const params = new URLSearchParams({ q: query });
+      if (input.dataset.typeaheadKinds) {
+        params.set("kinds", input.dataset.typeaheadKinds);
+      }
+      if (input.dataset.typeaheadRole) {
+        params.set("role", input.dataset.typeaheadRole);
+      }
+      if (controller) {
+        controller.abort();
+      }
+      controller = new AbortController();
+      fetch(input.dataset.typeaheadUrl + "?" + params.toString(), {
+        credentials: "same-origin",
+        headers: { Accept: "application/json" },
+        signal: controller.signal,
+      })
+        .then(function (response) {
+          return response.ok ? response.json() : { results: [] };
+        })
+        .then(function (payload) {
+          render(payload.results || []);
+        })
+        .catch(function () {});
+    }
+
+    input.addEventListener("input", function () {
+      const chosen = byLabel.get(input.value);
+      if (chosen) {
+        if (target) {
+          target.value = chosen.id;
+          input.value = chosen.label;
+        } else if (navigate && chosen.url) {
+          window.location.href = chosen.url;
+        }
+        return;
+      }
+      if (target) {
+        target.value = "";
+      }
+      window.clearTimeout(timer);
+      timer = window.setTimeout(fetchSuggestions, DEBOUNCE_MS);
+    });
+  });
+})();
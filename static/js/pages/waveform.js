@@ -0,0 +1,116 @@
+(function () {
+  "use strict";
+
+  const canvases = document.querySelectorAll("canvas[data-waveform-url]");
+  if (!canvases.length) {
+    return;
+  }
+
+  // Sidecar layout: see content/waveforms.py.
+  function parsePeaks(buffer) {
+    const view = new DataView(buffer);
+    const magic = String.fromCharCode(view.getUint8(0), view.getUint8(1), view.getUint8(2), view.getUint8(3));
+    if (magic !== "GGWF" || view.getUint8(4) !== 1) {
+      throw new Error("Unsupported waveform sidecar.");
+    }
+    const levelCount = view.getUint8(5);
+    const levels = [];
+    let offset = 16;
+    for (let index = 0; index < levelCount; index += 1) {
+      const count = view.getUint32(offset, true);
+      offset += 4;
+      levels.push(new Int8Array(buffer, offset, count * 2));
+      offset += count * 2;
+    }
+    return levels;
+  }
+
+  function pickLevel(levels, width) {
+    // Coarsest level that still has a peak per pixel; levels are finest first.
+    for (let index = levels.length - 1; index >= 0; index -= 1) {
+      if (levels[index].length / 2 >= width) {
+        return levels[index];
+      }
+    }
+    return levels[0];
+  }
+
+  function draw(canvas, levels, progress) {
+    const ratio = window.devicePixelRatio || 1;
+    const width = Math.max(1, Math.round(canvas.clientWidth * ratio));
+    const height = Math.max(1, Math.round(canvas.clientHeight * ratio));
+    if (canvas.width !== width || canvas.height !== height) {
+      canvas.width = width;
+      canvas.height = height;
+    }
+
+    const pairs = pickLevel(levels, width);
+    const peaks = pairs.length / 2;
+    const style = window.getComputedStyle(canvas);
+    const played = Math.round(width * progress);
+    const middle = height / 2;
+    const context = canvas.getContext("2d");
+    context.clearRect(0, 0, width, height);
+
+    for (let x = 0; x < width; x += 1) {
+      const peak = Math.min(peaks - 1, Math.floor((x / width) * peaks));
+      const low = pairs[peak * 2] / 127;
+      const high = pairs[peak * 2 + 1] / 127;
+      context.fillStyle = x < played
+        ? style.getPropertyValue("--gg-waveform-played")
+        : style.getPropertyValue("--gg-waveform-color");
+      context.fillRect(x, middle - high * middle, 1, Math.max(1, (high - low) * middle));
+    }
+  }
+
+  function attach(canvas) {
+    const audio = canvas.parentElement.querySelector("audio");
+    fetch(canvas.dataset.waveformUrl, { credentials: "same-origin" })
+      .then(function (response) {
+        if (!response.ok) {
+          throw new Error("Waveform request failed.");
+        }
+        return response.arrayBuffer();
+      })
+      .then(function (buffer) {
+        const levels = parsePeaks(buffer);
+        const redraw = function () {
+          const progress = audio && audio.duration ? audio.currentTime / audio.duration : 0;
+          draw(canvas, levels, progress);
+        };
+        redraw();
+        window.addEventListener("resize", redraw);
+        if (!audio) {
+          return;
+        }
+        audio.addEventListener("timeupdate", redraw);
+        audio.addEventListener("seeked", redraw);
+        canvas.addEventListener("click", function (event) {
+          if (!audio.duration) {
+            return;
+          }
+          const rect = canvas.getBoundingClientRect();
+          audio.currentTime = ((event.clientX - rect.left) / rect.width) * audio.duration;
+        });
+      })
+      .catch(function () {
+        canvas.hidden = true;
+      });
+  }
+
+  if (!("IntersectionObserver" in window)) {
+    canvases.forEach(attach);
+    return;
+  }
+  const observer = new IntersectionObserver(function (entries) {
+    entries.forEach(function (entry) {
+      if (entry.isIntersecting) {
+        observer.unobserve(entry.target);
+        attach(entry.target);
+      }
+    });
+  }, { rootMargin: "200px" });
+  canvases.forEach(function (canvas) {
+    observer.observe(canvas);
+  });
+})();
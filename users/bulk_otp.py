@@ -0,0 +1,151 @@
+"""
+Set-based OTP management for the admin dashboard's bulk actions.
+
+Applies the same changes as the single-user path
+(users.views._apply_otp_management_action) to many users at once. Missing
+OTP rows are bulk-created, codes and vote counts bulk-updated, admin
+contact threads upserted and notifications bulk-created. Everything runs
+in one transaction, in batches of BULK_OTP_BATCH_SIZE rows, so a contest
+grant for thousands of fans costs a handful of queries per batch rather
+than five per fan.
+"""
+import random
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from chatapp.models import AdminChatThread
+from content.vote_queue import OTP_KEY
+
+from .models import OTP, Notification
+
+
+# Action -> label used in the delivered notification (None: nothing delivered).
+BULK_OTP_ACTIONS = {
+    "grant": "generated",
+    "extend": "extended",
+    "cancel": None,
+    "reset": "reset",
+}
+
+
+def generate_otp():
+    return str(random.randint(100000, 999999))
+
+
+def _batch_size(batch_size=None):
+    return max(1, int(batch_size or getattr(settings, "BULK_OTP_BATCH_SIZE", 500)))
+
+
+def _chunks(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _apply(otp, action, vote_count, regenerate_code, stamp):
+    # Mirrors OTP.grant_votes / reset_votes / cancel_access.
+    if action == "grant":
+        otp.remaining_votes = vote_count
+        otp.is_active = True
+        otp.last_vote_reset_at = stamp
+        otp.otp_code = generate_otp()
+    elif action == "extend":
+        otp.remaining_votes += vote_count
+        otp.is_active = True
+    elif action == "cancel":
+        otp.remaining_votes = 0
+        otp.is_active = False
+    elif action == "reset":
+        otp.remaining_votes = vote_count
+        otp.is_active = True
+        otp.last_vote_reset_at = stamp
+        if regenerate_code:
+            otp.otp_code = generate_otp()
+    otp.updated_at = stamp
+
+
+def _deliver(users, admin_user, otps, action_label, stamp, batch_size):
+    for chunk in _chunks(users, batch_size):
+        user_ids = [user.pk for user in chunk]
+        existing = set(
+            AdminChatThread.objects.filter(admin=admin_user, user_id__in=user_ids).values_list("user_id", flat=True)
+        )
+        AdminChatThread.objects.bulk_create(
+            [
+                AdminChatThread(admin=admin_user, user_id=user_id, last_contact_at=stamp)
+                for user_id in user_ids
+                if user_id not in existing
+            ],
+            ignore_conflicts=True,
+        )
+        AdminChatThread.objects.filter(admin=admin_user, user_id__in=user_ids).update(
+            user_unread_count=F("user_unread_count") + 1,
+            last_contact_at=stamp,
+            updated_at=stamp,
+        )
+        Notification.objects.bulk_create(
+            [
+                Notification(
+                    user=user,
+                    message=(
+                        f"Admin {action_label} your voting OTP: {otps[user.pk].otp_code} "
+                        f"({otps[user.pk].remaining_votes} vote(s) available)."
+                    ),
+                    created_at=stamp,
+                )
+                for user in chunk
+            ]
+        )
+
+
+def apply_bulk_otp_action(users, admin_user, action, vote_count, regenerate_code=False, batch_size=None):
+    """
+    Apply an OTP action to every user in `users`. Returns one result per
+    user, in order: {"user", "otp", "created"} where `created` means the
+    OTP row did not exist before. Raises ValueError for unknown actions.
+    """
+    if action not in BULK_OTP_ACTIONS:
+        raise ValueError("Invalid OTP action.")
+    users = list(users)
+    vote_count = max(1, int(vote_count or 1))
+    batch_size = _batch_size(batch_size)
+    stamp = timezone.now()
+
+    with transaction.atomic():
+        otps = {}
+        created = set()
+        for chunk in _chunks(users, batch_size):
+            user_ids = [user.pk for user in chunk]
+            existing = set(OTP.objects.filter(user_id__in=user_ids).values_list("user_id", flat=True))
+            missing = [user_id for user_id in user_ids if user_id not in existing]
+            OTP.objects.bulk_create(
+                [OTP(user_id=user_id, otp_code=generate_otp(), remaining_votes=0, is_active=True) for user_id in missing],
+                ignore_conflicts=True,
+            )
+            created.update(missing)
+            otps.update(
+                (otp.user_id, otp)
+                for otp in OTP.objects.select_for_update().filter(user_id__in=user_ids)
+            )
+
+        for otp in otps.values():
+            _apply(otp, action, vote_count, regenerate_code, stamp)
+        OTP.objects.bulk_update(
+            list(otps.values()),
+            ["otp_code", "remaining_votes", "is_active", "last_vote_reset_at", "updated_at"],
+            batch_size=batch_size,
+        )
+
+        action_label = BULK_OTP_ACTIONS[action]
+        if action_label:
+            _deliver(users, admin_user, otps, action_label, stamp, batch_size)
+
+        # bulk_update skips the OTP post_save receivers; drop queued-vote
+        # OTP counters (content.vote_queue) the same way they would.
+        stale_keys = [OTP_KEY.format(otp_id=otp.pk) for otp in otps.values()]
+        transaction.on_commit(lambda: cache.delete_many(stale_keys))
+
+    return [{"user": user, "otp": otps[user.pk], "created": user.pk in created} for user in users]
@@ -0,0 +1,324 @@
+"""
+Streaming exports of votes, rankings, OTP usage and chat unlocks.
+
+Each dataset is a queryset read with .iterator(chunk_size=...), so memory
+use does not depend on table size. Rows are written as CSV or as Parquet
+row groups. Parquet needs the optional pyarrow package. export_response()
+serves a dataset as a StreamingHttpResponse for the admin dashboard;
+write_export() writes a compressed file for `manage.py export_data`.
+"""
+import csv
+import gzip
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.db.models import Count, IntegerField, Max, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+
+from chatapp.models import MatchRating, PeerChatThread
+from content.leaderboard import leaderboard_queryset
+from content.models import Content, Vote
+
+from .models import OTP
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+
+EXPORT_FORMATS = ("csv", "parquet")
+
+
+class ExportError(ValueError):
+    pass
+
+
+class ExportUnavailable(ExportError):
+    # The request is fine, but an optional dependency is missing.
+    pass
+
+
+def _chunk_size():
+    return max(1, int(getattr(settings, "EXPORT_CHUNK_SIZE", 2000)))
+
+
+def _day_start(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def _window(field, date_from=None, date_to=None):
+    # date_to is inclusive: everything before the start of the next day.
+    window = Q()
+    if date_from:
+        window &= Q(**{f"{field}__gte": _day_start(date_from)})
+    if date_to:
+        window &= Q(**{f"{field}__lt": _day_start(date_to + timedelta(days=1))})
+    return window
+
+
+def _votes(date_from=None, date_to=None, genre_id=None):
+    queryset = Vote.objects.filter(_window("timestamp", date_from, date_to)).order_by("pk")
+    if genre_id:
+        queryset = queryset.filter(content__genre_id=genre_id)
+    return queryset.values_list(
+        "pk", "timestamp", "fan_id", "fan__username", "content_id", "content__title", "content__genre__name",
+        "base_value", "value", "is_badge_vote", "otp_code", "tag",
+    ).iterator(chunk_size=_chunk_size())
+
+
+def _rankings(date_from=None, date_to=None, genre_id=None):
+    fields = ("pk", "title", "artist__username", "genre__name", "total_points", "total_votes", "badge_votes")
+    if date_from or date_to:
+        # Standings from the votes cast inside the window.
+        counted = _window("votes__timestamp", date_from, date_to)
+        queryset = Content.objects.all()
+        if genre_id:
+            queryset = queryset.filter(genre_id=genre_id)
+        queryset = (
+            queryset.annotate(
+                total_points=Coalesce(Sum("votes__value", filter=counted), 0),
+                total_votes=Count("votes", filter=counted),
+                badge_votes=Count("votes", filter=counted & Q(votes__is_badge_vote=True)),
+            )
+            .filter(total_votes__gt=0)
+            .order_by("-total_points", "-total_votes", "-upload_date")
+        )
+    else:
+        queryset = leaderboard_queryset(genre_id=genre_id)
+    rows = queryset.values_list(*fields).iterator(chunk_size=_chunk_size())
+    for rank, row in enumerate(rows, start=1):
+        yield (rank, *row)
+
+
+def _otp_usage(date_from=None, date_to=None, genre_id=None):
+    # Every vote the fan cast in the window; the stored otp_code is rotated
+    # by grants and resets, so it cannot tie votes to the current row.
+    votes = Vote.objects.filter(_window("timestamp", date_from, date_to), fan_id=OuterRef("user_id"))
+    if genre_id:
+        votes = votes.filter(content__genre_id=genre_id)
+    queryset = OTP.objects.annotate(
+        votes_cast=Coalesce(
+            Subquery(votes.values("fan_id").annotate(total=Count("pk")).values("total")[:1], output_field=IntegerField()),
+            Value(0),
+        ),
+        last_vote_at=Subquery(votes.values("fan_id").annotate(latest=Max("timestamp")).values("latest")[:1]),
+    ).order_by("pk")
+    if date_from or date_to or genre_id:
+        queryset = queryset.filter(votes_cast__gt=0)
+    return queryset.values_list(
+        "user_id", "user__username", "otp_code", "is_active", "remaining_votes", "votes_cast", "last_vote_at",
+        "last_vote_reset_at", "updated_at",
+    ).iterator(chunk_size=_chunk_size())
+
+
+def _chat_unlocks(date_from=None, date_to=None, genre_id=None):
+    thread = PeerChatThread.objects.filter(
+        Q(user_one=OuterRef("rater_id"), user_two=OuterRef("rated_id"))
+        | Q(user_one=OuterRef("rated_id"), user_two=OuterRef("rater_id"))
+    )
+    queryset = (
+        MatchRating.objects.filter(_window("updated_at", date_from, date_to))
+        .annotate(
+            unlocked_until=Subquery(thread.values("unlocked_until")[:1]),
+            admin_approved=Subquery(thread.values("admin_approved")[:1]),
+        )
+        .order_by("pk")
+    )
+    if genre_id:
+        queryset = queryset.filter(source_content__genre_id=genre_id)
+    return queryset.values_list(
+        "pk", "updated_at", "rater_id", "rater__username", "rated_id", "rated__username", "score",
+        "source_content_id", "source_content__genre__name", "unlocked_until", "admin_approved",
+    ).iterator(chunk_size=_chunk_size())
+
+
+# name -> (rows, [(column, type)]); the types only matter for Parquet.
+DATASETS = {
+    "votes": (
+        _votes,
+        [
+            ("vote_id", "int"), ("timestamp", "datetime"), ("fan_id", "int"), ("fan", "str"),
+            ("content_id", "int"), ("content", "str"), ("genre", "str"), ("base_value", "int"),
+            ("value", "int"), ("is_badge_vote", "bool"), ("otp_code", "str"), ("tag", "str"),
+        ],
+    ),
+    "rankings": (
+        _rankings,
+        [
+            ("rank", "int"), ("content_id", "int"), ("content", "str"), ("artist", "str"), ("genre", "str"),
+            ("total_points", "int"), ("total_votes", "int"), ("badge_votes", "int"),
+        ],
+    ),
+    "otp_usage": (
+        _otp_usage,
+        [
+            ("user_id", "int"), ("username", "str"), ("otp_code", "str"), ("is_active", "bool"),
+            ("remaining_votes", "int"), ("votes_cast", "int"), ("last_vote_at", "datetime"),
+            ("last_vote_reset_at", "datetime"), ("updated_at", "datetime"),
+        ],
+    ),
+    "chat_unlocks": (
+        _chat_unlocks,
+        [
+            ("rating_id", "int"), ("rated_at", "datetime"), ("rater_id", "int"), ("rater", "str"),
+            ("rated_id", "int"), ("rated", "str"), ("score", "int"), ("source_content_id", "int"),
+            ("genre", "str"), ("unlocked_until", "datetime"), ("admin_approved", "bool"),
+        ],
+    ),
+}
+
+
+def export_rows(dataset, date_from=None, date_to=None, genre_id=None):
+    """
+    (columns, row iterator) for a dataset. Raises ExportError for unknown names.
+    """
+    if dataset not in DATASETS:
+        raise ExportError(f"Unknown export dataset: {dataset}.")
+    rows, columns = DATASETS[dataset]
+    return columns, rows(date_from=date_from, date_to=date_to, genre_id=genre_id)
+
+
+class _Echo:
+    # csv.writer target that hands each formatted line straight back.
+    def write(self, value):
+        return value
+
+
+# Leading characters a spreadsheet reads as the start of a formula.
+FORMULA_PREFIXES = ("=", "+", "-", "@")
+
+
+def _csv_cell(value):
+    # Quote user-supplied text such as titles or tags so opening the file
+    # cannot run it as a formula.
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def iter_csv(columns, rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow([name for name, _ in columns])
+    for row in rows:
+        yield writer.writerow([_csv_cell(value) for value in row])
+
+
+class _ChunkSink:
+    # Write-only file object that collects what pyarrow writes until drained.
+    closed = False
+
+    def __init__(self):
+        self.parts = []
+        self.position = 0
+
+    def writable(self):
+        return True
+
+    def tell(self):
+        return self.position
+
+    def write(self, data):
+        data = bytes(data)
+        self.parts.append(data)
+        self.position += len(data)
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self):
+        data, self.parts = b"".join(self.parts), []
+        return data
+
+
+def _arrow_schema(columns):
+    types = {
+        "int": pa.int64(),
+        "str": pa.string(),
+        "bool": pa.bool_(),
+        "datetime": pa.timestamp("us", tz="UTC"),
+    }
+    return pa.schema([(name, types[kind]) for name, kind in columns])
+
+
+def iter_parquet(columns, rows, compression="snappy"):
+    """
+    Parquet bytes, one row group per EXPORT_CHUNK_SIZE rows.
+    """
+    if pq is None:
+        raise ExportUnavailable("Parquet export needs the pyarrow package.")
+    schema = _arrow_schema(columns)
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(pa.PythonFile(sink, mode="w"), schema, compression=compression)
+    batch = []
+
+    def flush_batch():
+        names = [name for name, _ in columns]
+        table = pa.Table.from_pydict(
+            {name: [row[index] for row in batch] for index, name in enumerate(names)}, schema=schema
+        )
+        writer.write_table(table)
+        batch.clear()
+
+    chunk_size = _chunk_size()
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= chunk_size:
+            flush_batch()
+            yield sink.drain()
+    if batch:
+        flush_batch()
+    writer.close()
+    yield sink.drain()
+
+
+def export_response(dataset, fmt, date_from=None, date_to=None, genre_id=None):
+    if fmt not in EXPORT_FORMATS:
+        raise ExportError(f"Unknown export format: {fmt}.")
+    columns, rows = export_rows(dataset, date_from=date_from, date_to=date_to, genre_id=genre_id)
+    if fmt == "parquet" and pq is None:
+        raise ExportUnavailable("Parquet export needs the pyarrow package.")
+    if fmt == "csv":
+        response = StreamingHttpResponse(iter_csv(columns, rows), content_type="text/csv")
+    else:
+        response = StreamingHttpResponse(iter_parquet(columns, rows), content_type="application/vnd.apache.parquet")
+    stamp = timezone.localdate().strftime("%Y%m%d")
+    response["Content-Disposition"] = f'attachment; filename="{dataset}-{stamp}.{fmt}"'
+    return response
+
+
+def write_export(path, dataset, fmt, date_from=None, date_to=None, genre_id=None):
+    """
+    Write a dataset to `path`: gzip-compressed CSV, or zstd-compressed
+    Parquet. Returns the number of data rows written.
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ExportError(f"Unknown export format: {fmt}.")
+    columns, rows = export_rows(dataset, date_from=date_from, date_to=date_to, genre_id=genre_id)
+    if fmt == "parquet" and pq is None:
+        raise ExportUnavailable("Parquet export needs the pyarrow package.")
+    written = 0
+
+    def counted(source):
+        nonlocal written
+        for row in source:
+            written += 1
+            yield row
+
+    if fmt == "csv":
+        with gzip.open(path, "wt", encoding="utf-8", newline="") as handle:
+            for line in iter_csv(columns, counted(rows)):
+                handle.write(line)
+    else:
+        with open(path, "wb") as handle:
+            for data in iter_parquet(columns, counted(rows), compression="zstd"):
+                handle.write(data)
+    return written
@@ -0,0 +1,49 @@
+import argparse
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from users.exports import DATASETS, EXPORT_FORMATS, ExportError, write_export
+
+
+def _date(value):
+    try:
+        parsed = parse_date(value)
+    except ValueError:
+        parsed = None
+    if parsed is None:
+        raise argparse.ArgumentTypeError(f"Expected YYYY-MM-DD, got {value!r}.")
+    return parsed
+
+
+class Command(BaseCommand):
+    help = "Write votes, rankings, OTP usage or chat unlocks to a compressed CSV or Parquet file."
+
+    def add_arguments(self, parser):
+        parser.add_argument("dataset", choices=sorted(DATASETS))
+        parser.add_argument("--format", choices=EXPORT_FORMATS, default="csv", help="File format (default: csv).")
+        parser.add_argument(
+            "--output",
+            help="Target path (default: <dataset>-<date>.csv.gz or .parquet in the current directory).",
+        )
+        parser.add_argument("--date-from", type=_date, help="First day to include (YYYY-MM-DD).")
+        parser.add_argument("--date-to", type=_date, help="Last day to include (YYYY-MM-DD).")
+        parser.add_argument("--genre", type=int, help="Only include this genre id.")
+
+    def handle(self, *args, **options):
+        dataset, fmt = options["dataset"], options["format"]
+        suffix = "csv.gz" if fmt == "csv" else "parquet"
+        output = options["output"] or f"{dataset}-{timezone.localdate():%Y%m%d}.{suffix}"
+        try:
+            written = write_export(
+                output,
+                dataset,
+                fmt,
+                date_from=options["date_from"],
+                date_to=options["date_to"],
+                genre_id=options["genre"],
+            )
+        except ExportError as exc:
+            raise CommandError(str(exc))
+        self.stdout.write(self.style.SUCCESS(f"Wrote {written} {dataset} row(s) to {output}."))
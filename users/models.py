@@ -8,6 +8,8 @@ from django.utils import timezone
 from datetime import timedelta
 from django.core.exceptions import ValidationError
 
+from .policy import cached_policy
+
 
 
 class Notification(models.Model):
@@ -177,6 +179,11 @@ class VotingTokenPolicy(models.Model):
 
     @classmethod
     def current(cls):
+        # Served from a short-lived per-process snapshot (see users.policy).
+        return cached_policy(cls._load)
+
+    @classmethod
+    def _load(cls):
         policy, _ = cls.objects.get_or_create(pk=1)
         return policy
 
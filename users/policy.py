@@ -0,0 +1,103 @@
+"""
+Cached reads of the VotingTokenPolicy singleton.
+
+The policy is read several times per request (vote checks, content_detail,
+the admin_contact context processor on every render). Each process keeps
+the row it last loaded and trusts it for VOTING_POLICY_CACHE_SECONDS; after
+that it compares a version number in the shared cache and only reloads the
+row when the version moved. Saving or deleting the policy bumps the version
+once the write commits, so every worker sees admin changes within one TTL.
+
+The version only means something when the cache is shared between workers.
+With a per-process cache (LocMemCache, the fallback without REDIS_URL) a
+bump never reaches the other processes, so the row is simply reloaded once
+the TTL runs out.
+"""
+import copy
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import connection, transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+
+POLICY_VERSION_KEY = "voting-policy:version"
+
+_cache_lock = threading.Lock()
+_snapshot = None  # (expires_at, version, policy)
+
+
+def _cache_seconds():
+    return max(0, int(getattr(settings, "VOTING_POLICY_CACHE_SECONDS", 5)))
+
+
+def _cache_is_shared():
+    return not isinstance(caches["default"], (LocMemCache, DummyCache))
+
+
+def policy_version():
+    version = cache.get(POLICY_VERSION_KEY)
+    if version is None:
+        cache.add(POLICY_VERSION_KEY, 1, timeout=None)
+        version = cache.get(POLICY_VERSION_KEY, 1)
+    return version
+
+
+def bump_policy_version():
+    try:
+        return cache.incr(POLICY_VERSION_KEY)
+    except ValueError:
+        cache.add(POLICY_VERSION_KEY, 2, timeout=None)
+        return cache.get(POLICY_VERSION_KEY, 2)
+
+
+def forget_cached_policy():
+    global _snapshot
+    with _cache_lock:
+        _snapshot = None
+
+
+def cached_policy(load):
+    """
+    The current policy row; `load` fetches it from the database. Callers get
+    their own copy, so changing and saving it never touches the snapshot.
+    """
+    global _snapshot
+    if connection.in_atomic_block:
+        # Inside a transaction, read its own writes and never cache them:
+        # they may still be rolled back.
+        return load()
+
+    with _cache_lock:
+        snapshot = _snapshot
+    now = time.monotonic()
+    if snapshot and snapshot[0] > now:
+        return copy.copy(snapshot[2])
+
+    # Read the version before the row, so a change racing with the load
+    # only costs one extra reload.
+    if _cache_is_shared():
+        version = policy_version()
+        policy = snapshot[2] if snapshot and snapshot[1] == version else load()
+    else:
+        version, policy = None, load()
+    with _cache_lock:
+        _snapshot = (now + _cache_seconds(), version, policy)
+    return copy.copy(policy)
+
+
+@receiver(post_save, sender="users.VotingTokenPolicy")
+@receiver(post_delete, sender="users.VotingTokenPolicy")
+def invalidate_policy(sender, **kwargs):
+    def publish():
+        forget_cached_policy()
+        bump_policy_version()
+
+    # Drop now for this request and again once the write is visible to others.
+    forget_cached_policy()
+    transaction.on_commit(publish)
@@ -1,15 +1,28 @@
+import csv
+import gzip
+import io
+import os
+import shutil
+import tempfile
+import time
+from datetime import timedelta
+from unittest import mock
+
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.core.cache import cache
 from django.core.files.uploadedfile import SimpleUploadedFile
-from django.test import Client, TestCase, override_settings
+from django.core.management import call_command
+from django.test import Client, TestCase, TransactionTestCase, override_settings
 from django.urls import reverse
 from django.utils import timezone
 
-from content.models import Comment, Content, LivePerformance, Vote
+from content.models import Comment, Content, Genre, LivePerformance, Vote
 from chatapp.models import AdminChatThread, MatchRating, PeerChatThread
 from chatapp.services import record_match_rating
 
+from . import exports, policy as policy_cache
+from .bulk_otp import apply_bulk_otp_action
 from .models import Announcement, DismissedAnnouncement, Notification, OTP, Role, VotingTokenPolicy
 
 CustomUser = get_user_model()
@@ -311,15 +324,18 @@ class UsersAppTests(TestCase):
             content_type="image/jpeg",
         )
 
-        response = self.client.post(
-            self.profile_url,
-            {
-                "username": self.artist_user.username,
-                "email": self.artist_user.email,
-                "bio": "Updated bio",
-                "profile_picture": valid_image,
-            },
-        )
+        media_root = tempfile.mkdtemp(prefix="media-")
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        with self.settings(MEDIA_ROOT=media_root):
+            response = self.client.post(
+                self.profile_url,
+                {
+                    "username": self.artist_user.username,
+                    "email": self.artist_user.email,
+                    "bio": "Updated bio",
+                    "profile_picture": valid_image,
+                },
+            )
 
         self.assertEqual(response.status_code, 302)
         self.artist_user.refresh_from_db()
@@ -562,6 +578,42 @@ class UsersAppTests(TestCase):
         )
         self.assertEqual(direct_response.status_code, 200)
 
+    def test_admin_dashboard_rejects_empty_user_picks(self):
+        self.client.login(
+            username=self.admin_user.username,
+            password=self.admin_data["password"],
+        )
+
+        for data in (
+            {"peer_chat_action": "allow", "first_user_id": "", "second_user_id": self.fan_user.id},
+            {"generate_voucher": "1", "user_id": "", "performance_id": ""},
+            {"assign_badge": "1", "user_id": "", "badge_level": "1"},
+        ):
+            response = self.client.post(reverse("admin_dashboard"), data, follow=True)
+            self.assertEqual(response.status_code, 200)
+            self.assertContains(response, "No user selected.")
+        self.assertFalse(PeerChatThread.objects.exists())
+
+    def test_admin_dashboard_picker_falls_back_to_typed_username(self):
+        self.client.login(
+            username=self.admin_user.username,
+            password=self.admin_data["password"],
+        )
+
+        response = self.client.post(
+            reverse("admin_dashboard"),
+            {
+                "peer_chat_action": "allow",
+                "first_user_id": "",
+                "first_username": self.artist_user.username.upper(),
+                "second_user_id": "",
+                "second_username": self.fan_user.username,
+            },
+        )
+
+        self.assertEqual(response.status_code, 302)
+        self.assertTrue(PeerChatThread.objects.filter(admin_approved=True).exists())
+
     def test_verify_otp_redirects_when_disabled(self):
         pending_user = CustomUser.objects.create_user(
             username="pending_user",
@@ -786,3 +838,172 @@ class AnnouncementTests(TestCase):
                 announcement=self.announcement,
             ).exists()
         )
+
+
+# The snapshot is bypassed inside transactions, so these run in autocommit.
+class BulkOtpActionTest(TestCase):
+    def setUp(self):
+        self.admin = get_user_model().objects.create_user(
+            username="bulk_admin", password="password", role=Role.ADMIN, is_staff=True
+        )
+
+    def make_fans(self, count, prefix):
+        return [
+            get_user_model().objects.create_user(username=f"{prefix}{index}", password="password", role=Role.FAN)
+            for index in range(count)
+        ]
+
+    def test_extend_reports_per_user_results_and_upserts_threads(self):
+        fans = self.make_fans(3, "bulk_fan")
+        OTP.objects.create(user=fans[0], otp_code="111111", remaining_votes=2, is_active=False)
+        AdminChatThread.objects.create(admin=self.admin, user=fans[0], user_unread_count=4)
+
+        results = apply_bulk_otp_action(fans, self.admin, "extend", 3, batch_size=2)
+
+        self.assertEqual([result["user"] for result in results], fans)
+        self.assertEqual([result["created"] for result in results], [False, True, True])
+        self.assertEqual([result["otp"].remaining_votes for result in results], [5, 3, 3])
+        existing = OTP.objects.get(user=fans[0])
+        self.assertEqual((existing.otp_code, existing.remaining_votes, existing.is_active), ("111111", 5, True))
+        self.assertEqual(
+            dict(AdminChatThread.objects.filter(admin=self.admin).values_list("user__username", "user_unread_count")),
+            {"bulk_fan0": 5, "bulk_fan1": 1, "bulk_fan2": 1},
+        )
+        self.assertTrue(
+            Notification.objects.filter(
+                user=fans[1], message=f"Admin extended your voting OTP: {results[1]['otp'].otp_code} (3 vote(s) available)."
+            ).exists()
+        )
+
+        apply_bulk_otp_action(fans, self.admin, "cancel", 1)
+        self.assertFalse(OTP.objects.filter(is_active=True).exists())
+        self.assertEqual(Notification.objects.count(), 3)
+
+    def test_query_count_does_not_grow_with_the_selection(self):
+        small, large = self.make_fans(2, "small_fan"), self.make_fans(12, "large_fan")
+        for fans in (small, large):
+            with self.assertNumQueries(10):
+                apply_bulk_otp_action(fans, self.admin, "grant", 4)
+        self.assertEqual(set(OTP.objects.values_list("remaining_votes", flat=True)), {4})
+
+        with self.assertRaisesMessage(ValueError, "Invalid OTP action."):
+            apply_bulk_otp_action(small, self.admin, "revoke", 1)
+
+
+class StreamingExportTest(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.admin = User.objects.create_user(username="export_admin", password="password", role=Role.ADMIN, is_staff=True)
+        self.fan = User.objects.create_user(username="export_fan", password="password", role=Role.FAN)
+        artist = User.objects.create_user(username="export_artist", password="password", role=Role.ARTIST)
+        self.rock, pop = Genre.objects.create(name="Export Rock"), Genre.objects.create(name="Export Pop")
+        self.song = Content.objects.create(title="Rock Song", artist=artist, genre=self.rock, is_approved=True)
+        tune = Content.objects.create(title="Pop Tune", artist=artist, genre=pop, is_approved=True)
+        OTP.objects.create(user=self.fan, otp_code="424242", remaining_votes=1)
+        Vote.objects.create(content=self.song, fan=self.fan, base_value=9, value=9, otp_code="424242", tag="a")
+        old = Vote.objects.create(content=tune, fan=self.fan, base_value=7, value=70, otp_code="424242", tag="b")
+        Vote.objects.filter(pk=old.pk).update(timestamp=timezone.now() - timedelta(days=10))
+
+    def download(self, **params):
+        response = self.client.get(reverse("export_data"), params)
+        return response, list(csv.reader(io.StringIO(b"".join(response.streaming_content).decode())))
+
+    def test_admin_streams_filtered_csv_exports(self):
+        self.client.login(username="export_admin", password="password")
+
+        response, rows = self.download(dataset="votes", format="csv", genre=self.rock.pk)
+        self.assertTrue(response.streaming)
+        self.assertIn('filename="votes-', response["Content-Disposition"])
+        self.assertEqual(rows[0][:4], ["vote_id", "timestamp", "fan_id", "fan"])
+        self.assertEqual([row[5] for row in rows[1:]], ["Rock Song"])
+
+        _, rows = self.download(dataset="rankings", format="csv")
+        self.assertEqual([(row[0], row[2], row[5]) for row in rows[1:]], [("1", "Pop Tune", "70"), ("2", "Rock Song", "9")])
+
+        since = (timezone.localdate() - timedelta(days=2)).isoformat()
+        _, rows = self.download(dataset="rankings", format="csv", date_from=since)
+        self.assertEqual([row[2] for row in rows[1:]], ["Rock Song"])
+
+        with mock.patch.object(exports, "pq", None):
+            self.assertEqual(self.client.get(reverse("export_data"), {"dataset": "votes", "format": "parquet"}).status_code, 503)
+            self.assertEqual(self.client.get(reverse("export_data"), {"dataset": "nope", "format": "parquet"}).status_code, 400)
+        self.assertEqual(self.client.get(reverse("export_data"), {"dataset": "nope", "format": "csv"}).status_code, 400)
+
+        self.client.login(username="export_fan", password="password")
+        self.assertEqual(self.client.get(reverse("export_data"), {"format": "csv"}).status_code, 403)
+
+    def test_csv_cells_cannot_start_a_formula(self):
+        Content.objects.filter(pk=self.song.pk).update(title='=HYPERLINK("http://evil.example","x")')
+        Vote.objects.filter(content=self.song).update(tag="@SUM(A1)")
+        self.client.login(username="export_admin", password="password")
+
+        _, rows = self.download(dataset="votes", format="csv", genre=self.rock.pk)
+        self.assertEqual(rows[1][5], '\'=HYPERLINK("http://evil.example","x")')
+        self.assertEqual(rows[1][-1], "'@SUM(A1)")
+        self.assertEqual(rows[1][8], "9")
+
+        self.assertEqual(self.client.get(reverse("export_data"), {"format": "pdf"}).status_code, 400)
+
+    def test_command_writes_gzipped_csv(self):
+        # Votes count by fan even after a grant rotated the code.
+        OTP.objects.filter(user=self.fan).update(otp_code="515151")
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "otp.csv.gz")
+            out = io.StringIO()
+            call_command("export_data", "otp_usage", output=path, stdout=out)
+            with gzip.open(path, "rt", encoding="utf-8") as handle:
+                rows = list(csv.reader(handle))
+
+        self.assertIn("Wrote 1 otp_usage row(s)", out.getvalue())
+        self.assertEqual(rows[1][1:3], ["export_fan", "515151"])
+        self.assertEqual(rows[1][5], "2")
+
+
+class VotingPolicyCacheTest(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        VotingTokenPolicy.objects.create(pk=1)
+        policy_cache.forget_cached_policy()
+        self.addCleanup(policy_cache.forget_cached_policy)
+
+    @override_settings(VOTING_POLICY_CACHE_SECONDS=60)
+    def test_reads_are_served_from_the_snapshot(self):
+        VotingTokenPolicy.current()
+
+        with self.assertNumQueries(0):
+            self.assertFalse(VotingTokenPolicy.voting_is_suspended())
+            self.assertFalse(VotingTokenPolicy.tokens_are_paused())
+            self.assertEqual(VotingTokenPolicy.message_retention_ms(), 24 * 60 * 60 * 1000)
+
+        policy = VotingTokenPolicy.current()
+        policy.tokens_paused = True
+        self.assertFalse(VotingTokenPolicy.tokens_are_paused())
+
+        policy.save(update_fields=["tokens_paused", "updated_at"])
+        self.assertTrue(VotingTokenPolicy.tokens_are_paused())
+
+    @override_settings(VOTING_POLICY_CACHE_SECONDS=0)
+    @mock.patch.object(policy_cache, "_cache_is_shared", return_value=True)
+    def test_expired_snapshot_reloads_only_when_the_version_moves(self, _shared):
+        VotingTokenPolicy.current()
+        # Another worker's write, before its commit hook bumped the version.
+        VotingTokenPolicy.objects.filter(pk=1).update(voting_suspended=True)
+
+        with self.assertNumQueries(0):
+            self.assertFalse(VotingTokenPolicy.voting_is_suspended())
+
+        policy_cache.bump_policy_version()
+        with self.assertNumQueries(1):
+            self.assertTrue(VotingTokenPolicy.voting_is_suspended())
+
+    @override_settings(VOTING_POLICY_CACHE_SECONDS=60)
+    def test_per_process_cache_reloads_after_the_ttl(self):
+        self.assertFalse(VotingTokenPolicy.voting_is_suspended())
+        # A save in another process: its version bump lands in that
+        # process's own LocMemCache, so the version seen here never moves.
+        VotingTokenPolicy.objects.filter(pk=1).update(voting_suspended=True)
+        self.assertFalse(VotingTokenPolicy.voting_is_suspended())
+
+        later = time.monotonic() + 61
+        with mock.patch.object(policy_cache.time, "monotonic", return_value=later), self.assertNumQueries(1):
+            self.assertTrue(VotingTokenPolicy.voting_is_suspended())
@@ -9,7 +9,6 @@ from django.contrib.auth.mixins import LoginRequiredMixin
 from django.views.generic import UpdateView
 from django.urls import reverse_lazy
 from django.contrib.auth.tokens import default_token_generator
-import random
 from django.http import JsonResponse
 from .models import Announcement, DismissedAnnouncement
 import logging
@@ -21,10 +20,19 @@ from django.db.models import Avg, Sum, Count, Max
 from django.db.models.functions import Coalesce
 from django.core.mail import send_mail, BadHeaderError
 from django.core.cache import cache
+from django.core.paginator import Paginator
 from django.utils.timezone import now
 from datetime import timedelta
 from .models import CustomUser, Role, Follow, OTP, TermsAndConditions, VotingTokenPolicy
-from content.models import Content, Comment, Badge, Voucher
+from .bulk_otp import apply_bulk_otp_action, generate_otp
+from .exports import ExportError, ExportUnavailable, export_response
+from content.models import Content, Comment, Badge, Genre, Voucher
+from content.counters import reset_vote_counters
+from content.feed import bump_feed_version
+from content.leaderboard import leaderboard_queryset
+from content.neighbors import schedule_neighbor_refresh
+from search.services import search_content
+from search.typeahead import refresh_content_entries
 from subscriptions.models import UserSubscription
 from content.models import ArtistUploadLimit, LivePerformance
 from chatapp.models import AdminChatThread, PeerChatThread
@@ -42,25 +50,27 @@ from django.http import HttpResponseForbidden
 from django.http import JsonResponse
 from content.views import calculate_final_ranking
 from django.utils import timezone
-import csv
-from io import BytesIO
-
-try:
-    from reportlab.lib.pagesizes import A4
-    from reportlab.pdfgen import canvas
-except ImportError:
-    A4 = None
-    canvas = None
+from django.utils.dateparse import parse_date
 
 logger = logging.getLogger(__name__)
 
 
-def get_content_ranking_queryset():
-    return Content.objects.annotate(
-        total_points=Coalesce(Sum("votes__value"), 0),
-        total_votes=Count("votes"),
-        badge_votes=Count("votes", filter=Q(votes__is_badge_vote=True)),
-    ).order_by("-total_points", "-total_votes", "-upload_date")
+RANKING_PAGE_SIZE = 25
+
+
+def get_content_ranking_queryset(genre_id=None):
+    return leaderboard_queryset(genre_id=genre_id)
+
+
+def get_content_ranking_page(request):
+    """
+    Page through the maintained leaderboard, optionally within one genre.
+    """
+    genre_id = request.GET.get("ranking_genre") or None
+    if genre_id and not str(genre_id).isdigit():
+        genre_id = None
+    paginator = Paginator(get_content_ranking_queryset(genre_id=genre_id), RANKING_PAGE_SIZE)
+    return paginator.get_page(request.GET.get("ranking_page")), genre_id
 
 
 # Utility function for role-based redirection
@@ -80,6 +90,14 @@ CustomUser = get_user_model()  # Ensure correct user model
 REGISTER_THROTTLE_SCOPE = "register"
 LOGIN_THROTTLE_SCOPE = "login"
 OTP_DISABLED_MESSAGE = "OTP is disabled. Please log in with password."
+BULK_CONTENT_ACTIONS = {
+    "approve_for_voting",
+    "disapprove_for_voting",
+    "reset_content_votes",
+    "approve",
+    "disapprove",
+    "assign_category",
+}
 
 
 def _positive_int(value, default):
@@ -90,6 +108,22 @@ def _positive_int(value, default):
     return parsed if parsed > 0 else default
 
 
+def _picked_user(post, id_field, name_field, queryset=None):
+    """
+    User chosen in a dashboard typeahead picker: the hidden id the script
+    fills in, else the typed username (no-JS fallback). None if neither
+    names a user.
+    """
+    queryset = CustomUser.objects.all() if queryset is None else queryset
+    user_id = (post.get(id_field) or "").strip()
+    if user_id.isdigit():
+        return queryset.filter(pk=user_id).first()
+    username = (post.get(name_field) or "").strip()
+    if username:
+        return queryset.filter(username__iexact=username).first()
+    return None
+
+
 def _deliver_otp_admin_contact(user, admin_user, otp, action_label):
     thread, created = AdminChatThread.objects.get_or_create(
         admin=admin_user,
@@ -216,10 +250,6 @@ def _redirect_otp_disabled(request):
 
 
 # Generate OTP
-def generate_otp():
-    return str(random.randint(100000, 999999))
-
-
 def send_otp_email(user, otp):
     subject = "Your OTP Code"
     message = (
@@ -418,10 +448,11 @@ def admin_dashboard(request):
 
     # Initialize content_ranking with an empty queryset
     content_ranking = Content.objects.none()
+    ranking_genre = None
 
     # Calculate voting statistics for display, even if no form is submitted
     try:
-        content_ranking = get_content_ranking_queryset()
+        content_ranking, ranking_genre = get_content_ranking_page(request)
     except Exception as e:
         logger.error(f"Error calculating voting statistics: {str(e)}")
         messages.error(
@@ -473,6 +504,7 @@ def admin_dashboard(request):
         elif action == "reset_content_votes" and content_ids:
             contents = Content.objects.filter(id__in=content_ids)
             vote_count = Vote.objects.filter(content__in=contents).delete()[0]
+            reset_vote_counters(content_ids)
             rating_count = 0
             for content in contents:
                 rating_count += reset_content_rating_chat_access(content)
@@ -486,6 +518,7 @@ def admin_dashboard(request):
 
         if action == "approve" and content_ids:
             Content.objects.filter(id__in=content_ids).update(is_approved=True)
+            schedule_neighbor_refresh(content_ids)
             messages.success(request, f"Approved {len(content_ids)} content items.")
         elif action == "disapprove" and content_ids:
             Content.objects.filter(id__in=content_ids).update(is_approved=False)
@@ -504,6 +537,10 @@ def admin_dashboard(request):
                 f"Assigned category '{category}' to {len(content_ids)} content items.",
             )
 
+        if content_ids and action in BULK_CONTENT_ACTIONS:
+            bump_feed_version()
+            refresh_content_entries(content_ids)
+
     # Handle OTP access controls
     if request.method == "POST" and request.POST.get("token_policy_action"):
         token_policy_action = request.POST.get("token_policy_action")
@@ -576,14 +613,12 @@ def admin_dashboard(request):
 
     if request.method == "POST" and request.POST.get("peer_chat_action"):
         peer_chat_action = request.POST.get("peer_chat_action")
-        first_user = get_object_or_404(
-            CustomUser.objects.exclude(role=Role.ADMIN),
-            id=request.POST.get("first_user_id"),
-        )
-        second_user = get_object_or_404(
-            CustomUser.objects.exclude(role=Role.ADMIN),
-            id=request.POST.get("second_user_id"),
-        )
+        candidates = CustomUser.objects.exclude(role=Role.ADMIN)
+        first_user = _picked_user(request.POST, "first_user_id", "first_username", candidates)
+        second_user = _picked_user(request.POST, "second_user_id", "second_username", candidates)
+        if first_user is None or second_user is None:
+            messages.error(request, "No user selected.")
+            return redirect("admin_dashboard")
 
         try:
             if peer_chat_action == "allow":
@@ -678,31 +713,34 @@ def admin_dashboard(request):
             messages.error(request, "Select at least one active non-admin user.")
             return redirect("admin_dashboard")
 
-        updated_count = 0
-        for selected_user in selected_users:
-            try:
-                _apply_otp_management_action(
-                    user=selected_user,
-                    admin_user=request.user,
-                    action=bulk_action,
-                    vote_count=vote_count,
-                    regenerate_code=regenerate_code,
-                )
-                updated_count += 1
-            except ValueError:
-                messages.error(request, "Invalid bulk OTP action.")
-                return redirect("admin_dashboard")
+        try:
+            results = apply_bulk_otp_action(
+                selected_users,
+                admin_user=request.user,
+                action=bulk_action,
+                vote_count=vote_count,
+                regenerate_code=regenerate_code,
+            )
+        except ValueError:
+            messages.error(request, "Invalid bulk OTP action.")
+            return redirect("admin_dashboard")
 
+        created_count = sum(1 for result in results if result["created"])
         messages.success(
             request,
-            f"Bulk OTP {bulk_action} completed for {updated_count} user(s).",
+            f"Bulk OTP {bulk_action} completed for {len(results)} user(s) ({created_count} new OTP record(s)).",
         )
         return redirect("admin_dashboard")
 
     if request.method == "POST" and "generate_voucher" in request.POST:
-        user_id = request.POST.get("user_id")
+        user = _picked_user(request.POST, "user_id", "username")
+        if user is None:
+            messages.error(request, "No user selected.")
+            return redirect("admin_dashboard")
         performance_id = request.POST.get("performance_id")
-        user = get_object_or_404(CustomUser, id=user_id)
+        if not (performance_id or "").isdigit():
+            messages.error(request, "No performance selected.")
+            return redirect("admin_dashboard")
         performance = get_object_or_404(LivePerformance, id=performance_id)
         code = generate_otp()
         Voucher.objects.create(
@@ -715,14 +753,12 @@ def admin_dashboard(request):
     if request.method == "POST" and (
         "assign_badge" in request.POST or "remove_badge" in request.POST
     ):
-        user_id = request.POST.get("user_id")
+        fan = _picked_user(request.POST, "user_id", "username")
 
-        if not user_id:
+        if fan is None:
             messages.error(request, "No user selected.")
             return redirect("admin_dashboard")
 
-        fan = get_object_or_404(CustomUser, id=user_id)
-
         if "assign_badge" in request.POST:
             badge_level = int(request.POST.get("badge_level", 1))
             badge, created = Badge.objects.get_or_create(user=fan)
@@ -776,6 +812,8 @@ def admin_dashboard(request):
             "pending_content": Content.objects.filter(is_approved=False).count(),
         },
         "content_ranking": content_ranking,  # Add voting statistics to context
+        "ranking_genre": ranking_genre,
+        "ranking_genres": Genre.objects.order_by("name"),
         "recent_badge_votes": recent_badge_votes,
         "performances": LivePerformance.objects.all(),
         "live_performances": live_performances,
@@ -787,59 +825,30 @@ def admin_dashboard(request):
     return render(request, "users/admin_dashboard.html", context)
 
 
+@login_required
 def export_data(request):
-    format_type = request.GET.get("format")  # Get format from request
-
-    if format_type == "csv":
-        return generate_csv()
-    elif format_type == "pdf":
-        return generate_pdf()
-    else:
-        return HttpResponse("Invalid format", status=400)
-
-
-def generate_csv():
-    response = HttpResponse(content_type="text/csv")
-    response["Content-Disposition"] = 'attachment; filename="data.csv"'
-
-    writer = csv.writer(response)
-    writer.writerow(["Column1", "Column2", "Column3"])  # Header
-    writer.writerow(["Data1", "Data2", "Data3"])  # Example row
-
-    return response
-
+    if not request.user.has_role(Role.ADMIN):
+        return HttpResponseForbidden("Admins only.")
 
-def generate_pdf():
-    if canvas is None or A4 is None:
-        return HttpResponse(
-            "PDF export is unavailable: install reportlab to enable this feature.",
-            status=503,
+    try:
+        date_from = parse_date(request.GET.get("date_from") or "")
+        date_to = parse_date(request.GET.get("date_to") or "")
+    except ValueError:
+        return HttpResponse("Invalid date.", status=400)
+    genre_id = request.GET.get("genre") or None
+    if genre_id and not str(genre_id).isdigit():
+        genre_id = None
+    try:
+        return export_response(
+            request.GET.get("dataset") or "rankings",
+            request.GET.get("format"),
+            date_from=date_from,
+            date_to=date_to,
+            genre_id=genre_id,
         )
-
-    response = HttpResponse(content_type="application/pdf")
-    response["Content-Disposition"] = 'attachment; filename="data.pdf"'
-
-    buffer = BytesIO()
-    pdf = canvas.Canvas(buffer, pagesize=A4)
-    width, height = A4
-
-    # Generate logo as text with styling
-    pdf.setFont("Helvetica-Bold", 20)
-    pdf.drawCentredString(width / 2, height - 50, "Genre Genius")
-
-    pdf.setFillColorRGB(1, 0.8, 0)  # Orange Gradient effect simulation
-    pdf.rect(
-        (width / 2) - 50, height - 55, 100, 5, fill=True, stroke=False
-    )  # Underline effect
-
-    pdf.setFont("Helvetica", 12)
-    pdf.drawString(100, height - 100, "Sample Data")
-
-    pdf.save()
-    buffer.seek(0)
-
-    response.write(buffer.read())
-    return response
+    except ExportError as exc:
+        status = 503 if isinstance(exc, ExportUnavailable) else 400
+        return HttpResponse(str(exc), status=status)
 
 
 # Artist Dashboard
@@ -1169,6 +1178,7 @@ def toggle_content_voting(request, content_id, action):
     content = get_object_or_404(Content, id=content_id)
     if action == "reset":
         vote_count = Vote.objects.filter(content=content).delete()[0]
+        reset_vote_counters([content.id])
         rating_count = reset_content_rating_chat_access(content)
         messages.success(
             request,
@@ -1196,14 +1206,18 @@ def voting_statistics(request):
     if not request.user.has_role(Role.ADMIN):
         return redirect("dashboard")
 
-    content_ranking = get_content_ranking_queryset()
+    content_ranking, ranking_genre = get_content_ranking_page(request)
 
     context = {
         "content_ranking": content_ranking,
+        "ranking_genre": ranking_genre,
     }
     return render(request, "users/voting_statistics.html", context)
 
 
+SEARCH_USER_LIMIT = 12
+
+
 def search_results(request):
     query = request.GET.get("q", "").strip()
 
@@ -1213,12 +1227,10 @@ def search_results(request):
         # Search for users (Check if users exist)
         users = CustomUser.objects.filter(
             Q(username__icontains=query) | Q(email__icontains=query)
-        )
+        ).order_by("username")[:SEARCH_USER_LIMIT]
 
-        # Search for content
-        content = Content.objects.filter(
-            Q(title__icontains=query) | Q(description__icontains=query)
-        ).filter(is_approved=True, is_visible=True)
+        # Ranked content search (see search.backends)
+        content = search_content(query, page=request.GET.get("page"))
 
     return render(
         request,
@@ -1231,8 +1243,6 @@ def search_results(request):
     )
 
 
-from django.core.paginator import Paginator
-
 
 @login_required
 def get_announcements(request):